@@ -0,0 +1,115 @@
+"""Vectorized date analytics over a graph's BirthColumn. Requires NumPy."""
+
+from datetime import date
+from birth_column import MISSING
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+DAYS_PER_YEAR = 365.25
+EPOCH_ORDINAL = date(1970, 1, 1).toordinal()
+
+
+def require_numpy():
+    """Raises ImportError with a helpful message if NumPy isn't installed."""
+
+    if np is None:
+        raise ImportError("Date analytics require NumPy. Install it with 'pip install numpy'.")
+
+
+def _known_ordinals(column):
+    # np.frombuffer reads the array in place; masking copies, so no view of the growable array outlives the call.
+    ordinals = np.frombuffer(column.ordinals, dtype=np.int64)
+    return ordinals[ordinals != MISSING]
+
+
+def _ages(column, today):
+    today = today or date.today()
+    return (today.toordinal() - _known_ordinals(column)) / DAYS_PER_YEAR
+
+
+def average_age(column, today=None):
+    """
+    Returns the average age in years of people with a birthdate, or None if nobody has one.
+
+    Args:
+        column (BirthColumn): The graph's birth column.
+        today (datetime.date): Optionally, the day to measure ages on. Defaults to the current date.
+    """
+
+    require_numpy()
+    ages = _ages(column, today)
+    return float(ages.mean()) if ages.size else None
+
+
+def age_distribution(column, band=10, today=None):
+    """
+    Counts people with a birthdate by age band.
+
+    Args:
+        column (BirthColumn): The graph's birth column.
+        band (int): The width of each band in years.
+        today (datetime.date): Optionally, the day to measure ages on. Defaults to the current date.
+
+    Returns:
+        distribution (list): (lowest age, count) pairs, youngest band first.
+    """
+
+    require_numpy()
+    ages = _ages(column, today)
+    if not ages.size:
+        return []
+    # Anyone with a birthdate in the future is counted in the youngest band.
+    counts = np.bincount(np.maximum(ages, 0).astype(np.int64) // band)
+    return [(index * band, int(count)) for index, count in enumerate(counts)]
+
+
+def birth_year_histogram(column):
+    """
+    Counts people with a birthdate by the year they were born.
+
+    Args:
+        column (BirthColumn): The graph's birth column.
+
+    Returns:
+        histogram (list): (year, count) pairs in year order.
+    """
+
+    require_numpy()
+    days = (_known_ordinals(column) - EPOCH_ORDINAL).astype('datetime64[D]')
+    years = days.astype('datetime64[Y]').astype(np.int64) + 1970
+    values, counts = np.unique(years, return_counts=True)
+    return [(int(year), int(count)) for year, count in zip(values, counts)]
+
+
+def generation_gaps(column):
+    """
+    Summarises the age gap between parents and their children, over every edge where both have a birthdate.
+
+    Args:
+        column (BirthColumn): The graph's birth column.
+
+    Returns:
+        summary (dict): The count, mean, median, standard deviation, minimum and maximum gap in years, or None if no
+        parent and child both have a birthdate.
+    """
+
+    require_numpy()
+    ordinals = np.frombuffer(column.ordinals, dtype=np.int64)
+    parent_ordinals = ordinals[np.frombuffer(column.edge_parents, dtype=np.int64)]
+    child_ordinals = ordinals[np.frombuffer(column.edge_children, dtype=np.int64)]
+    known = (parent_ordinals != MISSING) & (child_ordinals != MISSING)
+    gaps = (child_ordinals[known] - parent_ordinals[known]) / DAYS_PER_YEAR
+    if not gaps.size:
+        return None
+
+    return {
+        "count": int(gaps.size),
+        "mean": float(gaps.mean()),
+        "median": float(np.median(gaps)),
+        "std": float(gaps.std()),
+        "min": float(gaps.min()),
+        "max": float(gaps.max()),
+    }
@@ -0,0 +1,257 @@
+"""Reachability index for constant-time is-ancestor and is-descendant checks."""
+
+from bisect import bisect_right
+from collections import deque
+from traversal import traverse
+
+
+class AncestryIndex:
+    """
+    Graph listener that labels every person so ancestry checks don't have to walk the tree.
+
+    People with two parents make each family (the people connected to them by parent and child edges) a DAG rather
+    than a tree, so a single pair of interval labels can't answer every query. Instead the index keeps a compressed
+    transitive closure (Agrawal, Borgida and Jagadish, 1989): a depth-first walk down the children edges numbers
+    everyone in post-order, which gives each branch of the walk a run of consecutive numbers, and each person's
+    descendants are stored as a short list of ranges of those numbers. Their own branch is one range, and the children
+    the walk reached through the other parent add a range for each of their branches, which mostly merge with the
+    first since a couple's children are numbered one after another. A second walk up the parent edges numbers and
+    stores everyone's ancestors the same way.
+
+    is_ancestor is a binary search of one person's ranges, descendant_count and ancestor_count are summed up once when
+    the index is built, and common_ancestors intersects two lists of ranges, so no query walks the tree.
+
+    Adding a person labels them on their own. Any other change to the relations marks the index stale, and it is
+    rebuilt the next time it's queried.
+    """
+
+    def __init__(self, graph):
+        self.graph = graph
+        self.stale = True
+
+    def _mark_stale(self, *args):
+        self.stale = True
+
+    def on_add_node(self, node):
+        # A new person has no relations yet, so they're a family of their own and nobody else's labels change.
+        if not self.stale:
+            self._label_family(node)
+
+    on_remove_node = _mark_stale
+    on_set_parents = _mark_stale
+    on_add_child = _mark_stale
+
+    def _ensure_built(self):
+        if self.stale:
+            self.build()
+
+    def build(self):
+        """Relabels every person from the graph's current nodes."""
+
+        self.position = {}
+        self.descendants = Closure("children")
+        self.ancestors = Closure("parents")
+
+        for node in self.graph.nodes.values():
+            if node not in self.position:
+                self._label_family(node)
+        self.stale = False
+
+    def _label_family(self, start):
+        people = [start, *traverse(start, edges=("parents", "children"))]
+        order = _parents_first(people)
+
+        position = self.position
+        for index, node in enumerate(order, len(position)):
+            position[node] = index
+
+        # Walking down from the oldest generations and up from the youngest keeps each couple's children, and each
+        # person's parents, next to each other in the numbering.
+        self.descendants.label(order, position)
+        self.ancestors.label(reversed(order), position)
+
+    def is_ancestor(self, ancestor, node):
+        """Returns True if ancestor is a parent, grandparent or further ancestor of node."""
+
+        self._ensure_built()
+        return self.descendants.reaches(ancestor, node)
+
+    def is_descendant(self, descendant, node):
+        """Returns True if descendant is a child, grandchild or further descendant of node."""
+
+        return self.is_ancestor(node, descendant)
+
+    def common_ancestors(self, node, other):
+        """Returns every ancestor the two nodes share, oldest generations first."""
+
+        self._ensure_built()
+        return sorted(self.ancestors.shared(node, other), key=self.position.__getitem__)
+
+    def descendant_count(self, node):
+        """Returns how many descendants a node has."""
+
+        self._ensure_built()
+        return self.descendants.counts[node]
+
+    def ancestor_count(self, node):
+        """Returns how many ancestors a node has."""
+
+        self._ensure_built()
+        return self.ancestors.counts[node]
+
+
+class Closure:
+    """
+    Everyone reachable from each person along one kind of edge, as ranges of post-order numbers.
+
+    Each person's ranges are a flat tuple (start, end, start, end, ...) of sorted, non-overlapping half-open ranges,
+    so a number is inside them when bisect_right lands on an odd index.
+    """
+
+    def __init__(self, edge):
+        self.edge = edge
+        self.rank = {}
+        self.people = []
+        self.ranges = {}
+        self.counts = {}
+
+    def label(self, roots, members):
+        """
+        Numbers a family in post-order by an iterative depth-first walk along the edge, and works out everyone's ranges.
+
+        The walk is Tarjan's strongly connected components algorithm, so anyone in a cycle in bad data is finished
+        together with the rest of the cycle. Each group is finished after everyone it reaches, so its ranges can be
+        merged from theirs.
+
+        Args:
+            roots (iterable): The family, in the order to start walks from anyone not yet reached.
+            members (dict): Everyone labelled so far, so relatives that aren't in the graph are skipped.
+        """
+
+        rank, people, edge = self.rank, self.people, self.edge
+        found, low = {}, {}
+        unfinished, waiting = [], set()
+        for root in roots:
+            if root in found:
+                continue
+            found[root] = low[root] = len(found)
+            unfinished.append(root)
+            waiting.add(root)
+            stack = [(root, iter(getattr(root, edge)))]
+            while stack:
+                node, relatives = stack[-1]
+                for relative in relatives:
+                    if relative not in members:
+                        continue
+                    if relative not in found:
+                        found[relative] = low[relative] = len(found)
+                        unfinished.append(relative)
+                        waiting.add(relative)
+                        stack.append((relative, iter(getattr(relative, edge))))
+                        break
+                    if relative in waiting:
+                        low[node] = min(low[node], found[relative])
+                else:
+                    stack.pop()
+                    rank[node] = len(people)
+                    people.append(node)
+                    if stack:
+                        walked_from = stack[-1][0]
+                        low[walked_from] = min(low[walked_from], low[node])
+                    if low[node] == found[node]:
+                        group = []
+                        while not group or group[-1] != node:
+                            group.append(unfinished.pop())
+                            waiting.discard(group[-1])
+                        self._close(group)
+
+    def _close(self, group):
+        rank, ranges, counts, edge = self.rank, self.ranges, self.counts, self.edge
+        spans = []
+        for node in group:
+            for relative in getattr(node, edge):
+                # Relatives in the same group aren't finished yet, and are covered below.
+                if relative in ranges:
+                    number = rank[relative]
+                    spans.append((number, number + 1))
+                    spans.extend(_pairs(ranges[relative]))
+        if len(group) == 1:
+            ranges[group[0]], counts[group[0]] = _merge(spans)
+            return
+        spans.extend((rank[node], rank[node] + 1) for node in group)
+        flat, count = _merge(spans)
+        for node in group:
+            ranges[node], counts[node] = _without(flat, count, rank[node])
+
+    def reaches(self, node, target):
+        """Returns True if target can be reached from node along the edge."""
+
+        number = self.rank.get(target)
+        return number is not None and bool(bisect_right(self.ranges[node], number) & 1)
+
+    def shared(self, node, other):
+        """Yields everyone who can be reached from both people along the edge."""
+
+        people = self.people
+        first, second = _pairs(self.ranges[node]), _pairs(self.ranges[other])
+        span, other_span = next(first, None), next(second, None)
+        while span and other_span:
+            start, end = max(span[0], other_span[0]), min(span[1], other_span[1])
+            yield from people[start:end]
+            # Move past whichever range ends first, as it can't overlap anything further on in the other list.
+            if span[1] < other_span[1]:
+                span = next(first, None)
+            else:
+                other_span = next(second, None)
+
+
+def _pairs(flat):
+    it = iter(flat)
+    return zip(it, it)
+
+
+def _merge(spans):
+    # Sorts and joins overlapping or touching ranges, returning the flat tuple and how many numbers it covers.
+    spans.sort()
+    flat = []
+    count = 0
+    for start, end in spans:
+        if flat and start <= flat[-1]:
+            if end > flat[-1]:
+                count += end - flat[-1]
+                flat[-1] = end
+        else:
+            flat += (start, end)
+            count += end - start
+    return tuple(flat), count
+
+
+def _without(flat, count, number):
+    # People in a cycle reach themselves, but aren't their own ancestor or descendant.
+    index = bisect_right(flat, number)
+    if not index & 1:
+        return flat, count
+    start, end = flat[index - 1], flat[index]
+    middle = (start, number) * (start < number) + (number + 1, end) * (number + 1 < end)
+    return flat[:index - 1] + middle + flat[index + 1:], count - 1
+
+
+def _parents_first(people):
+    # Kahn's algorithm over parent -> child edges. Anyone left over is part of a cycle in bad data and goes last.
+    in_family = set(people)
+    waiting = {node: sum(1 for parent in node.parents if parent in in_family) for node in people}
+    ready = deque(node for node in people if not waiting[node])
+    order = []
+    while ready:
+        node = ready.popleft()
+        order.append(node)
+        for child in node.children:
+            if child in waiting:
+                waiting[child] -= 1
+                if not waiting[child]:
+                    ready.append(child)
+
+    if len(order) < len(people):
+        placed = set(order)
+        order.extend(node for node in people if node not in placed)
+    return order
@@ -0,0 +1 @@
+"""Benchmarks for the family tree system."""
@@ -0,0 +1,106 @@
+"""
+Read and write throughput of the streaming GEDCOM reader and writer on a generated file.
+
+Usage: python -m benchmarks.gedcom_throughput [--size-mb N] [--compact] [--trace-memory] [--keep PATH]
+"""
+
+import argparse
+import os
+import tempfile
+import time
+import tracemalloc
+from compact_store import CompactGraph
+from gedcom import read_gedcom, write_gedcom
+from graph import Graph
+
+
+def generate_gedcom(file_path, size_mb, children=3):
+    """
+    Writes a GEDCOM file of roughly size_mb megabytes, made of couples with a few children each.
+
+    Each family's children marry into the next family, so the generated tree is one connected family. INDI records are
+    written before the FAM record that references them, like most exporters do.
+
+    Returns:
+        (people, families) (tuple): The number of INDI and FAM records written.
+    """
+
+    target = size_mb * 1024 * 1024
+    people = families = 0
+    with open(file_path, 'w', encoding='utf-8') as f:
+        f.write("0 HEAD\n1 GEDC\n2 VERS 5.5.1\n1 CHAR UTF-8\n")
+        husband = None
+        while f.tell() < target:
+            ids = []
+            for index in range(2 + children):
+                people += 1
+                ids.append(f"@I{people}@")
+                sex = "M" if index % 2 == 0 else "F"
+                f.write(f"0 @I{people}@ INDI\n1 NAME Person{people} /Family{families}/\n1 SEX {sex}\n"
+                        f"1 BIRT\n2 DATE {people % 28 + 1} JAN {1900 + people % 100}\n")
+            families += 1
+            f.write(f"0 @F{families}@ FAM\n1 HUSB {husband or ids[0]}\n1 WIFE {ids[1]}\n")
+            f.writelines(f"1 CHIL {xref}\n" for xref in ids[2:])
+            # The first child heads the next family.
+            husband = ids[2]
+        f.write("0 TRLR\n")
+    return people, families
+
+
+def measure(action, trace_memory=False):
+    """
+    Runs action and times it.
+
+    Returns:
+        (elapsed, peak) (tuple): The seconds taken and the peak traced memory in bytes, or None if not tracing.
+    """
+
+    if trace_memory:
+        tracemalloc.start()
+    start = time.perf_counter()
+    action()
+    elapsed = time.perf_counter() - start
+    peak = None
+    if trace_memory:
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+    return elapsed, peak
+
+
+def report(label, file_path, elapsed, peak):
+    megabytes = os.path.getsize(file_path) / 1024 / 1024
+    line = f"{label:<8}{megabytes:>10.1f} MB{elapsed:>10.2f} s{megabytes / elapsed:>10.1f} MB/s"
+    if peak is not None:
+        line += f"{peak / 1024 / 1024:>10.1f} MB peak"
+    print(line)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure GEDCOM read and write throughput.")
+    parser.add_argument("--size-mb", type=int, default=100, help="Approximate size of the generated file.")
+    parser.add_argument("--compact", action="store_true", help="Read into the compact storage engine.")
+    parser.add_argument("--trace-memory", action="store_true",
+                        help="Also report peak memory. Tracing slows both directions down considerably.")
+    parser.add_argument("--keep", type=str, help="Keep the generated file at this path instead of a temp file.")
+    args = parser.parse_args()
+
+    directory = tempfile.mkdtemp()
+    source = args.keep or os.path.join(directory, "generated.ged")
+    output = os.path.join(directory, "written.ged")
+
+    people, families = generate_gedcom(source, args.size_mb)
+    size = os.path.getsize(source)
+    print(f"Generated {people} people and {families} families ({size / 1024 / 1024:.1f} MB).")
+
+    graph = (CompactGraph if args.compact else Graph)()
+    report("read", source, *measure(lambda: read_gedcom(graph, source), args.trace_memory))
+    report("write", output, *measure(lambda: write_gedcom(graph, output), args.trace_memory))
+
+    os.remove(output)
+    if not args.keep:
+        os.remove(source)
+    os.rmdir(directory)
+
+
+if __name__ == '__main__':
+    main()
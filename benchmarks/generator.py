@@ -0,0 +1,107 @@
+"""
+Generates synthetic family trees for the benchmarks.
+
+Usage: python -m benchmarks.generator <filename> [--people N] [--generations N] [--fanout N] [--marriage-rate R]
+       [--first-year YYYY] [--last-year YYYY] [--seed N]
+"""
+
+import argparse
+import json
+import random
+
+
+def generate_tree(people, generations=6, fanout=3, marriage_rate=0.7, first_year=1800, last_year=2020, seed=0):
+    """
+    Generates families in the dictionary format used by Graph.to_dict and Graph.from_dict.
+
+    Each family starts from a married couple. Every couple has between none and twice fanout children, each child
+    marries someone from outside the family with probability marriage_rate, and the married children become the next
+    generation's couples. A family ends after the given number of generations, or earlier if nobody marries, and new
+    families are started until the tree holds the requested number of people. Birth years are spread evenly over the
+    generations between first_year and last_year.
+
+    Args:
+        people (int): The number of people to generate.
+        generations (int): The most generations in any one family.
+        fanout (int): The average number of children per couple.
+        marriage_rate (float): The chance, between 0 and 1, that a child marries.
+        first_year (int): The earliest birth year, for each family's founding couple.
+        last_year (int): The latest birth year, for the youngest generation.
+        seed (int): Seeds the random number generator so the same arguments always give the same tree.
+
+    Returns:
+        records (dict): Every generated person's name mapped to their record.
+    """
+
+    rng = random.Random(seed)
+    span = (last_year - first_year) / max(generations - 1, 1)
+    records = {}
+
+    def person(generation, parents=()):
+        name = f"Person {len(records)}"
+        year = int(first_year + generation * span) + rng.randint(0, max(int(span) // 4, 0))
+        records[name] = {
+            "name": name,
+            "gender": rng.choice(("male", "female")),
+            "birthdate": f"{rng.randint(1, 28)}-{rng.randint(1, 12)}-{year}",
+            "parents": list(parents),
+            "children": [],
+            "spouse": None,
+        }
+        for parent in parents:
+            records[parent]["children"].append(name)
+        return name
+
+    def marry(name, spouse):
+        records[name]["spouse"] = spouse
+        records[spouse]["spouse"] = name
+
+    while len(records) < people:
+        couples = [(person(0), person(0))]
+        marry(*couples[0])
+
+        for generation in range(1, generations):
+            next_couples = []
+            for couple in couples:
+                for _ in range(rng.randint(0, 2 * fanout)):
+                    if len(records) >= people:
+                        break
+                    child = person(generation, couple)
+                    if len(records) < people and rng.random() < marriage_rate:
+                        spouse = person(generation)
+                        marry(child, spouse)
+                        next_couples.append((child, spouse))
+            couples = next_couples
+            if not couples or len(records) >= people:
+                break
+
+    return records
+
+
+def write_tree(records, file_path):
+    """Writes generated records to a json file that Graph.load_from_json can read."""
+
+    with open(file_path, 'w') as f:
+        json.dump(records, f)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate a synthetic family tree json file.")
+    parser.add_argument("filename", type=str, help="The json file to write.")
+    parser.add_argument("--people", type=int, default=1000, help="The number of people to generate.")
+    parser.add_argument("--generations", type=int, default=6, help="The most generations in any one family.")
+    parser.add_argument("--fanout", type=int, default=3, help="The average number of children per couple.")
+    parser.add_argument("--marriage-rate", type=float, default=0.7, help="The chance that a child marries.")
+    parser.add_argument("--first-year", type=int, default=1800, help="The earliest birth year.")
+    parser.add_argument("--last-year", type=int, default=2020, help="The latest birth year.")
+    parser.add_argument("--seed", type=int, default=0, help="The random seed.")
+    args = parser.parse_args()
+
+    records = generate_tree(args.people, args.generations, args.fanout, args.marriage_rate, args.first_year,
+                            args.last_year, args.seed)
+    write_tree(records, args.filename)
+    print(f"Generated {len(records)} people in {args.filename}.")
+
+
+if __name__ == '__main__':
+    main()
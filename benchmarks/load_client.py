@@ -0,0 +1,145 @@
+"""
+Load generator for the query server: many concurrent clients send a mix of reads and writes for a fixed time, then
+the requests per second and latency percentiles are reported.
+
+Usage: python -m benchmarks.load_client [--host HOST] [--port N | --unix PATH] [--clients N] [--duration SECONDS]
+                                        [--write-ratio R] [--seed N] [--output FILE]
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import time
+from server import DEFAULT_PORT, LINE_LIMIT
+
+# The reads each client picks from, each as a function of a random person's name.
+READS = (
+    lambda name: {"op": "person", "name": name},
+    lambda name: {"op": "relation", "name": name, "relation": "children"},
+    lambda name: {"op": "relation", "name": name, "relation": "cousins"},
+    lambda name: {"op": "extended-family", "name": name, "depth": 2},
+    lambda name: {"op": "descendant-count", "name": name},
+    lambda name: {"op": "find", "pattern": name[:4], "limit": 10},
+)
+
+
+async def connect(host, port, unix_path):
+    """Opens a connection to the server over TCP, or over its Unix socket if unix_path is given."""
+
+    if unix_path:
+        return await asyncio.open_unix_connection(unix_path, limit=LINE_LIMIT)
+    return await asyncio.open_connection(host, port, limit=LINE_LIMIT)
+
+
+async def request(reader, writer, message):
+    """Sends one request and waits for its response."""
+
+    writer.write(json.dumps(message).encode() + b"\n")
+    await writer.drain()
+    return json.loads(await reader.readline())
+
+
+async def client(number, names, args, deadline, latencies, errors):
+    """One client sending requests back to back until the deadline, recording how long each took."""
+
+    rng = random.Random(args.seed + number)
+    reader, writer = await connect(args.host, args.port, args.unix)
+    created = 0
+    try:
+        while time.perf_counter() < deadline:
+            if rng.random() < args.write_ratio:
+                kind = "write"
+                # Alternate between adding someone new and changing an existing person.
+                if created % 2 == 0:
+                    message = {"op": "create", "name": f"Load client {number}-{created}", "gender": "female"}
+                else:
+                    message = {"op": "set-info", "name": rng.choice(names), "attribute": "birthdate",
+                               "value": f"{rng.randint(1, 28)}-{rng.randint(1, 12)}-{rng.randint(1900, 2020)}"}
+                created += 1
+            else:
+                kind = "read"
+                message = rng.choice(READS)(rng.choice(names))
+
+            start = time.perf_counter()
+            response = await request(reader, writer, message)
+            latencies[kind].append(time.perf_counter() - start)
+            if "error" in response:
+                errors.append(response["error"])
+    finally:
+        writer.close()
+
+
+def percentiles(latencies):
+    """Summarises a list of latencies in seconds as milliseconds."""
+
+    if not latencies:
+        return {"count": 0}
+    ordered = sorted(latencies)
+
+    def at(percent):
+        return ordered[min(len(ordered) - 1, int(percent / 100 * len(ordered)))] * 1000
+
+    return {"count": len(ordered), "p50_ms": at(50), "p95_ms": at(95), "p99_ms": at(99), "p999_ms": at(99.9),
+            "max_ms": ordered[-1] * 1000}
+
+
+async def run(args):
+    # Fetch a sample of names to query, the same way a client would find people.
+    reader, writer = await connect(args.host, args.port, args.unix)
+    names = (await request(reader, writer, {"op": "find", "pattern": "", "limit": args.names}))["result"]
+    writer.close()
+    if not names:
+        raise SystemExit("The server's graph is empty.")
+
+    latencies = {"read": [], "write": []}
+    errors = []
+    start = time.perf_counter()
+    deadline = start + args.duration
+    await asyncio.gather(*(client(number, names, args, deadline, latencies, errors)
+                           for number in range(args.clients)))
+    elapsed = time.perf_counter() - start
+
+    total = len(latencies["read"]) + len(latencies["write"])
+    return {
+        "clients": args.clients,
+        "duration": elapsed,
+        "requests": total,
+        "requests_per_second": total / elapsed,
+        "errors": len(errors),
+        "all": percentiles(latencies["read"] + latencies["write"]),
+        "read": percentiles(latencies["read"]),
+        "write": percentiles(latencies["write"]),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure the query server's throughput and tail latency.")
+    parser.add_argument("--host", type=str, default="127.0.0.1", help="The server's address.")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT, help="The server's TCP port.")
+    parser.add_argument("--unix", type=str, help="Optionally, connect to this Unix socket instead of TCP.")
+    parser.add_argument("--clients", type=int, default=50, help="The number of concurrent clients.")
+    parser.add_argument("--duration", type=float, default=10, help="How long to send requests for, in seconds.")
+    parser.add_argument("--write-ratio", type=float, default=0.05, help="The fraction of requests that are writes.")
+    parser.add_argument("--names", type=int, default=10_000, help="The number of people to pick queries from.")
+    parser.add_argument("--seed", type=int, default=0, help="The random seed for the request mix.")
+    parser.add_argument("--output", type=str, help="Optionally, also write the results to this json file.")
+    args = parser.parse_args()
+
+    results = asyncio.run(run(args))
+    print(f"{results['requests']} requests from {results['clients']} clients in {results['duration']:.1f}s: "
+          f"{results['requests_per_second']:.0f} requests/s, {results['errors']} errors")
+    for kind in ("all", "read", "write"):
+        summary = results[kind]
+        if summary["count"]:
+            print(f"  {kind:<5} {summary['count']:>8} requests  p50 {summary['p50_ms']:.2f}ms  "
+                  f"p95 {summary['p95_ms']:.2f}ms  p99 {summary['p99_ms']:.2f}ms  p99.9 {summary['p999_ms']:.2f}ms  "
+                  f"max {summary['max_ms']:.2f}ms")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
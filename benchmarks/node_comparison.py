@@ -0,0 +1,108 @@
+"""
+Memory and time comparison between the slotted Node and the original list-based Node.
+
+Usage: python -m benchmarks.node_comparison [--people N] [--fanout N]
+"""
+
+import argparse
+import time
+import tracemalloc
+from node import Node
+
+
+class ListNode:
+    """The original Node, with plain lists for relations and a per-instance __dict__."""
+
+    def __init__(self, name, gender=None, birthdate=None):
+        self.name = name
+        self.gender = gender
+        self.birthdate = birthdate
+        self.parents = []
+        self.children = []
+        self.spouse = None
+
+    def add_child(self, child):
+        self.children.append(child)
+        child.parents.append(self)
+
+
+def build_families(node_class, people, fanout):
+    """
+    Builds couples with fanout children each until the requested number of people exists.
+
+    Returns:
+        nodes (list): Every node that was created.
+    """
+
+    nodes = []
+    while len(nodes) < people:
+        parent1 = node_class(f"p{len(nodes)}")
+        parent2 = node_class(f"p{len(nodes) + 1}")
+        parent1.spouse, parent2.spouse = parent2, parent1
+        nodes.extend([parent1, parent2])
+        for _ in range(fanout):
+            child = node_class(f"p{len(nodes)}")
+            parent1.add_child(child)
+            parent2.add_child(child)
+            nodes.append(child)
+    return nodes
+
+
+def measure_memory(node_class, people, fanout):
+    """Returns the bytes allocated per person when building the families."""
+
+    tracemalloc.start()
+    nodes = build_families(node_class, people, fanout)
+    allocated, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return allocated / len(nodes)
+
+
+def measure_removal(node_class, fanout):
+    """Returns the seconds taken to detach every child from a single high-fanout couple."""
+
+    nodes = build_families(node_class, fanout + 2, fanout)
+    parent1, parent2 = nodes[0], nodes[1]
+    start = time.perf_counter()
+    for child in nodes[2:]:
+        parent1.children.remove(child)
+        parent2.children.remove(child)
+    return time.perf_counter() - start
+
+
+def measure_membership(node_class, fanout):
+    """Returns the seconds taken to check every child against its parent's children."""
+
+    nodes = build_families(node_class, fanout + 2, fanout)
+    parent = nodes[0]
+    found = 0
+    start = time.perf_counter()
+    for child in nodes[2:]:
+        found += child in parent.children
+    elapsed = time.perf_counter() - start
+    # Checked outside the timing, and not with assert, which python -O would strip from the loop above.
+    if found != fanout:
+        raise RuntimeError(f"Found {found} of {fanout} children.")
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare the slotted Node with the original list-based Node.")
+    parser.add_argument("--people", type=int, default=100_000, help="People to build for the memory comparison.")
+    parser.add_argument("--fanout", type=int, default=20_000, help="Children of one couple for the timing comparison.")
+    args = parser.parse_args()
+
+    print(f"{'':<24}{'list Node':>14}{'slotted Node':>14}")
+    print(f"{'bytes per person':<24}"
+          f"{measure_memory(ListNode, args.people, 3):>14.1f}"
+          f"{measure_memory(Node, args.people, 3):>14.1f}")
+    print(f"{'remove children (s)':<24}"
+          f"{measure_removal(ListNode, args.fanout):>14.4f}"
+          f"{measure_removal(Node, args.fanout):>14.4f}")
+    print(f"{'membership checks (s)':<24}"
+          f"{measure_membership(ListNode, args.fanout):>14.4f}"
+          f"{measure_membership(Node, args.fanout):>14.4f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,151 @@
+"""
+Times the graph's load, save and query operations on generated trees of several sizes, and writes the results to a
+json file so runs from different versions can be compared.
+
+Usage: python -m benchmarks.run [--sizes N,N,...] [--repeat N] [--samples N] [--output FILE] [--seed N]
+"""
+
+import argparse
+import contextlib
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import tempfile
+import time
+from datetime import datetime, timezone
+import ci_helper_functions as ci
+from benchmarks.generator import generate_tree, write_tree
+from graph import Graph
+
+DEFAULT_SIZES = (1_000, 100_000, 1_000_000)
+
+
+def time_call(function, repeat):
+    """
+    Calls function repeat times, with its output silenced.
+
+    The first call is reported on its own as well, since it's the one that builds any lazily created index.
+
+    Returns:
+        timings (dict): The first, median and fastest times in seconds.
+    """
+
+    times = []
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        for _ in range(repeat):
+            start = time.perf_counter()
+            function()
+            times.append(time.perf_counter() - start)
+    return {"first": times[0], "median": statistics.median(times), "min": min(times)}
+
+
+def time_each(function, items):
+    """
+    Calls function once for each item, with its output silenced.
+
+    Returns:
+        timings (dict): The total, median per item and slowest per item times in seconds.
+    """
+
+    times = []
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        for item in items:
+            start = time.perf_counter()
+            function(item)
+            times.append(time.perf_counter() - start)
+    return {"total": sum(times), "median": statistics.median(times), "max": max(times), "count": len(times)}
+
+
+def run_size(size, repeat, samples, seed, directory):
+    """
+    Generates a tree of the given size and times every benchmark on it.
+
+    Returns:
+        results (dict): Each benchmark's name mapped to its timings.
+    """
+
+    records = generate_tree(size, seed=seed)
+    source = os.path.join(directory, f"tree_{size}.json")
+    target = os.path.join(directory, f"saved_{size}.json")
+    write_tree(records, source)
+
+    results = {}
+    graph = None
+
+    def load():
+        nonlocal graph
+        graph = Graph.load_from_json(source, progress=None)
+
+    results["load_from_json"] = time_call(load, repeat)
+    results["save_to_json"] = time_call(lambda: graph.save_to_json(target), repeat)
+    results["from_dict"] = time_call(lambda: Graph.from_dict(records), repeat)
+    del records
+
+    rng = random.Random(seed)
+    sample = rng.sample(list(graph.nodes.values()), min(samples, size))
+
+    results["get_all_related"] = time_each(lambda node: node.get_all_related(), sample)
+    results["info_cousins"] = time_each(ci.info_cousins, sample)
+    results["info_birthdays_sorted"] = time_call(lambda: ci.info_birthdays_sorted(graph), repeat)
+    results["info_birthdays_upcoming"] = time_call(lambda: ci.info_birthdays_upcoming(graph, 30), repeat)
+    results["info_birthdays_unsorted"] = time_call(lambda: ci.info_birthdays_unsorted(graph), repeat)
+    results["info_average_children"] = time_call(lambda: ci.info_average_children(graph), repeat)
+    results["info_average_age"] = time_call(lambda: ci.info_average_age(graph), repeat)
+
+    # Removal changes the graph, so it goes last.
+    results["remove_node"] = time_each(lambda node: graph.remove_node(node.name), sample)
+
+    os.remove(source)
+    os.remove(target)
+    return results
+
+
+def git_revision():
+    """Returns the short hash of the checked out commit, or None if it can't be found."""
+
+    try:
+        output = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True)
+        return output.stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the family graph on generated trees.")
+    parser.add_argument("--sizes", type=str, default=",".join(map(str, DEFAULT_SIZES)),
+                        help="Comma separated tree sizes to benchmark.")
+    parser.add_argument("--repeat", type=int, default=3, help="Times to repeat each whole-graph benchmark.")
+    parser.add_argument("--samples", type=int, default=100, help="People to run each per-person benchmark on.")
+    parser.add_argument("--output", type=str, default="benchmark_results.json", help="The json file for results.")
+    parser.add_argument("--seed", type=int, default=0, help="The random seed for the trees and samples.")
+    args = parser.parse_args()
+
+    report = {
+        "revision": git_revision(),
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "repeat": args.repeat,
+        "samples": args.samples,
+        "seed": args.seed,
+        "sizes": {},
+    }
+
+    with tempfile.TemporaryDirectory() as directory:
+        for size in map(int, args.sizes.split(",")):
+            print(f"Benchmarking {size} people...")
+            results = run_size(size, args.repeat, args.samples, args.seed, directory)
+            report["sizes"][str(size)] = results
+            for name, timings in results.items():
+                print(f"    {name:<26}{timings['median'] * 1000:>12.3f} ms")
+
+    with open(args.output, 'w') as f:
+        json.dump(report, f, indent=4)
+    print(f"Results written to {args.output}")
+
+
+if __name__ == '__main__':
+    main()
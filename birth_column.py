@@ -0,0 +1,79 @@
+"""Birthdates parsed once into a column of day ordinals, kept alongside Graph.nodes."""
+
+from array import array
+from dates import parse_birthdate
+
+MISSING = 0
+
+
+class BirthColumn:
+    """
+    Graph listener holding every birthdate as an integer day ordinal in a flat array.
+
+    Each person gets a slot in the ordinals array (MISSING when they have no valid birthdate), and parent -> child
+    edges are kept as two parallel arrays of slots, so whole-population date analytics can run over plain buffers
+    without touching a Node or re-parsing a string. Slots of removed people are marked MISSING and never reused, and
+    the column is rebuilt once more than half of it is dead.
+    """
+
+    def __init__(self, graph):
+        self.graph = graph
+        self.build()
+
+    def build(self, excluding=None):
+        """
+        Rebuilds the column from the graph's current nodes.
+
+        Args:
+            excluding (Node): Optionally, a node to leave out because it is in the middle of being removed.
+        """
+
+        self.slots = {}
+        self.ordinals = array('q')
+        self.edge_parents = array('q')
+        self.edge_children = array('q')
+        self.dead = 0
+
+        nodes = [node for node in self.graph.nodes.values() if node != excluding]
+        for node in nodes:
+            self._add(node)
+        for node in nodes:
+            for child in node.children:
+                if child != excluding:
+                    self._add_edge(node, child)
+
+    def _add(self, node):
+        self.slots[node.name] = len(self.ordinals)
+        self.ordinals.append(_ordinal(node.birthdate))
+
+    def _add_edge(self, parent, child):
+        self.edge_parents.append(self.slots[parent.name])
+        self.edge_children.append(self.slots[child.name])
+
+    def on_add_node(self, node):
+        self._add(node)
+
+    def on_remove_node(self, node):
+        slot = self.slots.pop(node.name)
+        self.ordinals[slot] = MISSING
+        self.dead += 1
+        if self.dead > len(self.ordinals) // 2:
+            self.build(excluding=node)
+
+    def on_set_parents(self, node, parent1, parent2):
+        self._add_edge(parent1, node)
+        self._add_edge(parent2, node)
+
+    def on_add_child(self, node, child):
+        self._add_edge(node, child)
+
+    def on_set_info(self, node, attribute, old_value, new_value):
+        if attribute == "birthdate":
+            self.ordinals[self.slots[node.name]] = _ordinal(new_value)
+        elif attribute == "name":
+            self.slots[new_value] = self.slots.pop(old_value)
+
+
+def _ordinal(birthdate):
+    parsed = parse_birthdate(birthdate)
+    return parsed.toordinal() if parsed else MISSING
@@ -0,0 +1,127 @@
+"""Birthday calendar index, kept up to date as the graph changes."""
+
+from bisect import bisect_left, insort
+from calendar import isleap
+from datetime import date
+from dates import parse_birthdate, next_occurrence
+
+
+class BirthdayCalendar:
+    """
+    Graph listener that groups people by the (month, day) of their birthday.
+
+    The distinct birthdays are kept in a sorted list alongside a dictionary of the names on each day, so listings come
+    out in calendar order and lookups only touch the days involved rather than every person.
+    """
+
+    def __init__(self, graph):
+        self.days = {}
+        self.sorted_days = []
+        for node in graph.nodes.values():
+            self._add(node.name, node.birthdate)
+
+    def _add(self, name, birthdate):
+        parsed = parse_birthdate(birthdate)
+        if parsed is None:
+            return
+        key = (parsed.month, parsed.day)
+        if key not in self.days:
+            self.days[key] = {}
+            insort(self.sorted_days, key)
+        self.days[key][name] = None
+
+    def _remove(self, name, birthdate):
+        parsed = parse_birthdate(birthdate)
+        if parsed is None:
+            return
+        key = (parsed.month, parsed.day)
+        names = self.days.get(key)
+        if names is None:
+            return
+        names.pop(name, None)
+        if not names:
+            del self.days[key]
+            del self.sorted_days[bisect_left(self.sorted_days, key)]
+
+    def on_add_node(self, node):
+        self._add(node.name, node.birthdate)
+
+    def on_remove_node(self, node):
+        self._remove(node.name, node.birthdate)
+
+    def on_set_info(self, node, attribute, old_value, new_value):
+        if attribute == "birthdate":
+            self._remove(node.name, old_value)
+            self._add(node.name, new_value)
+        elif attribute == "name":
+            self._remove(old_value, node.birthdate)
+            self._add(new_value, node.birthdate)
+
+    def sorted_birthdays(self):
+        """
+        Yields every birthday in calendar order.
+
+        Yields:
+            ((month, day), names) (tuple): The day and the names of everyone born on it.
+        """
+
+        for key in self.sorted_days:
+            yield key, list(self.days[key])
+
+    def upcoming(self, days, today=None):
+        """
+        Yields the birthdays in the next given number of days, starting with today.
+
+        Args:
+            days (int): How many days ahead to look.
+            today (datetime.date): Optionally, the day to count from. Defaults to the current date.
+
+        Yields:
+            (occurrence, names) (tuple): The date of each upcoming birthday and the names of everyone born on that day.
+        """
+
+        today = today or date.today()
+        count = len(self.sorted_days)
+        first = (today.month, today.day)
+        # 29th February birthdays fall on 1st March in years that aren't leap years, so they're due today too.
+        if first == (3, 1) and not isleap(today.year):
+            first = (2, 29)
+        start = bisect_left(self.sorted_days, first)
+
+        # Walk forwards from today, wrapping into next year, until a birthday falls outside the window. The 29th
+        # February and 1st March birthdays land on the same date outside leap years, so they're yielded together.
+        due = None
+        for offset in range(count):
+            key = self.sorted_days[(start + offset) % count]
+            occurrence = next_occurrence(key[0], key[1], today)
+            if (occurrence - today).days >= days:
+                break
+            if due and due[0] == occurrence:
+                due[1].extend(self.days[key])
+                continue
+            if due:
+                yield due
+            due = (occurrence, list(self.days[key]))
+        if due:
+            yield due
+
+    def shared(self):
+        """
+        Yields every birthday that more than one person shares, in calendar order.
+
+        Yields:
+            ((month, day), names) (tuple): The day and the names of everyone born on it.
+        """
+
+        for key in self.sorted_days:
+            if len(self.days[key]) > 1:
+                yield key, list(self.days[key])
+
+    def shared_with(self, node):
+        """Returns the names of everyone else born on the same day of the year as node."""
+
+        parsed = parse_birthdate(node.birthdate)
+        if parsed is None:
+            return []
+        names = self.days.get((parsed.month, parsed.day), {})
+        return [name for name in names if name != node.name]
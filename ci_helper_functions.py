@@ -1,9 +1,14 @@
 """Helper functions for the command_interface class."""
 
-from datetime import datetime
+from functools import wraps
+from traversal import cousins, EDGE_TYPES
+from graph import EDITABLE_ATTRIBUTES
+import analytics
+import parallel
 
 # Check for a graph.
 def requires_graph(func):
+    @wraps(func)
     def wrapper(self, *args):
         if not self.graph:
             print("This command requires a graph. Either load one with the 'load' command or make one with the 'create graph' command.")
@@ -14,6 +19,7 @@ def requires_graph(func):
 
 #Check for a selected node.
 def requires_selected_node(func):
+    @wraps(func)
     def wrapper(self, *args):
         if not self.selected_node:
             print("This command requires a node to be selected. Please use the 'select' command.")
@@ -22,85 +28,149 @@ def requires_selected_node(func):
     return wrapper
 
 
+# Suggest names like one that wasn't found.
+def suggest_names(graph, name):
+    print(f"Person {name} does not exist.")
+    if suggestions := graph.name_index.suggest(name):
+        print(f"Did you mean: {', '.join(suggestions)}?")
+
+
+# List names matching a pattern for the 'find' command.
+def find_names(graph, pattern, fuzzy, limit):
+    names = [] if fuzzy else graph.name_index.prefix(pattern, limit)
+    if not names:
+        names = graph.name_index.fuzzy(pattern, limit)
+    if not names:
+        print(f"Nobody found matching {pattern}.")
+        return
+    for name in names:
+        print(name)
+
+
 # Set the parent relationships.
 def set_relation_parents(graph, node, args):
     parent1 = graph.get_node(args.nodes[0])
     parent2 = graph.get_node(args.nodes[1])
-    node.add_parents(parent1, parent2)
-    print(f"{args.nodes[0]} and {args.nodes[1]} are now parents of {node}.")
+    if graph.set_parents(node, parent1, parent2):
+        print(f"{args.nodes[0]} and {args.nodes[1]} are now parents of {node.name}.")
+    else:
+        print(f"{args.nodes[0]} and {args.nodes[1]} must be spouses to be set as parents.")
 
 
 # Set node attribute to value.
-def set_info(node, args):
+def set_info(graph, node, args):
     attribute = args.attribute.lower()
     value = args.value
 
-    # Check if the node has the attrivute and if so update it to the specified value.
-    if hasattr(node, attribute):
-        setattr(node, attribute, value)
-        print(f"Updated {node.name} {attribute} to {value}.")
+    # Check if the attribute can be edited and if so update it to the specified value.
+    if attribute in EDITABLE_ATTRIBUTES:
+        if graph.set_info(node, attribute, value):
+            print(f"Updated {node.name} {attribute} to {value}.")
+        else:
+            print(f"Person {value} already exists.")
     else:
         print(f"Invalid attribute: {attribute}.")
 
 
 # Find cousins for the 'info' command.
 def info_cousins(node):
-    cousins = []
+    print(f"The cousins of {node} are: {[cousin.name for cousin in cousins(node)]}")
+
+
+# Name the relationship between the selected node and another person for the 'info relation <name>' command.
+def info_kinship(graph, node, other):
+    relationship = graph.kinship.relationship(node, other)
+    if relationship is None:
+        print(f"{other.name} is not related to {node.name}.")
+    elif relationship == "self":
+        print(f"{other.name} is the selected node.")
+    else:
+        print(f"{other.name} is the {relationship} of {node.name}.")
+
+
+# Answer the ancestry subcommands of the 'info' command from the ancestry index.
+def info_ancestry(graph, node, subcommand, other):
+    ancestry = graph.ancestry
+
+    if subcommand == "ancestor-of":
+        answer = "is" if ancestry.is_ancestor(node, other) else "is not"
+        print(f"{node.name} {answer} an ancestor of {other.name}.")
+
+    elif subcommand == "descendant-of":
+        answer = "is" if ancestry.is_descendant(node, other) else "is not"
+        print(f"{node.name} {answer} a descendant of {other.name}.")
+
+    elif subcommand == "common-ancestors":
+        if common := ancestry.common_ancestors(node, other):
+            print(f"Common ancestors of {node.name} and {other.name}: ", ", ".join([n.name for n in common]))
+        else:
+            print(f"{node.name} and {other.name} have no common ancestors.")
+
+    elif subcommand == "descendant-count":
+        print(f"{node.name} has {ancestry.descendant_count(node)} descendants.")
+
+
+# List the separate families in the graph for the 'info components' command.
+def info_components(graph, limit):
+    families = graph.components.families()
+    print(f"{len(families)} separate families in the graph.")
+    for representative, size in families[:limit]:
+        print(f"    {size} people, including {representative.name}")
+    if len(families) > limit:
+        print(f"    ... and {len(families) - limit} smaller families.")
+
+
+# Check whether two people are related at all for the 'info same-family' command.
+def info_same_family(graph, name, other_name):
+    node, other = graph.get_node(name), graph.get_node(other_name)
+    for person, person_name in ((node, name), (other, other_name)):
+        if person is None:
+            print(f"Person {person_name} does not exist.")
+            return
 
-    # Loop through parents of the selected node.
-    for parent in node.parents:
-        # If statements here were reversed to prevent excessive indentation.
-        if not parent.parents:
-            continue
+    answer = "are" if graph.components.same_family(node, other) else "are not"
+    print(f"{node.name} and {other.name} {answer} in the same family.")
 
-        # Loop through grandparents of selected node
-        for grandparent in parent.parents:
-            if not grandparent.children:
-                continue
 
-            # Loop through aunts/uncles (A.K.A. Piblings - Yes it is a word.)
-            for pibling in grandparent.children:
-                # Ignore the pibling if they're actually a parent of a selected node.
-                if pibling == parent:
-                    continue
+MONTHS = ["January", "February", "March", "April", "May", "June", "July", "August", "September", "October", "November",
+          "December"]
 
-                # If not loop through their children and append them.
-                for child in pibling.children:
-                    if child.name not in cousins:
-                        cousins.append(child.name)
 
-    print(f"The cousins of {node} are: {cousins}")
+# Format a day of the year to be a bit more human-readable.
+def format_birthday(month, day):
+    f_day = str(day)
+    f_day += "st" if f_day[-1] == "1" else "nd" if f_day[-1] == "2" else "rd" if f_day[-1] == "3" else "th"
+    return f"{f_day} {MONTHS[month - 1]}"
 
 
-# Find and sort birthdays for the 'info birthdays --sorted' command.
+# List birthdays merged and in calendar order for the 'info birthdays --sorted' command.
 def info_birthdays_sorted(graph):
-    months = ["January", "February", "March", "April", "May", "June", "July", "August", "September", "October", "November", "December"]
-    birthdays = {}
+    # The calendar index already keeps the birthdays grouped and sorted.
+    for (month, day), names in graph.calendar.sorted_birthdays():
+        print(f"{' and '.join(names)}: {format_birthday(month, day)}")
 
-    # Go through nodes and append their names and birthdays to a dictionary.
-    # Dictionary makes merging later easier.
-    for node in graph.nodes.values():
-        if node.birthdate:
-            day, month, year = node.birthdate.split('-')
-            key = f"{day}-{month}"
 
-            # If the date isn't already in the dictionary add it.
-            if key not in birthdays:
-                birthdays[key] = []
+# List the birthdays coming up in the next few days for the 'info birthdays --upcoming' command.
+def info_birthdays_upcoming(graph, days):
+    found = False
+    for occurrence, names in graph.calendar.upcoming(days):
+        found = True
+        print(f"{' and '.join(names)}: {format_birthday(occurrence.month, occurrence.day)}")
+    if not found:
+        print(f"No birthdays in the next {days} days.")
 
-            # Regardless, add the person's name, this'll either add it to someone with the existing birthday or
-            # just add themselves if they're the only one with that birthday.
-            birthdays[key].append(node.name)
 
-    # Sort the birthdays by their birthday, formatted into something more sortable.
-    sorted_birthdays = sorted(birthdays.items(), key=lambda x: int(x[0].split('-')[1]) * 31 + int(x[0].split('-')[0]))
+# List shared birthdays for the 'info birthdays --shared' command, just for the selected node if there is one.
+def info_birthdays_shared(graph, node):
+    if node:
+        if names := graph.calendar.shared_with(node):
+            print(f"{node.name} shares a birthday with: {', '.join(names)}")
+        else:
+            print(f"Nobody shares a birthday with {node.name}.")
+        return
 
-    # Output the result with some extra formatting to make it a bit more human-readable.
-    for date, names in sorted_birthdays:
-        f_day = date.split("-")[0]
-        f_day += "st" if f_day[-1] == "1" else "nd" if f_day[-1] == "2" else "rd" if f_day[-1] == "3" else "th"
-        f_month = months[int(date.split("-")[1]) - 1]
-        print(f"{' and '.join(names)}: {f_day} {f_month}")
+    for (month, day), names in graph.calendar.shared():
+        print(f"{' and '.join(names)}: {format_birthday(month, day)}")
 
 
 # Find birthdays and output them unsorted for the 'info birthdays' command.
@@ -115,33 +185,98 @@ def info_birthdays_unsorted(graph):
     for birthday in birthdays:
         print(f"{birthday[0]}: {birthday[1]}")
 
-def info_average_children(graph, total_people):
-    total_children = 0
-
-    # Loop through nodes adding the length of their children array to the total_children.
-    for node in graph.nodes.values():
-        total_children += len(node.children)
-
-    # Divide total children by the number of nodes for the average and output.
-    average_children = total_children / total_people
+def info_average_children(graph):
+    # The running statistics keep the total number of children, so there's no need to loop through the nodes.
+    average_children = graph.stats.average_children()
+    if average_children is None:
+        print("There are no people in the graph.")
+        return
     print(f"Average number of children per person: {average_children}")
 
-def info_average_age(graph, total_people):
-    total_age = 0
-    # Loop through nodes.
-    for node in graph.nodes.values():
-        if node.birthdate:
-            # Datetime can be used to convert their birthdate as a string to a datetime object with which
-            # arithmatic can be done more easily.
-            day, month, year = map(int, node.birthdate.split('-'))
-            birthdate = datetime(year, month, day)
-            age = (datetime.now() - birthdate).days // 365
-            total_age += age
-
-    # Calculate the average and output.
-    average_age = total_age / total_people
+def info_average_age(graph):
+    average_age = graph.stats.average_age()
+    if average_age is None:
+        print("Nobody in the graph has a birthdate.")
+        return
     print(f"Average age: {average_age}")
 
+def info_stats(graph):
+    stats = graph.stats
+    print(f"People: {stats.people}")
+    if not stats.people:
+        return
+
+    print(f"Children per person: average {stats.average_children():.2f}, median {stats.median_children()}")
+    for count in sorted(stats.child_counts):
+        print(f"    {count} children: {stats.child_counts[count]}")
+
+    if not stats.births:
+        print("Nobody in the graph has a birthdate.")
+        return
+
+    print(f"Age of the {stats.births} people with a birthdate: average {stats.average_age():.1f}, "
+          f"median {stats.median_age():.1f}")
+    for age, count in stats.age_histogram():
+        print(f"    {age}-{age + 9}: {count}")
+
+# Run one of the vectorized date analytics for the 'analytics' command.
+def info_analytics(graph, kind, band):
+    try:
+        analytics.require_numpy()
+    except ImportError as e:
+        print(e)
+        return
+
+    column = graph.birth_column
+    if kind == "age":
+        average_age = analytics.average_age(column)
+        print(f"Average age: {average_age}" if average_age is not None else "Nobody in the graph has a birthdate.")
+        for age, count in analytics.age_distribution(column, band):
+            print(f"    {age}-{age + band - 1}: {count}")
+
+    elif kind == "birth-years":
+        for year, count in analytics.birth_year_histogram(column):
+            print(f"    {year}: {count}")
+
+    elif kind == "generation-gaps":
+        summary = analytics.generation_gaps(column)
+        if summary is None:
+            print("No parent and child both have a birthdate.")
+            return
+        print(f"Generation gap over {summary['count']} parent-child pairs: average {summary['mean']:.1f} years, "
+              f"median {summary['median']:.1f}, standard deviation {summary['std']:.1f}, "
+              f"range {summary['min']:.1f} to {summary['max']:.1f}")
+
+# Output latency percentiles per command for the 'perf' command.
+def info_perf(monitor, command=None):
+    records = monitor.records
+    if command:
+        records = {command: records[command]} if command in records else {}
+    if not records:
+        print("No commands have been timed yet." if not command else f"{command} hasn't been run yet.")
+        return
+
+    print(f"{'command':<16}{'runs':>6}{'wall p50':>12}{'wall p95':>12}{'wall p99':>12}{'cpu p95':>12}{'alloc p95':>12}")
+    for name, record in sorted(records.items()):
+        wall, cpu, memory = record.wall, record.cpu, record.memory
+        allocated = f"{memory.percentile(95) / 1024:.1f} KiB" if memory.count else "-"
+        print(f"{name:<16}{wall.count:>6}"
+              f"{wall.percentile(50) * 1000:>9.2f} ms{wall.percentile(95) * 1000:>9.2f} ms"
+              f"{wall.percentile(99) * 1000:>9.2f} ms{cpu.percentile(95) * 1000:>9.2f} ms{allocated:>12}")
+
+# Output or save the combined profile of a command's last runs for the 'perf --profile' command.
+def perf_profile(monitor, command, last, output):
+    stats = monitor.profile(command, last)
+    if stats is None:
+        print(f"No profiled runs of {command}. Turn profiling on with 'perf --detail on' and run it again.")
+        return
+
+    if output:
+        stats.dump_stats(output)
+        print(f"Profile of the last {last} runs of {command} saved to {output}")
+    else:
+        stats.sort_stats("cumulative").print_stats(20)
+
 def info_immediate_family(node):
     if node.children:
 
@@ -151,13 +286,38 @@ def info_immediate_family(node):
         print(f"Parents of {node.name}: ", ", ".join([node.name for node in node.parents]))
 
         siblings = []
-        siblings.extend(node.parents[0].children)
-        siblings.extend(node.parents[1].children)
+        for parent in node.parents:
+            siblings.extend(parent.children)
 
         print(f"Siblings of {node.name}: ", ", ".join([node.name for node in siblings]))
 
-def info_all_related(node):
-    if related := node.get_all_related():
-        print(f"Extended family of {node.name}: ", ", ".join([node.name for node in related]))
-    else:
-        print(f"No family members found for {node.name}.")
\ No newline at end of file
+def info_all_related(graph, node, max_depth=None, edges=EDGE_TYPES):
+    # Print relatives as the graph finds them rather than collecting them all first.
+    related = iter(graph.related(node, max_depth, edges))
+    first = next(related, None)
+    if first is None:
+        print(f"No family members found for {node.name}.")
+        return
+
+    print(f"Extended family of {node.name}: ", first.name, end="")
+    for relative in related:
+        print(f", {relative.name}", end="")
+    print()
+
+
+# Run a whole-graph job for 'info validate' and the --all options, over --parallel worker processes.
+def info_parallel(graph, job, workers, max_depth=None, edges=EDGE_TYPES):
+    results = parallel.run(graph, job, max(workers, 1), max_depth, edges)
+
+    if job == "validate":
+        for problem in results:
+            print(problem)
+        print(f"Found {len(results)} problems." if results else "No problems found.")
+
+    elif job == "cousins":
+        for name, cousins in results:
+            print(f"{name}: {', '.join(cousins) if cousins else 'no cousins'}")
+
+    elif job == "extended-family":
+        for name, count in results:
+            print(f"{name}: {count} relatives")
@@ -2,6 +2,11 @@ import cmd2
 import argparse
 from cmd2 import with_argparser
 from graph import Graph
+from compact_store import CompactGraph
+from storage import load_graph, save_graph, compact_journal
+from importer import import_file
+from perf import PerfMonitor
+from workspace import WorkspaceGraph
 import ci_helper_functions as ci
 
 class CommandInterface(cmd2.Cmd):
@@ -13,22 +18,72 @@ class CommandInterface(cmd2.Cmd):
         self.graph = None
         self.selected_node = None
 
+        # Time every command so 'perf' can report on them.
+        self.perf = PerfMonitor()
+        self.register_precmd_hook(self._start_timing)
+        # Postcommand hooks are skipped when a command raises, but finalization hooks run after every command.
+        self.register_cmdfinalization_hook(self._finish_timing)
+
+    def _start_timing(self, data: cmd2.plugin.PrecommandData) -> cmd2.plugin.PrecommandData:
+        self.perf.start()
+        return data
+
+    def _finish_timing(self, data: cmd2.plugin.CommandFinalizationData) -> cmd2.plugin.CommandFinalizationData:
+        if data.statement is not None and data.statement.command:
+            self.perf.finish(data.statement.command)
+        return data
+
+
+    def complete_name(self, text, line, begidx, endidx):
+        """Tab completes the names of people in the graph."""
+
+        if self.graph is None:
+            return []
+        return self.graph.name_index.prefix(text, limit=100)
+
 
     select_parser = argparse.ArgumentParser(prog="select")
-    select_parser.add_argument("name", type=str,
+    select_parser.add_argument("name", type=str, completer=complete_name,
                                help="Name of the node to be selected.")
 
     @with_argparser(select_parser)
+    @ci.requires_graph
     def do_select(self, args):
         """
         Selects a node.
         Usage: select <name>
+        Warnings: If nobody has that name, the selection is left as it was and similar names are suggested.
         """
 
-        self.selected_node = self.graph.get_node(args.name)
+        node = self.graph.get_node(args.name)
+        if node is None:
+            ci.suggest_names(self.graph, args.name)
+            return
+
+        self.selected_node = node
         print(f"{args.name} is now the selected node.")
 
 
+    # Set up the find parser and its options.
+    find_parser = argparse.ArgumentParser(prog="find")
+    find_parser.add_argument("pattern", type=str, nargs="+",
+                             help="The start of a name, or a name that may be misspelt.")
+    find_parser.add_argument("--fuzzy", action="store_true",
+                             help="Optionally, only look for names spelt like the pattern.")
+    find_parser.add_argument("--limit", type=int, default=20,
+                             help="Optionally, the most names to list. Defaults to 20.")
+
+    @with_argparser(find_parser)
+    @ci.requires_graph
+    def do_find(self, args):
+        """
+        Lists people whose name starts with a pattern, or failing that, whose name is spelt like it.
+        Usage: find <pattern> Optionally: --fuzzy --limit <N>
+        """
+
+        ci.find_names(self.graph, " ".join(args.pattern), args.fuzzy, args.limit)
+
+
     # Set up the create parser.
     create_parser = argparse.ArgumentParser(prog="create")
     create_subparsers = create_parser.add_subparsers(dest="subcommand")
@@ -36,6 +91,8 @@ class CommandInterface(cmd2.Cmd):
     # Subcommand - Graph
     create_graph_parser = create_subparsers.add_parser('graph',
                                                        help="Create a new graph.")
+    create_graph_parser.add_argument("--compact", action="store_true",
+                                     help="Optionally, use the compact array-backed storage engine.")
 
     # Subcommand - Node and its arguments: name, --gender, --birthdate
     create_node_parser = create_subparsers.add_parser('node',
@@ -53,14 +110,14 @@ class CommandInterface(cmd2.Cmd):
         Create a new object based on the given subcommand.
         Usage: create <subcommand>
         Subcommands:
-            graph
+            graph Optionally: --compact
             node <name> Optionally: --gender <gender> --birthdate <birthdate>
         Warnings: Creating a new graph will discard the one currently being worked on.
         """
 
         # Create a new blank graph.
         if args.subcommand == "graph":
-            self.graph = Graph()
+            self.graph = CompactGraph() if args.compact else Graph()
             print("New graph created.")
 
         # Create a new node.
@@ -76,9 +133,10 @@ class CommandInterface(cmd2.Cmd):
         Usage: remove
         Warnings: This will remove all reference to the node and cannot be undone.
         """
-        self.graph.remove_node(self.selected_node)
+        name = self.selected_node.name
+        self.graph.remove_node(name)
         self.selected_node = None
-        print(f"Node {self.selected_node} has been removed.")
+        print(f"Node {name} has been removed.")
 
 
     # Set up the set parser
@@ -98,10 +156,19 @@ class CommandInterface(cmd2.Cmd):
     set_info_subcommand.add_argument("attribute", type=str, help="Attribute to modify.")
     set_info_subcommand.add_argument("value", type=str, help="New value for the attribute.")
 
+    @with_argparser(set_parser)
     def do_set(self, args):
+        """
+        Set a relation or attribute of the selected node.
+        Usage: set <subcommand>
+        Subcommands:
+            relation <relation_type> <nodes>
+            info <attribute> <value>
+        """
+
         # Execute relation subcommand.
         if args.subcommand == "relation":
-            # Set both parents. Spouse check is done within the .add_parents() function.
+            # Set both parents. Spouse check is done within the .set_parents() function.
             if args.relation_type == 'parents':
                 ci.set_relation_parents(self.graph, self.selected_node, args)
             else:
@@ -110,51 +177,108 @@ class CommandInterface(cmd2.Cmd):
 
             # Set the child relation.
             if args.relation_type == 'child':
-                self.selected_node.add_child(target_node)
-                print(f"{args.node} is now a child of {self.selected_node}.")
+                self.graph.add_child(self.selected_node, target_node)
+                print(f"{args.nodes[0]} is now a child of {self.selected_node.name}.")
 
             # Set the spouse relation.
             elif args.relation_type == 'spouse':
-                self.selected_node.spouse = target_node
-                print(f"{args.node} is now a spouse of {self.selected_node}.")
+                self.graph.set_spouse(self.selected_node, target_node)
+                print(f"{args.nodes[0]} is now a spouse of {self.selected_node.name}.")
 
         # Info subcommand for setting information pertaining to the selected node.
         elif args.subcommand == "info":
-            ci.set_info(self.selected_node, args)
+            ci.set_info(self.graph, self.selected_node, args)
 
     # Set up the load parser and its filename argument.
     load_parser = argparse.ArgumentParser(prog="load")
     load_parser.add_argument("filename", type=str,
                              help="The name of the file you wish to load a node graph from.")
+    load_parser.add_argument("--compact", action="store_true",
+                             help="Optionally, load into the compact array-backed storage engine.")
+    load_parser.add_argument("--journal", action="store_true",
+                             help="Optionally, record changes to a journal so saves only append what changed.")
 
     @with_argparser(load_parser)
     def do_load(self, args):
         """
         Loads a graph from the given file.
-        Usage: load <filename>
+        Usage: load <filename> Optionally: --compact --journal
         Warnings:
-            The file must be valid and must be of type JSON.
+            The file must be valid and must be of type JSON, a .ftb binary snapshot, a .ged GEDCOM file, a .ftw workspace
+            or a .sqlite database. Changes to a database are written to it as they're made.
+            Any journal next to the file is replayed and journaling stays on.
             Loading a new graph will discard the one currently being worked on.
         """
 
-        self.graph = Graph().load_from_json(args.filename)
-        print(self.graph.nodes)
+        graph = load_graph(args.filename, args.compact, args.journal)
+        if graph is None:
+            print("The current graph has been kept.")
+            return
+        self.graph = graph
+        if isinstance(self.graph, WorkspaceGraph):
+            print(f"{self.graph.total_people} people in the workspace.")
+        else:
+            print(f"{len(self.graph.nodes)} people in the graph.")
+
+
+    # Set up the import parser and its filename argument.
+    import_parser = argparse.ArgumentParser(prog="import")
+    import_parser.add_argument("filename", type=str,
+                               help="The CSV or JSON-lines file of people to add to the current graph.")
+
+    @with_argparser(import_parser)
+    @ci.requires_graph
+    def do_import(self, args):
+        """
+        Adds every person in a file to the current graph.
+        Usage: import <filename>
+        Formats:
+            .csv            A header row naming any of: name, gender, birthdate, parent1, parent2, spouse.
+            .jsonl          One object per line with a name and optionally gender, birthdate, parents and spouse.
+        Warnings: People that already exist are skipped. Parents must also be spouses of each other.
+        """
+
+        try:
+            added, duplicates, linked, failed = import_file(self.graph, args.filename)
+        except (OSError, ValueError, KeyError) as e:
+            print(f"Import failed: {e}")
+            return
+
+        print(f"Imported {added} people and {linked} relations from {args.filename}.")
+        if duplicates:
+            print(f"Skipped {len(duplicates)} people who already exist, e.g. {', '.join(duplicates[:5])}.")
+        if failed:
+            print(f"Couldn't add {len(failed)} relations, e.g. {', '.join(' '.join(map(str, r)) for r in failed[:5])}.")
 
 
     # Set up the save parser and its filename argument.
     save_parser = argparse.ArgumentParser(prog="save")
     save_parser.add_argument("filename", type=str,
                              help="The name of the file you wish to save the current node graph as.")
+    save_parser.add_argument("--journal", action="store_true",
+                             help="Optionally, record later changes to a journal so saves only append what changed.")
 
     @with_argparser(save_parser)
     def do_save(self, args):
         """
         Saves a graph to the given file.
-        Usage: save <filename>
-        Warnings: filename must be of type JSON.
+        Usage: save <filename> Optionally: --journal
+        Warnings: filename must be of type JSON, or end in .ftb to save a binary snapshot, .ged to save GEDCOM, .ftw to
+            save a sharded workspace or .sqlite to save a SQLite database.
+        """
+
+        save_graph(self.graph, args.filename, args.journal)
+
+    def do_compact(self, args):
+        """
+        Folds the journal back into a fresh snapshot of the graph.
+        Usage: compact
         """
 
-        self.graph.save_to_json(args.filename)
+        if not self.graph.journal:
+            print("This graph isn't journaling. Use 'save <filename> --journal' to start.")
+            return
+        compact_journal(self.graph)
 
 
     # Set up the info parser and subparsers.
@@ -166,13 +290,21 @@ class CommandInterface(cmd2.Cmd):
     info_relation_subcommand = info_subparser.add_parser("relation",
                                                          help="Find a relation relative to the selected node.")
     info_relation_subcommand.add_argument("relation_type", type=str,
-                                          help="Type of relation.")
+                                          help="Type of relation, or the name of a person to name their relationship.")
+    info_relation_subcommand.add_argument("--all", action="store_true",
+                                          help="Optionally, for cousins, list everyone's cousins instead.")
+    info_relation_subcommand.add_argument("--parallel", type=int, default=1, metavar="N",
+                                          help="Optionally, with --all, spread the work over N processes.")
 
     # Subcommand - Birthdays, and its optional sorted flag.
     info_birthdays_subcommand = info_subparser.add_parser("birthdays",
                                                     help="Retrieve all birthdays organised by date order.")
     info_birthdays_subcommand.add_argument("--sorted", action="store_true",
                                     help="Optionally, show birthdays sorted and merged.")
+    info_birthdays_subcommand.add_argument("--upcoming", type=int, metavar="DAYS",
+                                    help="Optionally, show only birthdays in the next DAYS days.")
+    info_birthdays_subcommand.add_argument("--shared", action="store_true",
+                                    help="Optionally, show who shares a birthday, with the selected node if there is one.")
 
     # Subcommand - Average, and its options: children or age.
     info_average_subcommand = info_subparser.add_parser("average",
@@ -187,6 +319,48 @@ class CommandInterface(cmd2.Cmd):
     # Subcommand - Extended family
     info_extended_subcommand = info_subparser.add_parser("extended-family",
                                                         help="Outputs the extended family of the selected node.")
+    info_extended_subcommand.add_argument("--depth", type=int,
+                                          help="Optionally, how many relations away from the selected node to look.")
+    info_extended_subcommand.add_argument("--via", type=str, nargs="+", choices=["parents", "children", "spouse"],
+                                          default=["parents", "children", "spouse"],
+                                          help="Optionally, which relation types to follow.")
+    info_extended_subcommand.add_argument("--all", action="store_true",
+                                          help="Optionally, count everyone's extended family instead.")
+    info_extended_subcommand.add_argument("--parallel", type=int, default=1, metavar="N",
+                                          help="Optionally, with --all, spread the work over N processes.")
+
+    # Subcommand - Components, and its optional limit.
+    info_components_subcommand = info_subparser.add_parser("components",
+                                                           help="Lists the separate families in the graph and their sizes.")
+    info_components_subcommand.add_argument("--limit", type=int, default=10,
+                                            help="Optionally, how many of the largest families to list. Defaults to 10.")
+
+    # Subcommand - Same family, and the two people to check.
+    info_same_family_subcommand = info_subparser.add_parser("same-family",
+                                                            help="Checks whether two people are in the same family.")
+    info_same_family_subcommand.add_argument("name", type=str, completer=complete_name, help="The name of the first person.")
+    info_same_family_subcommand.add_argument("other", type=str, completer=complete_name, help="The name of the second person.")
+
+    # Subcommand - Validate
+    info_validate_subcommand = info_subparser.add_parser("validate",
+                                                         help="Checks the whole graph for inconsistent relations.")
+    info_validate_subcommand.add_argument("--parallel", type=int, default=1, metavar="N",
+                                          help="Optionally, spread the work over N processes.")
+
+    # Subcommands - Ancestry checks against another person.
+    info_ancestor_subcommand = info_subparser.add_parser("ancestor-of",
+                                                         help="Checks whether the selected node is an ancestor of a person.")
+    info_ancestor_subcommand.add_argument("name", type=str, completer=complete_name, help="The name of the person.")
+    info_descendant_subcommand = info_subparser.add_parser("descendant-of",
+                                                           help="Checks whether the selected node is a descendant of a person.")
+    info_descendant_subcommand.add_argument("name", type=str, completer=complete_name, help="The name of the person.")
+    info_common_subcommand = info_subparser.add_parser("common-ancestors",
+                                                       help="Lists the ancestors the selected node shares with a person.")
+    info_common_subcommand.add_argument("name", type=str, completer=complete_name, help="The name of the person.")
+
+    # Subcommand - Descendant count
+    info_descendant_count_subcommand = info_subparser.add_parser("descendant-count",
+                                                                 help="Counts the descendants of the selected node.")
 
     @with_argparser(info_parser)
     def do_info(self, args):
@@ -194,8 +368,17 @@ class CommandInterface(cmd2.Cmd):
         Retrieve or modify information about the selected node.
         Usage: info <subcommand>
         Subcommands:
-            relation <relation_type> --<modifiers>
+            relation <relation_type | name>
+            ancestor-of <name>
+            descendant-of <name>
+            common-ancestors <name>
+            descendant-count
+            extended-family Optionally: --depth <N> --via <edges> --all --parallel <N>
+            validate Optionally: --parallel <N>
+            components Optionally: --limit <N>
+            same-family <name> <name>
             all
+        Warnings: --all and validate cover the whole graph, split by connected family over --parallel processes.
         """
 
         # List of possible attributes that may be accessed.
@@ -217,10 +400,29 @@ class CommandInterface(cmd2.Cmd):
                     siblings.extend(parent.children)
                 print(f"The {relation_type} of {self.selected_node.name} are: {siblings}")
 
+            # Everyone's cousins are found, family by family.
+            elif relation_type == "cousins" and args.all:
+                ci.info_parallel(self.graph, "cousins", args.parallel)
+
             # Cousins are found.
             elif relation_type == "cousins":
                 ci.info_cousins(self.selected_node)
 
+            # Otherwise it may be a person, whose relationship to the selected node is named.
+            elif other := self.graph.get_node(args.relation_type):
+                ci.info_kinship(self.graph, self.selected_node, other)
+
+            else:
+                print(f"Unknown relation type or person: {args.relation_type}.")
+
+        # Execute birthdays subcommand for upcoming birthdays.
+        elif args.subcommand == "birthdays" and args.upcoming is not None:
+            ci.info_birthdays_upcoming(self.graph, args.upcoming)
+
+        # Execute birthdays subcommand for shared birthdays.
+        elif args.subcommand == "birthdays" and args.shared:
+            ci.info_birthdays_shared(self.graph, self.selected_node)
+
         # Execute birthdays subcommand with the sorted option as true.
         elif args.subcommand == "birthdays" and args.sorted:
             ci.info_birthdays_sorted(self.graph)
@@ -232,20 +434,105 @@ class CommandInterface(cmd2.Cmd):
         # Execute average subcommand.
         elif args.subcommand == "average":
             average_type = args.average_type.lower()
-            total_people = len(self.graph.nodes)
 
             # Average children option.
             if average_type == "children":
-                ci.info_average_children(self.graph, total_people)
+                ci.info_average_children(self.graph)
 
             # Average age option.
             elif average_type == "age":
-                ci.info_average_age(self.graph, total_people)
+                ci.info_average_age(self.graph)
+
+        # Execute the ancestry subcommands.
+        elif args.subcommand in ("ancestor-of", "descendant-of", "common-ancestors"):
+            other = self.graph.get_node(args.name)
+            if other is None:
+                print(f"Person {args.name} does not exist.")
+            else:
+                ci.info_ancestry(self.graph, self.selected_node, args.subcommand, other)
+
+        elif args.subcommand == "descendant-count":
+            ci.info_ancestry(self.graph, self.selected_node, args.subcommand, None)
 
         elif args.subcommand == "immediate-family":
             ci.info_immediate_family(self.selected_node)
 
+        elif args.subcommand == "extended-family" and args.all:
+            ci.info_parallel(self.graph, "extended-family", args.parallel, args.depth, tuple(args.via))
+
         elif args.subcommand == "extended-family":
-            ci.info_all_related(self.selected_node)
+            ci.info_all_related(self.graph, self.selected_node, args.depth, tuple(args.via))
+
+        elif args.subcommand == "components":
+            ci.info_components(self.graph, args.limit)
 
+        elif args.subcommand == "same-family":
+            ci.info_same_family(self.graph, args.name, args.other)
+
+        elif args.subcommand == "validate":
+            ci.info_parallel(self.graph, "validate", args.parallel)
+
+    @ci.requires_graph
+    def do_stats(self, args):
+        """
+        Outputs averages, medians and histograms of children per person and ages.
+        Usage: stats
+        """
+
+        ci.info_stats(self.graph)
+
+    # Set up the analytics parser and its options.
+    analytics_parser = argparse.ArgumentParser(prog="analytics")
+    analytics_parser.add_argument("kind", type=str, choices=["age", "birth-years", "generation-gaps"],
+                                  help="The analytics to run: age, birth-years or generation-gaps.")
+    analytics_parser.add_argument("--band", type=int, default=10,
+                                  help="Optionally, the width in years of each age band. Defaults to 10.")
+
+    @with_argparser(analytics_parser)
+    @ci.requires_graph
+    def do_analytics(self, args):
+        """
+        Runs vectorized date analytics over the whole graph.
+        Usage: analytics <kind> Optionally: --band <years>
+        Kinds:
+            age                 Average age and the number of people in each age band.
+            birth-years         The number of people born in each year.
+            generation-gaps     The age gap between parents and their children.
+        Warnings: Requires NumPy.
+        """
+
+        ci.info_analytics(self.graph, args.kind, args.band)
+
+    # Set up the perf parser and its options.
+    perf_parser = argparse.ArgumentParser(prog="perf")
+    perf_parser.add_argument("--command", type=str,
+                             help="Optionally, only report on this command.")
+    perf_parser.add_argument("--profile", type=str, metavar="COMMAND",
+                             help="Optionally, output the combined cProfile of this command's last runs.")
+    perf_parser.add_argument("--last", type=int, default=5,
+                             help="Optionally, how many runs to combine for --profile. Defaults to 5.")
+    perf_parser.add_argument("--output", type=str,
+                             help="Optionally, save the --profile to this file for pstats or snakeviz instead.")
+    perf_parser.add_argument("--detail", type=str, choices=["on", "off"],
+                             help="Optionally, turn profiling and allocation tracing of every command on or off.")
+    perf_parser.add_argument("--reset", action="store_true",
+                             help="Optionally, forget every timing recorded so far.")
+
+    @with_argparser(perf_parser)
+    def do_perf(self, args):
+        """
+        Outputs the wall time, CPU time and allocation percentiles of every command run so far.
+        Usage: perf Optionally: --command <name> --profile <name> --last <N> --output <file> --detail on|off --reset
+        Warnings: Allocations and profiles are only recorded while --detail is on, which slows every command down.
+        """
 
+        if args.detail:
+            self.perf.set_detail(args.detail == "on")
+            print(f"Profiling and allocation tracing turned {args.detail}.")
+        elif args.reset:
+            self.perf.reset()
+            print("Timings reset.")
+        elif args.profile:
+            ci.perf_profile(self.perf, args.profile, args.last, args.output)
+        else:
+            ci.info_perf(self.perf, args.command)
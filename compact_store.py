@@ -0,0 +1,433 @@
+"""Compact, array-backed storage engine for large graphs."""
+
+import sys
+from array import array
+from collections.abc import Mapping
+from graph import Graph
+from traversal import traverse
+
+
+class CompactStore:
+    """
+    Stores people as integer ids with an interned name table and CSR-style adjacency arrays.
+
+    The parent and child edges of every person live in two flat arrays (targets) indexed by a matching offsets array,
+    so the edges of person i are targets[offsets[i]:offsets[i + 1]]. Edges added after the arrays were built go into a
+    small overflow dictionary of insertion-ordered id sets until compact() folds them back in. As with the
+    RelationSets on a Node, adding an edge that's already there changes nothing. Removed people keep their id but are
+    marked dead so ids held elsewhere never point at somebody else.
+    """
+
+    def __init__(self):
+        self.names = []
+        self.genders = []
+        self.birthdates = []
+        self.ids = {}
+        self.alive = bytearray()
+        self.spouses = array('l')
+
+        # CSR arrays covering the first base_count ids.
+        self.base_count = 0
+        self.parent_offsets = array('l', [0])
+        self.parent_targets = array('l')
+        self.child_offsets = array('l', [0])
+        self.child_targets = array('l')
+
+        # Edges added since the last compaction.
+        self.extra_parents = {}
+        self.extra_children = {}
+
+        self.live_count = 0
+
+    def add_person(self, name, gender=None, birthdate=None):
+        """
+        Adds a person to the name table.
+
+        Args:
+            name (str): The name of the person.
+            gender (str): The gender of the person.
+            birthdate (str): The birthdate of the person.
+
+        Returns:
+            person_id (int): The id given to the person.
+        """
+
+        person_id = len(self.names)
+        self.names.append(sys.intern(name))
+        self.genders.append(_intern(gender))
+        self.birthdates.append(_intern(birthdate))
+        self.ids[name] = person_id
+        self.alive.append(1)
+        self.spouses.append(-1)
+        self.live_count += 1
+        return person_id
+
+    def remove_person(self, person_id):
+        """
+        Removes a person and every edge that points at them.
+
+        Args:
+            person_id (int): The id of the person to be removed.
+        """
+
+        for parent_id in self.parent_ids(person_id):
+            self._drop_edge(self.extra_children, parent_id, person_id)
+        for child_id in self.child_ids(person_id):
+            self._drop_edge(self.extra_parents, child_id, person_id)
+
+        spouse_id = self.spouses[person_id]
+        if spouse_id != -1 and self.spouses[spouse_id] == person_id:
+            self.spouses[spouse_id] = -1
+        self.spouses[person_id] = -1
+
+        del self.ids[self.names[person_id]]
+        self.alive[person_id] = 0
+        self.extra_parents.pop(person_id, None)
+        self.extra_children.pop(person_id, None)
+        self.live_count -= 1
+
+    def _drop_edge(self, extra, owner_id, target_id):
+        # Base edges to a dead id are filtered out on read, so only the overflow sets need cleaning.
+        if owner_id in extra:
+            extra[owner_id].pop(target_id, None)
+
+    def rename(self, person_id, name):
+        """Changes the name of a person, keeping the name table in step."""
+
+        del self.ids[self.names[person_id]]
+        self.names[person_id] = sys.intern(name)
+        self.ids[name] = person_id
+
+    def add_parent_edge(self, parent_id, child_id):
+        """Records that parent_id is a parent of child_id, unless it already is."""
+
+        if parent_id in self.parent_ids(child_id):
+            return
+        self.extra_parents.setdefault(child_id, {})[parent_id] = None
+        self.extra_children.setdefault(parent_id, {})[child_id] = None
+
+    def set_spouse(self, person_id, spouse_id):
+        """Records that two people are married to each other."""
+
+        self.spouses[person_id] = spouse_id
+        self.spouses[spouse_id] = person_id
+
+    def parent_ids(self, person_id):
+        """Returns the ids of the living parents of a person."""
+
+        return self._neighbours(self.parent_offsets, self.parent_targets, self.extra_parents, person_id)
+
+    def child_ids(self, person_id):
+        """Returns the ids of the living children of a person."""
+
+        return self._neighbours(self.child_offsets, self.child_targets, self.extra_children, person_id)
+
+    def spouse_id(self, person_id):
+        """Returns the id of the spouse of a person, or -1 if they have none."""
+
+        spouse_id = self.spouses[person_id]
+        if spouse_id != -1 and not self.alive[spouse_id]:
+            return -1
+        return spouse_id
+
+    def _neighbours(self, offsets, targets, extra, person_id):
+        alive = self.alive
+        result = []
+        if person_id < self.base_count:
+            result = [target for target in targets[offsets[person_id]:offsets[person_id + 1]] if alive[target]]
+        if person_id in extra:
+            result.extend(extra[person_id])
+        return result
+
+    def compact(self):
+        """Folds overflow edges into the CSR arrays, dropping edges to removed people."""
+
+        self.parent_offsets, self.parent_targets = self._build_csr(self.parent_ids)
+        self.child_offsets, self.child_targets = self._build_csr(self.child_ids)
+        self.base_count = len(self.names)
+        self.extra_parents = {}
+        self.extra_children = {}
+
+    def _build_csr(self, neighbours):
+        offsets = array('l', [0])
+        targets = array('l')
+        for person_id in range(len(self.names)):
+            if self.alive[person_id]:
+                targets.extend(neighbours(person_id))
+            offsets.append(len(targets))
+        return offsets, targets
+
+    @classmethod
+    def from_records(cls, records):
+        """
+        Builds a store from (name, details) pairs in the format used by Graph.to_dict(), one record at a time.
+
+        Edges to names that haven't had their record yet are left as a hole in the edge list (or -1 for a spouse) and
+        patched once the name is given an id, so ids follow record order and no second copy of the data is needed.
+
+        Args:
+            records (iterable): (name, details) pairs.
+
+        Returns:
+            store (CompactStore): The populated store.
+        """
+
+        store = cls()
+        ids = store.ids
+        pending = {}
+
+        def link(edges, index, name):
+            target_id = ids.get(name)
+            if target_id is None:
+                pending.setdefault(name, []).append((edges, index))
+            else:
+                edges[index] = target_id
+
+        for name, details in records:
+            person_id = store.add_person(name, details.get("gender"), details.get("birthdate"))
+
+            # Patch the edges and spouse slots that were waiting for this person.
+            for edges, index in pending.pop(name, []):
+                edges[index] = person_id
+
+            for key, extra in (("parents", store.extra_parents), ("children", store.extra_children)):
+                names = details.get(key, [])
+                if names:
+                    edges = extra[person_id] = [None] * len(names)
+                    for index, target_name in enumerate(names):
+                        link(edges, index, target_name)
+
+            spouse_name = details.get("spouse")
+            if spouse_name is not None:
+                link(store.spouses, person_id, spouse_name)
+
+        # Anyone still pending never had a record, so drop the references to them. Turning the edge lists into id
+        # sets also drops any name a record lists twice.
+        if pending:
+            print(f"Ignoring references to people with no record: {', '.join(pending)}.")
+        for extra in (store.extra_parents, store.extra_children):
+            for person_id, edges in extra.items():
+                extra[person_id] = dict.fromkeys(target_id for target_id in edges if target_id is not None)
+
+        store.compact()
+        return store
+
+
+def _intern(value):
+    # Genders and birthdates repeat a lot, so share one string object per distinct value.
+    return sys.intern(value) if isinstance(value, str) else value
+
+
+class NodeView:
+    """A thin Node-like view of one person in a CompactStore."""
+
+    __slots__ = ("store", "id")
+
+    def __init__(self, store, person_id):
+        self.store = store
+        self.id = person_id
+
+    def __eq__(self, other):
+        return isinstance(other, NodeView) and other.store is self.store and other.id == self.id
+
+    def __hash__(self):
+        return hash(self.id)
+
+    def __repr__(self):
+        return f"<NodeView {self.name!r} ({self.id})>"
+
+    def _view(self, person_id):
+        return NodeView(self.store, person_id)
+
+    @property
+    def name(self):
+        return self.store.names[self.id]
+
+    @name.setter
+    def name(self, value):
+        self.store.rename(self.id, value)
+
+    @property
+    def gender(self):
+        return self.store.genders[self.id]
+
+    @gender.setter
+    def gender(self, value):
+        self.store.genders[self.id] = _intern(value)
+
+    @property
+    def birthdate(self):
+        return self.store.birthdates[self.id]
+
+    @birthdate.setter
+    def birthdate(self, value):
+        self.store.birthdates[self.id] = _intern(value)
+
+    @property
+    def parents(self):
+        return [self._view(parent_id) for parent_id in self.store.parent_ids(self.id)]
+
+    @property
+    def children(self):
+        return [self._view(child_id) for child_id in self.store.child_ids(self.id)]
+
+    @property
+    def spouse(self):
+        spouse_id = self.store.spouse_id(self.id)
+        return self._view(spouse_id) if spouse_id != -1 else None
+
+    @spouse.setter
+    def spouse(self, value):
+        self.store.spouses[self.id] = value.id if value else -1
+
+    def set_parents(self, parent1, parent2):
+        """Adds a parent to the node. Returns True if they were added, which requires them to be married."""
+
+        if parent1 == parent2.spouse and parent2 == parent1.spouse:
+            self.store.add_parent_edge(parent1.id, self.id)
+            self.store.add_parent_edge(parent2.id, self.id)
+            return True
+        return False
+
+    def add_child(self, child):
+        """Adds a child to the node."""
+
+        self.store.add_parent_edge(self.id, child.id)
+
+    def set_spouse(self, spouse):
+        """Adds a spouse to the node."""
+
+        self.store.set_spouse(self.id, spouse.id)
+
+    def to_dict(self):
+        """Converts node information to a dictonary for storing in a .json file."""
+
+        spouse = self.spouse
+        return {
+            "name": self.name,
+            "gender": self.gender,
+            "birthdate": self.birthdate,
+            "parents": [parent.name for parent in self.parents],
+            "children": [child.name for child in self.children],
+            "spouse": spouse.name if spouse else None
+        }
+
+    def get_all_related(self):
+        """Returns everyone reachable from this person through parent, child and spouse edges."""
+
+        return list(traverse(self))
+
+
+class NodeMapping(Mapping):
+    """Read-only name -> NodeView mapping so code written against Graph.nodes keeps working."""
+
+    def __init__(self, store):
+        self.store = store
+
+    def __getitem__(self, name):
+        return NodeView(self.store, self.store.ids[name])
+
+    def __iter__(self):
+        return iter(self.store.ids)
+
+    def __len__(self):
+        return self.store.live_count
+
+    def __contains__(self, name):
+        return name in self.store.ids
+
+    def __repr__(self):
+        return f"<NodeMapping of {len(self)} people>"
+
+
+class CompactGraph(Graph):
+    """A Graph whose people live in a CompactStore rather than individual Node objects."""
+
+    def __init__(self, store=None):
+        super().__init__()
+        self.store = store if store is not None else CompactStore()
+        self.nodes = NodeMapping(self.store)
+
+    def add_node(self, name, gender=None, birthdate=None):
+        """
+        Adds a node to the graph.
+
+        Args:
+            name (str): The name of the node
+            gender (str): The gender of the node.
+            birthdate (str): The birthdate of the node.
+
+        Returns:
+            node (NodeView): A view of the created node.
+        """
+
+        if name not in self.store.ids:
+            self.create_node(name, gender, birthdate)
+        else:
+            print(f"Person {name} already exists.")
+
+        return self.nodes[name]
+
+    def create_node(self, name, gender=None, birthdate=None):
+        """
+        Creates a person that is known not to exist yet and tells the listeners about it.
+
+        Returns:
+            node (NodeView): A view of the created node.
+        """
+
+        node = NodeView(self.store, self.store.add_person(name, gender, birthdate))
+        self.notify("add_node", node)
+        return node
+
+    def get_node(self, name):
+        """
+        Finds and returns a node based on its name.
+
+        Args:
+            name (str): The name of the node.
+
+        Returns:
+            node (NodeView): A view of the node, or None if it doesn't exist.
+        """
+
+        person_id = self.store.ids.get(name)
+        return NodeView(self.store, person_id) if person_id is not None else None
+
+    def remove_node(self, name):
+        """
+        Removes a node, including all references to it.
+
+        Args:
+            name (str): The name of the node to be removed.
+        """
+
+        if name in self.store.ids:
+            self.notify("remove_node", self.nodes[name])
+            self.store.remove_person(self.store.ids[name])
+        else:
+            print(f"Person {name} does not exist.")
+
+    def rename_node(self, node, name):
+        """Renames a node. The name table is keyed by id, so the view just passes the name through."""
+
+        node.name = name
+
+    def compact(self):
+        """Folds edges added since loading back into the CSR arrays."""
+
+        self.store.compact()
+
+    @classmethod
+    def from_records(cls, records):
+        """
+        Creates a compact graph from (name, details) pairs, one record at a time.
+
+        Args:
+            records (iterable): (name, details) pairs in the format produced by to_dict().
+
+        Returns:
+            graph (CompactGraph): A new CompactGraph populated with the people and relationships in records.
+        """
+
+        return cls(CompactStore.from_records(records))
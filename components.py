@@ -0,0 +1,126 @@
+"""Union-find over people for instant answers about separate family clusters."""
+
+
+class ComponentIndex:
+    """
+    Graph listener that keeps everyone in a union-find of connected families.
+
+    New parent, child and spouse edges union the two families, which is near O(1) with path halving and union by size.
+    Union-find can't split a family back up, so removing a person marks the index stale and it is rebuilt from the
+    graph's current nodes the next time it's queried.
+    """
+
+    def __init__(self, graph):
+        self.graph = graph
+        self.build()
+
+    def build(self):
+        """Rebuilds every family from the graph's current nodes."""
+
+        self.parent = {}
+        self.size = {}
+        self.count = 0
+        self.stale = False
+
+        for node in self.graph.nodes.values():
+            self._make_set(node)
+        # Parents and children are both followed, since a loaded file or a journal replay can list a relation on only
+        # one side of it.
+        for node in self.graph.nodes.values():
+            for parent in node.parents:
+                self._union(node, parent)
+            for child in node.children:
+                self._union(node, child)
+            if node.spouse:
+                self._union(node, node.spouse)
+
+    def _make_set(self, node):
+        self.parent[node] = node
+        self.size[node] = 1
+        self.count += 1
+
+    def _find(self, node):
+        parent = self.parent
+        while parent[node] != node:
+            # Path halving: point every other node on the way up at its grandparent.
+            parent[node] = parent[parent[node]]
+            node = parent[node]
+        return node
+
+    def _union(self, node, other):
+        # A relative who isn't in the graph, left behind by a bad file, has no family to join.
+        if other not in self.parent:
+            return
+        root, other_root = self._find(node), self._find(other)
+        if root == other_root:
+            return
+        if self.size[root] < self.size[other_root]:
+            root, other_root = other_root, root
+        self.parent[other_root] = root
+        self.size[root] += self.size.pop(other_root)
+        self.count -= 1
+
+    def on_add_node(self, node):
+        if not self.stale:
+            self._make_set(node)
+
+    def on_remove_node(self, node):
+        self.stale = True
+
+    def on_set_parents(self, node, parent1, parent2):
+        if not self.stale:
+            self._union(node, parent1)
+            self._union(node, parent2)
+
+    def on_add_child(self, node, child):
+        if not self.stale:
+            self._union(node, child)
+
+    def on_set_spouse(self, node, spouse):
+        if not self.stale:
+            self._union(node, spouse)
+
+    def _ensure_built(self):
+        if self.stale:
+            self.build()
+
+    def find(self, node):
+        """Returns the representative person of the node's family."""
+
+        self._ensure_built()
+        return self._find(node)
+
+    def same_family(self, node, other):
+        """Returns True if the two nodes are connected by any chain of parent, child and spouse relations."""
+
+        return self.find(node) == self.find(other)
+
+    def family_size(self, node):
+        """Returns how many people are in the node's family, including the node."""
+
+        return self.size[self.find(node)]
+
+    def families(self):
+        """
+        Lists every family, largest first.
+
+        Returns:
+            families (list): (representative, size) pairs.
+        """
+
+        self._ensure_built()
+        return sorted(self.size.items(), key=lambda item: item[1], reverse=True)
+
+    def members(self):
+        """
+        Groups every person by family.
+
+        Returns:
+            members (dict): Each family's representative mapped to a list of its people.
+        """
+
+        self._ensure_built()
+        members = {}
+        for node in self.parent:
+            members.setdefault(self._find(node), []).append(node)
+        return members
@@ -0,0 +1,39 @@
+"""Parsing for the "D-M-YYYY" birthdate strings stored on nodes."""
+
+from datetime import date
+
+
+def parse_birthdate(birthdate):
+    """
+    Parses a birthdate string.
+
+    Args:
+        birthdate (str): A birthdate in the form "D-M-YYYY".
+
+    Returns:
+        date (datetime.date): The parsed date, or None if birthdate is missing or malformed.
+    """
+
+    if not birthdate:
+        return None
+    try:
+        day, month, year = map(int, birthdate.split('-'))
+        return date(year, month, day)
+    except ValueError:
+        return None
+
+
+def next_occurrence(month, day, today):
+    """
+    Returns the next date on or after today that falls on the given day of the year.
+
+    29th February birthdays are celebrated on 1st March in years that aren't leap years.
+    """
+
+    for year in (today.year, today.year + 1):
+        try:
+            occurrence = date(year, month, day)
+        except ValueError:
+            occurrence = date(year, 3, 1)
+        if occurrence >= today:
+            return occurrence
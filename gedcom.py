@@ -0,0 +1,272 @@
+"""Streaming GEDCOM reader and writer."""
+
+import json
+from dates import parse_birthdate
+from kinship import gendered
+
+MONTHS = ["JAN", "FEB", "MAR", "APR", "MAY", "JUN", "JUL", "AUG", "SEP", "OCT", "NOV", "DEC"]
+SEXES = {"M": "male", "F": "female"}
+
+
+class GedcomError(ValueError):
+    """Raised for a GEDCOM file that can't be parsed, naming the line it went wrong on."""
+
+
+def iter_records(file_path):
+    """
+    Streams the level 0 records of a GEDCOM file, holding only the current record in memory.
+
+    Args:
+        file_path (str): The path to the GEDCOM file.
+
+    Yields:
+        (tag, xref, lines) (tuple): The record's tag (e.g. "INDI"), its cross-reference id (e.g. "@I1@") or None, and a
+        list of (level, tag, value) tuples for the lines beneath it.
+
+    Raises:
+        GedcomError: If a line doesn't start with a level number or the file isn't valid UTF-8.
+    """
+
+    tag = xref = None
+    lines = []
+    with open(file_path, 'r', encoding='utf-8-sig') as f:
+        try:
+            for number, line in enumerate(f, start=1):
+                line = line.strip()
+                if not line:
+                    continue
+                level, _, rest = line.partition(" ")
+                if not level.isdigit():
+                    raise GedcomError(f"Line {number}: expected a level number, not {level!r}.")
+                line_xref = None
+                if rest.startswith("@"):
+                    line_xref, _, rest = rest.partition(" ")
+                line_tag, _, value = rest.partition(" ")
+
+                if level == "0":
+                    if tag is not None:
+                        yield tag, xref, lines
+                    tag, xref, lines = line_tag, line_xref, []
+                else:
+                    lines.append((int(level), line_tag, value))
+        except UnicodeDecodeError as e:
+            raise GedcomError(f"Line {_undecodable_line(file_path)}: not valid UTF-8 ({e.reason}).") from e
+
+    if tag is not None:
+        yield tag, xref, lines
+
+
+def _undecodable_line(file_path):
+    # Text mode decodes a block at a time, ahead of the line being read, so the bad line is found by decoding the
+    # file again one line at a time.
+    with open(file_path, 'rb') as f:
+        for number, line in enumerate(f, start=1):
+            try:
+                line.decode('utf-8')
+            except UnicodeDecodeError:
+                return number
+    return "?"
+
+
+def read_gedcom(graph, file_path):
+    """
+    Streams the people and families in a GEDCOM file into a graph.
+
+    INDI records become nodes as soon as they are read. FAM records are applied straight away through set_spouse,
+    set_parents and add_child, unless they mention someone whose INDI record hasn't been read yet, in which case they
+    wait until the end of the file. A family's two parents are married unless it's tagged _UNMARRIED, as write_gedcom
+    does for co-parents. People with the same name are told apart by their GEDCOM id, and a name written out in full
+    under _EXACT is used as it is.
+
+    Args:
+        graph (Graph): The graph to read into.
+        file_path (str): The path to the GEDCOM file.
+
+    Returns:
+        (people, families) (tuple): The number of INDI and FAM records read.
+
+    Raises:
+        GedcomError: If the file can't be parsed. The graph may have been partly filled by then.
+    """
+
+    names = {}
+    waiting = []
+    people = families = 0
+
+    for tag, xref, lines in iter_records(file_path):
+        if tag == "INDI":
+            name, gender, birthdate = _read_individual(lines)
+            name = name or xref
+            if name in graph.nodes:
+                name = f"{name} ({xref.strip('@')})"
+            graph.create_node(name, gender, birthdate)
+            names[xref] = name
+            people += 1
+
+        elif tag == "FAM":
+            family = _read_family(lines)
+            families += 1
+            if all(member in names for member in family[0] + family[1]):
+                _apply_family(graph, names, *family)
+            else:
+                waiting.append(family)
+
+    for family in waiting:
+        _apply_family(graph, names, *family)
+
+    return people, families
+
+
+def _read_individual(lines):
+    name = gender = birthdate = None
+    event = None
+    first_name = False
+    for level, tag, value in lines:
+        if level == 1:
+            event = tag
+            first_name = tag == "NAME" and name is None
+            if first_name:
+                name = _from_gedcom_name(value)
+            elif tag == "SEX":
+                gender = SEXES.get(value.upper())
+        elif level == 2 and tag == "DATE" and event == "BIRT":
+            birthdate = _from_gedcom_date(value)
+        elif level == 2 and tag == "_EXACT" and first_name:
+            try:
+                name = json.loads(value)
+            except ValueError:
+                pass
+    return name, gender, birthdate
+
+
+def _from_gedcom_name(value):
+    # Surnames are wrapped in slashes, e.g. "John /Smith/".
+    return " ".join(value.replace("/", " ").split())
+
+
+def _to_gedcom_name(name):
+    # The last word is written as the surname. Slashes and runs of whitespace can't be written in a GEDCOM name, so
+    # names that wouldn't read back the same are given in full, JSON-escaped, under a _EXACT line too.
+    given, _, surname = _from_gedcom_name(name).rpartition(" ")
+    value = f"{given} /{surname}/" if given else surname
+    if _from_gedcom_name(value) != name:
+        value += f"\n2 _EXACT {json.dumps(name, ensure_ascii=False)}"
+    return value
+
+
+def _read_family(lines):
+    spouses = []
+    children = []
+    married = True
+    for level, tag, value in lines:
+        if level == 1 and tag in ("HUSB", "WIFE"):
+            spouses.append(value)
+        elif level == 1 and tag == "CHIL":
+            children.append(value)
+        elif level == 1 and tag == "_UNMARRIED":
+            married = False
+    return spouses, children, married
+
+
+def _apply_family(graph, names, spouses, children, married):
+    parents = [graph.get_node(names[xref]) for xref in spouses if xref in names]
+    kids = [graph.get_node(names[xref]) for xref in children if xref in names]
+
+    if married and len(parents) == 2:
+        graph.set_spouse(parents[0], parents[1])
+        for child in kids:
+            graph.set_parents(child, parents[0], parents[1])
+    else:
+        for parent in parents:
+            for child in kids:
+                graph.add_child(parent, child)
+
+
+def _from_gedcom_date(value):
+    # Only exact dates like "12 MAR 1950" fit the "D-M-YYYY" birthdate format; ranges and estimates are dropped.
+    parts = value.split()
+    if len(parts) != 3 or parts[1].upper() not in MONTHS:
+        return None
+    parsed = parse_birthdate(f"{parts[0]}-{MONTHS.index(parts[1].upper()) + 1}-{parts[2]}")
+    return f"{parsed.day}-{parsed.month}-{parsed.year}" if parsed else None
+
+
+def _to_gedcom_date(birthdate):
+    parsed = parse_birthdate(birthdate)
+    if parsed is None:
+        return None
+    return f"{parsed.day} {MONTHS[parsed.month - 1]} {parsed.year}"
+
+
+def write_gedcom(graph, file_path):
+    """
+    Streams a graph out to a GEDCOM 5.5.1 file.
+
+    Every married couple, and every set of parents who aren't married to each other, becomes a FAM record. The
+    latter are tagged _UNMARRIED so they read back as co-parents rather than spouses. Only the id tables are built up
+    front; each INDI and FAM record is written as it is generated. Names are written as "Given /Surname/", and any
+    name that wouldn't read back the same is also given in full under _EXACT.
+
+    Args:
+        graph (Graph): The graph to be saved.
+        file_path (str): The path to the GEDCOM file.
+    """
+
+    person_ids = {}
+    family_ids = {}
+    children = {}
+    unmarried_families = {}
+
+    # Number people and families first, so INDI records can point at the families they belong to.
+    for index, node in enumerate(graph.nodes.values(), start=1):
+        person_ids[node.name] = f"@I{index}@"
+        if node.spouse:
+            family_ids.setdefault(_couple_key(node), f"@F{len(family_ids) + 1}@")
+        if node.parents:
+            key = _parents_key(node)
+            if key not in family_ids:
+                family_ids[key] = f"@F{len(family_ids) + 1}@"
+                if not key[0]:
+                    for parent in node.parents:
+                        unmarried_families.setdefault(parent.name, []).append(key)
+            children.setdefault(key, []).append(node.name)
+
+    with open(file_path, 'w', encoding='utf-8') as f:
+        f.write("0 HEAD\n1 SOUR family-tree\n1 GEDC\n2 VERS 5.5.1\n2 FORM LINEAGE-LINKED\n1 CHAR UTF-8\n")
+
+        for node in graph.nodes.values():
+            f.write(f"0 {person_ids[node.name]} INDI\n1 NAME {_to_gedcom_name(node.name)}\n")
+            if sex := gendered(node, "M", "F", None):
+                f.write(f"1 SEX {sex}\n")
+            if date := _to_gedcom_date(node.birthdate):
+                f.write(f"1 BIRT\n2 DATE {date}\n")
+            if node.spouse:
+                f.write(f"1 FAMS {family_ids[_couple_key(node)]}\n")
+            for key in unmarried_families.get(node.name, ()):
+                f.write(f"1 FAMS {family_ids[key]}\n")
+            if node.parents:
+                f.write(f"1 FAMC {family_ids[_parents_key(node)]}\n")
+
+        for key, family_id in family_ids.items():
+            married, names = key
+            f.write(f"0 {family_id} FAM\n")
+            for name in names:
+                role = gendered(graph.get_node(name), "HUSB", "WIFE", "HUSB")
+                f.write(f"1 {role} {person_ids[name]}\n")
+            if not married and len(names) > 1:
+                f.write("1 _UNMARRIED Y\n")
+            for name in children.get(key, ()):
+                f.write(f"1 CHIL {person_ids[name]}\n")
+
+        f.write("0 TRLR\n")
+
+
+def _couple_key(node):
+    return True, tuple(sorted((node.name, node.spouse.name)))
+
+
+def _parents_key(node):
+    parents = list(node.parents)
+    if len(parents) == 2 and parents[0].spouse == parents[1] and parents[1].spouse == parents[0]:
+        return _couple_key(parents[0])
+    return False, tuple(sorted(parent.name for parent in parents))
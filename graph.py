@@ -1,10 +1,113 @@
 import json
-from node import Node
+from node import Node, RelationSet
+from json_stream import iter_json_object, print_progress
+from calendar_index import BirthdayCalendar
+from graph_stats import GraphStatistics
+from birth_column import BirthColumn
+from kinship import KinshipIndex
+from ancestry import AncestryIndex
+from components import ComponentIndex
+from name_index import NameIndex
+from traversal import traverse, EDGE_TYPES
+
+
+EDITABLE_ATTRIBUTES = ("name", "gender", "birthdate")
 
 
 class Graph:
     def __init__(self):
         self.nodes = {}
+        self.listeners = []
+        self.journal = None
+        self.indexes = {}
+
+    def add_listener(self, listener):
+        """
+        Registers an object to be told about changes to the graph.
+
+        The listener may define any of on_add_node(node), on_remove_node(node), on_set_parents(node, parent1, parent2),
+        on_add_child(node, child), on_set_spouse(node, spouse) and on_set_info(node, attribute, old_value, new_value).
+        on_remove_node is called before the node is unlinked, so its relations can still be read.
+
+        Args:
+            listener (object): The object to notify.
+        """
+
+        self.listeners.append(listener)
+
+    def remove_listener(self, listener):
+        """Stops notifying a listener about changes to the graph."""
+
+        self.listeners.remove(listener)
+
+    def get_index(self, index_class):
+        """
+        Returns the graph's index of the given class, building it from the current nodes the first time it's needed.
+
+        Indexes are listeners, so once built they are kept up to date as the graph changes.
+
+        Args:
+            index_class (type): A listener class whose constructor takes the graph.
+
+        Returns:
+            index (object): The index.
+        """
+
+        index = self.indexes.get(index_class)
+        if index is None:
+            index = self.indexes[index_class] = index_class(self)
+            self.add_listener(index)
+        return index
+
+    @property
+    def calendar(self):
+        """The BirthdayCalendar index of the graph."""
+
+        return self.get_index(BirthdayCalendar)
+
+    @property
+    def stats(self):
+        """The GraphStatistics index of the graph."""
+
+        return self.get_index(GraphStatistics)
+
+    @property
+    def birth_column(self):
+        """The BirthColumn index of the graph."""
+
+        return self.get_index(BirthColumn)
+
+    @property
+    def kinship(self):
+        """The KinshipIndex of the graph."""
+
+        return self.get_index(KinshipIndex)
+
+    @property
+    def ancestry(self):
+        """The AncestryIndex of the graph."""
+
+        return self.get_index(AncestryIndex)
+
+    @property
+    def components(self):
+        """The ComponentIndex of the graph."""
+
+        return self.get_index(ComponentIndex)
+
+    @property
+    def name_index(self):
+        """The NameIndex of the graph."""
+
+        return self.get_index(NameIndex)
+
+    def notify(self, event, *args):
+        """Calls the on_<event> method of every listener that has one."""
+
+        for listener in self.listeners:
+            handler = getattr(listener, f"on_{event}", None)
+            if handler:
+                handler(*args)
 
     def add_node(self, name, gender=None, birthdate=None):
         """
@@ -21,14 +124,93 @@ class Graph:
         # Check if node already exists.
         if name not in self.nodes:
             # Add the node if it doesn't
-            self.nodes[name] = Node(name, gender, birthdate)
+            self.create_node(name, gender, birthdate)
         else:
             print(f"Person {name} already exists.")
-        print(self.nodes)
 
         # Return it so it can be accessed via variable.
         return self.nodes[name]
 
+    def create_node(self, name, gender=None, birthdate=None):
+        """
+        Creates a node that is known not to exist yet and tells the listeners about it.
+
+        Args:
+            name (str): The name of the node
+            gender (str): The gender of the node.
+            birthdate (str): The birthdate of the node.
+
+        Returns:
+            node (Node): The created node.
+        """
+
+        node = self.nodes[name] = Node(name, gender, birthdate)
+        self.notify("add_node", node)
+        return node
+
+    def add_nodes_bulk(self, records):
+        """
+        Adds many nodes in a single pass without any per-node output.
+
+        Args:
+            records (iterable): Dictionaries with a "name" and optionally a "gender" and "birthdate".
+
+        Returns:
+            (added, duplicates) (tuple): The number of nodes added and a list of names that already existed.
+        """
+
+        nodes = self.nodes
+        added = 0
+        duplicates = []
+        for record in records:
+            name = record["name"]
+            if name in nodes:
+                duplicates.append(name)
+                continue
+            self.create_node(name, record.get("gender"), record.get("birthdate"))
+            added += 1
+        return added, duplicates
+
+    def add_relations_bulk(self, relations):
+        """
+        Adds many relations without any per-relation output.
+
+        Spouse relations are wired first, so parents can be set from the same batch that marries them.
+
+        Args:
+            relations (iterable): (relation_type, name, target) tuples, where relation_type is "spouse" or "child" and
+                target is a name, or relation_type is "parents" and target is a pair of names.
+
+        Returns:
+            (linked, failed) (tuple): The number of relations added and a list of the relations that couldn't be,
+            because a name didn't exist or the parents weren't married.
+        """
+
+        relations = sorted(relations, key=lambda relation: relation[0] != "spouse")
+        get_node = self.nodes.get
+        linked = 0
+        failed = []
+        for relation in relations:
+            relation_type, name, target = relation
+            node = get_node(name)
+            if relation_type == "parents":
+                targets = [get_node(target_name) for target_name in target]
+            else:
+                targets = [get_node(target)]
+            if node is None or None in targets:
+                failed.append(relation)
+                continue
+
+            if relation_type == "spouse":
+                self.set_spouse(node, targets[0])
+            elif relation_type == "child":
+                self.add_child(node, targets[0])
+            elif not self.set_parents(node, *targets):
+                failed.append(relation)
+                continue
+            linked += 1
+        return linked, failed
+
     def get_node(self, name):
         """
         Finds and returns a node based on its name.
@@ -52,15 +234,118 @@ class Graph:
         # Find everywhere the node could be and remove reference to it before deleting the node itself.
         if name in self.nodes:
             node = self.nodes[name]
+            self.notify("remove_node", node)
             for parent in node.parents:
-                parent.children.remove(node)
+                parent.children.discard(node)
             for child in node.children:
-                child.parents.remove(node)
-            node.spouse.spouse = None
+                child.parents.discard(node)
+            if node.spouse:
+                node.spouse.spouse = None
             del self.nodes[name]
         else:
             print(f"Person {name} does not exist.")
 
+    def related(self, node, max_depth=None, edges=EDGE_TYPES):
+        """
+        Lazily finds everyone related to a node, nearest first. Storage backends can answer this their own way.
+
+        Args:
+            node (Node): The node to start from.
+            max_depth (int): Optionally, the number of edges to follow outwards.
+            edges (tuple): The edge types to follow: any of "parents", "children" and "spouse".
+
+        Returns:
+            related (iterator): Every related node, not including node itself.
+        """
+
+        return traverse(node, max_depth=max_depth, edges=edges)
+
+    def set_parents(self, node, parent1, parent2):
+        """
+        Sets the parents of a node, provided the two parents are married to each other.
+
+        Listeners are only told about edges that are new: if one of the two was already a parent, the change is
+        reported as the other parent gaining a child.
+
+        Args:
+            node (Node): The child.
+            parent1 (Node): The first parent.
+            parent2 (Node): The second parent.
+
+        Returns:
+            bool: True if the parents were set, False if they aren't each other's spouse.
+        """
+
+        new_parents = [parent for parent in (parent1, parent2) if parent not in node.parents]
+        if not node.set_parents(parent1, parent2):
+            return False
+
+        if len(new_parents) == 2:
+            self.notify("set_parents", node, parent1, parent2)
+        elif new_parents:
+            self.notify("add_child", new_parents[0], node)
+        return True
+
+    def add_child(self, node, child):
+        """
+        Adds a child to a node.
+
+        Args:
+            node (Node): The parent.
+            child (Node): The child.
+        """
+
+        if child in node.children:
+            return
+        node.add_child(child)
+        self.notify("add_child", node, child)
+
+    def set_spouse(self, node, spouse):
+        """
+        Marries two nodes to each other.
+
+        Args:
+            node (Node): The first spouse.
+            spouse (Node): The second spouse.
+        """
+
+        if node.spouse == spouse and spouse.spouse == node:
+            return
+        node.set_spouse(spouse)
+        self.notify("set_spouse", node, spouse)
+
+    def set_info(self, node, attribute, value):
+        """
+        Updates one of a node's attributes.
+
+        Args:
+            node (Node): The node to update.
+            attribute (str): One of EDITABLE_ATTRIBUTES.
+            value (str): The new value for the attribute.
+
+        Returns:
+            updated (bool): True if the attribute was changed, or False if it was a rename to someone else's name, in
+            which case nothing is changed or journaled.
+        """
+
+        old_value = getattr(node, attribute)
+        if attribute == "name":
+            other = self.get_node(value)
+            if other is not None and other != node:
+                return False
+            self.rename_node(node, value)
+        else:
+            setattr(node, attribute, value)
+        self.notify("set_info", node, attribute, old_value, value)
+        return True
+
+    def rename_node(self, node, name):
+        """Renames a node, moving it to its new key in self.nodes."""
+
+        del self.nodes[node.name]
+        node.name = name
+        self.nodes[name] = node
+
     def to_dict(self):
         """
         Begins the dictionary convertion for storing information in a json file.
@@ -81,22 +366,56 @@ class Graph:
         Returns:
             graph (Graph): A new Graph object populated with nodes and their relationships as defined in data.
         """
+
+        return cls.from_records(data.items())
+
+    @classmethod
+    def from_records(cls, records):
+        """
+        Creates a graph object from (name, details) pairs, wiring up relationships as each record arrives.
+
+        Names that are referenced before their own record is seen get a forward reference node, which is added to the
+        graph once its record turns up, so the graph comes out the same as from_dict would build it.
+
+        Args:
+            records (iterable): (name, details) pairs in the format produced by to_dict().
+
+        Returns:
+            graph (Graph): A new Graph object populated with nodes and their relationships as defined in records.
+        """
         graph = cls()
-        temp_nodes = {name: Node(name) for name in data.keys()}
+        nodes = graph.nodes
+        forward = {}
 
-        # Loop through nodes and set the information for each of the nodes.
-        for name, details in data.items():
-            node = temp_nodes[name]
+        def resolve(name):
+            node = nodes.get(name) or forward.get(name)
+            if node is None:
+                node = forward[name] = Node(name)
+            return node
+
+        # Loop through records and set the information for each of the nodes.
+        for name, details in records:
+            node = forward.pop(name, None) or Node(name)
+            nodes[name] = node
             node.gender = details.get("gender")
             node.birthdate = details.get("birthdate")
-            node.spouse = temp_nodes.get(details.get("spouse"))
+            spouse_name = details.get("spouse")
+            node.spouse = resolve(spouse_name) if spouse_name is not None else None
             for parent_name in details.get("parents", []):
-                node.parents.append(temp_nodes[parent_name])
+                node.parents.add(resolve(parent_name))
             for child_name in details.get("children", []):
-                node.children.append(temp_nodes[child_name])
+                node.children.add(resolve(child_name))
+
+        # Anyone still only forward referenced never had a record, so drop the references to them.
+        if forward:
+            print(f"Ignoring references to people with no record: {', '.join(forward)}.")
+            for node in nodes.values():
+                node.parents = RelationSet(parent for parent in node.parents if parent.name not in forward)
+                node.children = RelationSet(child for child in node.children if child.name not in forward)
+                if node.spouse and node.spouse.name in forward:
+                    node.spouse = None
 
         # Return the graph object.
-        graph.nodes = temp_nodes
         return graph
 
     def save_to_json(self, file_path):
@@ -111,12 +430,15 @@ class Graph:
         print(f"Family graph saved to {file_path}")
 
     @classmethod
-    def load_from_json(cls, file_path):
+    def load_from_json(cls, file_path, progress=print_progress):
         """
         Loads graph information from a json file and converts it into a Graph object.
 
+        The file is streamed one person at a time rather than parsed as a whole.
+
         Args:
             file_path (str): The path to the json file that contains the graph data.
+            progress (callable): Optionally, called as progress(bytes_read, total_bytes) while the file is read.
 
         Returns:
             graph (Graph): A new Graph object created from the data in the json file, or an empty graph if an error is
@@ -124,10 +446,9 @@ class Graph:
         """
 
         try:
-            with open(file_path, 'r') as f:
-                data = json.load(f)
+            graph = cls.from_records(iter_json_object(file_path, progress))
             print(f"Graph loaded from {file_path}.")
-            return cls.from_dict(data)
+            return graph
         except FileNotFoundError:
             print(f"No file found at {file_path}, starting with an empty graph.")
             return cls()
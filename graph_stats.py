@@ -0,0 +1,271 @@
+"""Running statistics for the 'info average' and 'stats' commands, kept up to date as the graph changes."""
+
+from collections import Counter
+from datetime import MAXYEAR, MINYEAR, date, timedelta
+from dates import parse_birthdate
+
+DAYS_PER_YEAR = 365.25
+ONE_DAY = timedelta(days=1)
+
+
+class GraphStatistics:
+    """
+    Graph listener that keeps running counts and sums so averages come back in O(1).
+
+    Children per person are kept as a histogram of child counts, and birthdates in a BirthdateCounts, which is enough
+    to answer medians and distributions without visiting every person.
+    """
+
+    def __init__(self, graph):
+        self.people = 0
+        self.total_children = 0
+        self.child_counts = Counter()
+        self.birth_ordinal_sum = 0
+
+        # Count everything first, so the birthdate counts are built in one pass rather than one insert per person.
+        birthdates = []
+        for node in graph.nodes.values():
+            self.people += 1
+            self.total_children += len(node.children)
+            self.child_counts[len(node.children)] += 1
+            parsed = parse_birthdate(node.birthdate)
+            if parsed is not None:
+                birthdates.append(parsed)
+                self.birth_ordinal_sum += parsed.toordinal()
+        self.birthdates = BirthdateCounts(birthdates)
+
+    def _add_birthdate(self, birthdate):
+        parsed = parse_birthdate(birthdate)
+        if parsed is None:
+            return
+        self.birthdates.add(parsed)
+        self.birth_ordinal_sum += parsed.toordinal()
+
+    def _remove_birthdate(self, birthdate):
+        parsed = parse_birthdate(birthdate)
+        if parsed is None:
+            return
+        self.birthdates.remove(parsed)
+        self.birth_ordinal_sum -= parsed.toordinal()
+
+    def _move_child_count(self, old_count, new_count):
+        self.child_counts[old_count] -= 1
+        if not self.child_counts[old_count]:
+            del self.child_counts[old_count]
+        self.child_counts[new_count] += 1
+
+    def _gain_child(self, parent):
+        # Events arrive after the edge is added, so the parent already has the new child.
+        count = len(parent.children)
+        self._move_child_count(count - 1, count)
+        self.total_children += 1
+
+    def on_add_node(self, node):
+        self.people += 1
+        self.child_counts[len(node.children)] += 1
+        self._add_birthdate(node.birthdate)
+
+    def on_remove_node(self, node):
+        self.people -= 1
+        self.total_children -= len(node.children)
+        self.child_counts[len(node.children)] -= 1
+        if not self.child_counts[len(node.children)]:
+            del self.child_counts[len(node.children)]
+        self._remove_birthdate(node.birthdate)
+
+        # Each of the node's parents is about to lose a child.
+        for parent in node.parents:
+            count = len(parent.children)
+            self._move_child_count(count, count - 1)
+            self.total_children -= 1
+
+    def on_set_parents(self, node, parent1, parent2):
+        self._gain_child(parent1)
+        self._gain_child(parent2)
+
+    def on_add_child(self, node, child):
+        self._gain_child(node)
+
+    def on_set_info(self, node, attribute, old_value, new_value):
+        if attribute == "birthdate":
+            self._remove_birthdate(old_value)
+            self._add_birthdate(new_value)
+
+    @property
+    def births(self):
+        """The number of people with a valid birthdate."""
+
+        return len(self.birthdates)
+
+    def average_children(self):
+        """Returns the average number of children per person, or None for an empty graph."""
+
+        return self.total_children / self.people if self.people else None
+
+    def median_children(self):
+        """Returns the median number of children per person, or None for an empty graph."""
+
+        if not self.people:
+            return None
+        return _histogram_median(self.child_counts, self.people)
+
+    def average_age(self, today=None):
+        """Returns the average age in years of people with a birthdate, or None if nobody has one."""
+
+        if not self.births:
+            return None
+        today = today or date.today()
+        return (today.toordinal() - self.birth_ordinal_sum / self.births) / DAYS_PER_YEAR
+
+    def median_age(self, today=None):
+        """Returns the median age in years of people with a birthdate, or None if nobody has one."""
+
+        if not self.births:
+            return None
+        today = today or date.today()
+        birthdates = self.birthdates
+        middle = len(birthdates) // 2
+        if len(birthdates) % 2:
+            median_ordinal = birthdates.nth(middle)
+        else:
+            median_ordinal = (birthdates.nth(middle - 1) + birthdates.nth(middle)) / 2
+        return (today.toordinal() - median_ordinal) / DAYS_PER_YEAR
+
+    def age_histogram(self, band=10, today=None):
+        """
+        Counts people with a birthdate by age band.
+
+        Args:
+            band (int): The width of each band in years.
+            today (datetime.date): Optionally, the day to measure ages on. Defaults to the current date.
+
+        Returns:
+            histogram (list): (lowest age, count) pairs, youngest band first.
+        """
+
+        if not self.births:
+            return []
+        today = today or date.today()
+        histogram = []
+
+        # Each band is a range of birthdates, so its count is the difference between two counts of earlier births. A
+        # band reaching back before year 1 holds everyone left.
+        upper = len(self.birthdates)
+        age = 0
+        while upper:
+            cutoff = _years_before(today, age + band)
+            lower = self.birthdates.count_before(cutoff + ONE_DAY) if cutoff else 0
+            histogram.append((age, upper - lower))
+            upper = lower
+            age += band
+        return histogram
+
+
+class BirthdateCounts:
+    """
+    Multiset of birthdates that can count the dates before a day and find the nth earliest in O(log years).
+
+    A Fenwick tree holds the number of births in each year from 1 to MAXYEAR, and each year keeps a Counter of the day
+    ordinals in it. Counting or finding a date walks the tree to the right year, then at most one year's days.
+    """
+
+    def __init__(self, birthdates=()):
+        self.size = 0
+        self.days = {}
+        counts = [0] * (MAXYEAR + 1)
+        for birthdate in birthdates:
+            counts[birthdate.year] += 1
+            self.days.setdefault(birthdate.year, Counter())[birthdate.toordinal()] += 1
+            self.size += 1
+
+        # Building the Fenwick tree from the finished counts is linear, where adding one birth at a time isn't.
+        self.tree = counts
+        for year in range(1, MAXYEAR + 1):
+            parent = year + (year & -year)
+            if parent <= MAXYEAR:
+                self.tree[parent] += self.tree[year]
+
+    def __len__(self):
+        return self.size
+
+    def _update(self, year, change):
+        while year <= MAXYEAR:
+            self.tree[year] += change
+            year += year & -year
+
+    def _before_year(self, year):
+        # The number of births in the years before year.
+        total = 0
+        year -= 1
+        while year > 0:
+            total += self.tree[year]
+            year -= year & -year
+        return total
+
+    def add(self, birthdate):
+        """Adds a birthdate."""
+
+        self.days.setdefault(birthdate.year, Counter())[birthdate.toordinal()] += 1
+        self._update(birthdate.year, 1)
+        self.size += 1
+
+    def remove(self, birthdate):
+        """Removes one copy of a birthdate that was added."""
+
+        days = self.days[birthdate.year]
+        ordinal = birthdate.toordinal()
+        days[ordinal] -= 1
+        if not days[ordinal]:
+            del days[ordinal]
+            if not days:
+                del self.days[birthdate.year]
+        self._update(birthdate.year, -1)
+        self.size -= 1
+
+    def count_before(self, day):
+        """Returns the number of birthdates before a day."""
+
+        ordinal = day.toordinal()
+        days = self.days.get(day.year, {})
+        return self._before_year(day.year) + sum(count for other, count in days.items() if other < ordinal)
+
+    def nth(self, n):
+        """Returns the day ordinal of the nth earliest birthdate, counting from 0."""
+
+        # Walk down the Fenwick tree to the last year with no more than n births before the end of it.
+        year = 0
+        step = 1 << MAXYEAR.bit_length()
+        while step:
+            if year + step <= MAXYEAR and self.tree[year + step] <= n:
+                year += step
+                n -= self.tree[year]
+            step >>= 1
+
+        # The birthdate is in the year after that one.
+        for ordinal, count in sorted(self.days[year + 1].items()):
+            if n < count:
+                return ordinal
+            n -= count
+
+
+def _histogram_median(histogram, total):
+    middle = total // 2
+    seen = 0
+    below = None
+    for value in sorted(histogram):
+        seen += histogram[value]
+        if total % 2 == 0 and below is None and seen >= middle:
+            below = value
+        if seen > middle:
+            return value if total % 2 else (below + value) / 2
+
+
+def _years_before(day, years):
+    # Returns None if that's before year 1, which no date can be.
+    if day.year - years < MINYEAR:
+        return None
+    try:
+        return day.replace(year=day.year - years)
+    except ValueError:
+        # 29th February in a year that isn't a leap year.
+        return day.replace(year=day.year - years, day=28)
@@ -0,0 +1,88 @@
+"""Bulk import of people from CSV and JSON-lines files for the 'import' command."""
+
+import csv
+import json
+import os
+
+CSV_COLUMNS = ("name", "gender", "birthdate", "parent1", "parent2", "spouse")
+
+
+def iter_csv(file_path):
+    """
+    Streams person records from a CSV file with a header row.
+
+    Recognised columns are name, gender, birthdate, parent1, parent2 and spouse. Only name is required and empty cells
+    are treated as missing.
+
+    Yields:
+        record (dict): A record with name, gender, birthdate, parents (list) and spouse keys.
+    """
+
+    with open(file_path, 'r', newline='') as f:
+        for row in csv.DictReader(f):
+            yield {
+                "name": row["name"],
+                "gender": row.get("gender") or None,
+                "birthdate": row.get("birthdate") or None,
+                "parents": [name for name in (row.get("parent1"), row.get("parent2")) if name],
+                "spouse": row.get("spouse") or None,
+            }
+
+
+def iter_jsonl(file_path):
+    """
+    Streams person records from a JSON-lines file, one object per line.
+
+    Each object needs a "name" and may have "gender", "birthdate", "parents" (a list of names) and "spouse".
+
+    Yields:
+        record (dict): The decoded object.
+    """
+
+    with open(file_path, 'r') as f:
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+
+
+def import_file(graph, file_path):
+    """
+    Imports every person in a CSV or JSON-lines file into a graph.
+
+    People are added as the file streams past, and their relations are collected as name tuples and wired up in one
+    batch at the end, so records may refer to people further down the file.
+
+    Args:
+        graph (Graph): The graph to import into.
+        file_path (str): A .csv file, or a .jsonl/.ndjson file.
+
+    Returns:
+        (added, duplicates, linked, failed) (tuple): The counts and lists returned by Graph.add_nodes_bulk and
+        Graph.add_relations_bulk.
+    """
+
+    extension = os.path.splitext(file_path)[1].lower()
+    if extension == ".csv":
+        records = iter_csv(file_path)
+    elif extension in (".jsonl", ".ndjson"):
+        records = iter_jsonl(file_path)
+    else:
+        raise ValueError(f"Can't import {extension or 'files without an extension'}, use .csv or .jsonl.")
+
+    relations = []
+
+    def collect_relations(records):
+        for record in records:
+            name = record["name"]
+            if spouse := record.get("spouse"):
+                relations.append(("spouse", name, spouse))
+            parents = record.get("parents") or []
+            if len(parents) == 2:
+                relations.append(("parents", name, tuple(parents)))
+            else:
+                relations.extend(("child", parent, name) for parent in parents)
+            yield record
+
+    added, duplicates = graph.add_nodes_bulk(collect_relations(records))
+    linked, failed = graph.add_relations_bulk(relations)
+    return added, duplicates, linked, failed
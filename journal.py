@@ -0,0 +1,117 @@
+"""Append-only change journal kept next to a saved graph."""
+
+import json
+import os
+
+
+def journal_path(snapshot_path):
+    """Returns the path of the journal that belongs to a snapshot."""
+
+    return f"{snapshot_path}.journal"
+
+
+class Journal:
+    """
+    Graph listener that records every change as one json line.
+
+    Changes are kept in memory until flush() appends them to the journal file, so saving costs the size of the
+    changes rather than the size of the tree.
+    """
+
+    def __init__(self, snapshot_path):
+        self.snapshot_path = snapshot_path
+        self.path = journal_path(snapshot_path)
+        self.pending = []
+
+    def on_add_node(self, node):
+        self.pending.append({"op": "add_node", "name": node.name, "gender": node.gender,
+                             "birthdate": node.birthdate})
+
+    def on_remove_node(self, node):
+        self.pending.append({"op": "remove_node", "name": node.name})
+
+    def on_set_parents(self, node, parent1, parent2):
+        self.pending.append({"op": "set_parents", "name": node.name, "parents": [parent1.name, parent2.name]})
+
+    def on_add_child(self, node, child):
+        self.pending.append({"op": "add_child", "name": node.name, "child": child.name})
+
+    def on_set_spouse(self, node, spouse):
+        self.pending.append({"op": "set_spouse", "name": node.name, "spouse": spouse.name})
+
+    def on_set_info(self, node, attribute, old_value, new_value):
+        # A rename has already happened, so the entry has to refer to the node by its old name.
+        name = old_value if attribute == "name" else node.name
+        self.pending.append({"op": "set_info", "name": name, "attribute": attribute, "value": new_value})
+
+    def flush(self):
+        """
+        Appends the pending changes to the journal file.
+
+        Returns:
+            count (int): The number of changes written.
+        """
+
+        count = len(self.pending)
+        if count:
+            with open(self.path, 'a') as f:
+                f.writelines(json.dumps(entry) + "\n" for entry in self.pending)
+            self.pending = []
+        return count
+
+    def truncate(self):
+        """Empties the journal, for when its changes have been folded into a fresh snapshot."""
+
+        self.pending = []
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+
+def replay(graph, path):
+    """
+    Applies the changes in a journal file to a graph.
+
+    A torn final line, left by a crash part way through an append, is ignored.
+
+    Args:
+        graph (Graph): The graph loaded from the journal's snapshot.
+        path (str): The path to the journal file.
+
+    Returns:
+        count (int): The number of changes applied.
+    """
+
+    count = 0
+    with open(path, 'r') as f:
+        for line in f:
+            try:
+                entry = json.loads(line)
+            except json.JSONDecodeError:
+                print(f"Ignoring incomplete journal entry in {path}.")
+                break
+            apply_entry(graph, entry)
+            count += 1
+    return count
+
+
+def apply_entry(graph, entry):
+    """Applies one journal entry to a graph through its mutation methods."""
+
+    op = entry["op"]
+    if op == "add_node":
+        graph.add_node(entry["name"], entry["gender"], entry["birthdate"])
+        return
+    if op == "remove_node":
+        graph.remove_node(entry["name"])
+        return
+
+    node = graph.get_node(entry["name"])
+    if op == "set_parents":
+        parent1, parent2 = (graph.get_node(name) for name in entry["parents"])
+        graph.set_parents(node, parent1, parent2)
+    elif op == "add_child":
+        graph.add_child(node, graph.get_node(entry["child"]))
+    elif op == "set_spouse":
+        graph.set_spouse(node, graph.get_node(entry["spouse"]))
+    elif op == "set_info":
+        graph.set_info(node, entry["attribute"], entry["value"])
@@ -0,0 +1,134 @@
+"""Incremental reader for large json files made of one top-level object."""
+
+import codecs
+import json
+import os
+import sys
+
+CHUNK_SIZE = 1 << 20
+PROGRESS_THRESHOLD = 64 * (1 << 20)
+WHITESPACE = " \t\n\r"
+
+
+def iter_json_object(file_path, progress=None, chunk_size=CHUNK_SIZE):
+    """
+    Lazily yields the (key, value) pairs of the top-level object in a json file.
+
+    Only the current chunk of the file and the value being decoded are held in memory, so the whole file is never
+    parsed at once.
+
+    Args:
+        file_path (str): The path to the json file.
+        progress (callable): Optionally, called as progress(bytes_read, total_bytes) after each chunk is read.
+        chunk_size (int): The number of bytes to read at a time.
+
+    Yields:
+        (key, value) (tuple): Each member of the top-level object, in file order.
+
+    Raises:
+        json.JSONDecodeError: If the file isn't a json object.
+    """
+
+    total_bytes = os.path.getsize(file_path)
+    decoder = json.JSONDecoder()
+
+    with open(file_path, 'rb') as f:
+        reader = _ChunkReader(f, chunk_size, total_bytes, progress)
+
+        reader.expect("{")
+        if reader.peek() == "}":
+            return
+
+        while True:
+            key = reader.decode(decoder)
+            if not isinstance(key, str):
+                raise json.JSONDecodeError("Expecting property name enclosed in double quotes", reader.buffer,
+                                           reader.pos)
+            reader.expect(":")
+            value = reader.decode(decoder)
+            yield key, value
+
+            separator = reader.peek()
+            reader.pos += 1
+            if separator == "}":
+                return
+            if separator != ",":
+                raise json.JSONDecodeError("Expecting ',' delimiter", reader.buffer, reader.pos - 1)
+
+
+class _ChunkReader:
+    """Keeps a sliding window of decoded text over a binary file."""
+
+    def __init__(self, f, chunk_size, total_bytes, progress):
+        self.f = f
+        self.chunk_size = chunk_size
+        self.total_bytes = total_bytes
+        self.progress = progress
+        self.decoder = codecs.getincrementaldecoder('utf-8')()
+        self.bytes_read = 0
+        self.buffer = ""
+        self.pos = 0
+        self.eof = False
+
+    def read_more(self):
+        """Appends the next chunk of the file to the buffer, dropping text that has already been consumed."""
+
+        chunk = self.f.read(self.chunk_size)
+        self.bytes_read += len(chunk)
+        self.eof = not chunk
+        self.buffer = self.buffer[self.pos:] + self.decoder.decode(chunk, final=self.eof)
+        self.pos = 0
+        if self.progress:
+            self.progress(self.bytes_read, self.total_bytes)
+
+    def peek(self):
+        """Skips whitespace and returns the next character without consuming it."""
+
+        while True:
+            while self.pos < len(self.buffer) and self.buffer[self.pos] in WHITESPACE:
+                self.pos += 1
+            if self.pos < len(self.buffer):
+                return self.buffer[self.pos]
+            if self.eof:
+                raise json.JSONDecodeError("Unexpected end of file", self.buffer, self.pos)
+            self.read_more()
+
+    def expect(self, char):
+        """Consumes the next non-whitespace character, which must be char."""
+
+        if self.peek() != char:
+            raise json.JSONDecodeError(f"Expecting '{char}'", self.buffer, self.pos)
+        self.pos += 1
+
+    def decode(self, decoder):
+        """Decodes the next json value, reading more of the file until the value is complete."""
+
+        self.peek()
+        while True:
+            try:
+                value, end = decoder.raw_decode(self.buffer, self.pos)
+            except json.JSONDecodeError:
+                if self.eof:
+                    raise
+                self.read_more()
+                continue
+
+            # A bare number touching the end of the buffer may continue in the next chunk.
+            if end == len(self.buffer) and not self.eof:
+                self.read_more()
+                continue
+
+            self.pos = end
+            return value
+
+
+def print_progress(bytes_read, total_bytes):
+    """Progress callback that reports the percentage of the file read, for files large enough to notice."""
+
+    if total_bytes < PROGRESS_THRESHOLD:
+        return
+    percent = 100 * bytes_read // total_bytes if total_bytes else 100
+    sys.stdout.write(f"\rLoading... {percent}% ({bytes_read // (1 << 20)} of {total_bytes // (1 << 20)} MB)")
+    if bytes_read >= total_bytes:
+        sys.stdout.write("\n")
+    sys.stdout.flush()
@@ -0,0 +1,388 @@
+"""Names the relationship between any two people from their lowest common ancestors."""
+
+from array import array
+
+
+class KinshipIndex:
+    """
+    Graph listener that finds lowest common ancestors by binary lifting.
+
+    With two parents per person the ancestry is a DAG rather than a tree, so there's no single parent pointer to lift
+    along. The index works on a different graph instead: each person is joined to their birth family (the set of
+    their parents), and each birth family to each of its parents. Unless there's pedigree collapse, or two families
+    intermarry more than once, that graph is a tree. Then a blood relationship is the one path between the two
+    people: up through birth families to the lowest common ancestor, then back down. A family that is the top of the
+    path means its parents are the common ancestors; a person at the top is a lone common ancestor.
+
+    The index roots every tree in a depth-first walk and keeps binary lifting jumps plus running counts along each
+    path to the root: moves up and down a generation, and places where the path turns from going down to going up.
+    The path between two people goes through their LCA in the walk's tree, so checking it and counting its
+    generations takes a few subtractions, and each query takes O(log n).
+
+    The walk also finds which edges lie on a loop in the joined graph, as those are the ones that aren't bridges.
+    Queries whose path uses one fall back to searching up from both people a generation at a time until the closest
+    shared ancestors are found.
+
+    Adding a person labels them on their own. Any other change to the relations marks the index stale, and it is
+    rebuilt the next time it's queried.
+    """
+
+    def __init__(self, graph):
+        self.graph = graph
+        self.stale = True
+
+    def _mark_stale(self, *args):
+        self.stale = True
+
+    def on_add_node(self, node):
+        # A new person has no parents or children yet, so they're a tree of their own.
+        if not self.stale:
+            self._add_root(node)
+
+    on_remove_node = _mark_stale
+    on_set_parents = _mark_stale
+    on_add_child = _mark_stale
+
+    def _ensure_built(self):
+        if self.stale:
+            self.build()
+
+    def build(self):
+        """Rebuilds the joined graph and its labels from the graph's current nodes."""
+
+        # People and birth families share one range of ids, people first. Families are keyed by their set of parents.
+        self.ids = {}
+        self.labels = []
+        for node in self.graph.nodes.values():
+            self.ids[node] = len(self.labels)
+            self.labels.append(node)
+
+        families = {}
+        edges = [[] for _ in self.labels]
+        for node, person_id in list(self.ids.items()):
+            parents = [parent for parent in node.parents if parent in self.ids]
+            if not parents:
+                continue
+            key = frozenset(parents)
+            family_id = families.get(key)
+            if family_id is None:
+                family_id = families[key] = len(self.labels)
+                self.labels.append(parents)
+                edges.append([])
+                for parent in parents:
+                    _join(edges, family_id, self.ids[parent], birth=False)
+            _join(edges, person_id, family_id, birth=True)
+
+        self._walk(edges)
+
+        # jumps[k][i] is the 2 ** k-th ancestor of i in the walk's tree, or the root if it is nearer.
+        self.jumps = [self.parent]
+        while 1 << len(self.jumps) <= max(self.depth, default=0):
+            previous = self.jumps[-1]
+            self.jumps.append(array('i', (previous[previous[i]] for i in range(len(previous)))))
+        self.stale = False
+
+    def _walk(self, edges):
+        # Iterative depth-first walk of the joined graph, finding bridges by Tarjan's low-link method. The running
+        # counts are filled in as each id is reached, apart from loops, which has to wait for low-links.
+        count = len(self.labels)
+        self.parent = array('i', range(count))
+        self.root = array('i', range(count))
+        self.depth = array('i', [0]) * count
+        self.rising = bytearray(count)
+        self.falls = array('i', [0]) * count
+        self.turns = array('i', [0]) * count
+        self.births_up = array('i', [0]) * count
+        self.births_down = array('i', [0]) * count
+        self.loops = array('i', [0]) * count
+
+        found = array('i', [-1]) * count
+        low = array('i', [0]) * count
+        bridge = bytearray(count)
+        order = []
+        for root in range(count):
+            if found[root] != -1:
+                continue
+            found[root] = low[root] = len(order)
+            order.append(root)
+            stack = [(root, iter(edges[root]), None)]
+            while stack:
+                node, relatives, entered_by = stack[-1]
+                for relative, edge, rising, birth in relatives:
+                    if edge is entered_by:
+                        continue
+                    if found[relative] == -1:
+                        found[relative] = low[relative] = len(order)
+                        order.append(relative)
+                        self._label(relative, node, not rising, birth)
+                        stack.append((relative, iter(edges[relative]), edge))
+                        break
+                    low[node] = min(low[node], found[relative])
+                else:
+                    stack.pop()
+                    if stack:
+                        parent = stack[-1][0]
+                        low[parent] = min(low[parent], low[node])
+                        bridge[node] = low[node] > found[parent]
+
+        for node in order:
+            parent = self.parent[node]
+            if parent != node:
+                self.loops[node] = self.loops[parent] + (not bridge[node])
+
+    def _label(self, node, parent, rising, birth):
+        # rising is whether the move from node back to its parent in the walk goes up a generation.
+        self.parent[node] = parent
+        self.root[node] = self.root[parent]
+        self.depth[node] = self.depth[parent] + 1
+        self.rising[node] = rising
+        self.falls[node] = self.falls[parent] + (not rising)
+        self.turns[node] = self.turns[parent] + (not rising and self.rising[parent])
+        self.births_up[node] = self.births_up[parent] + (rising and birth)
+        self.births_down[node] = self.births_down[parent] + (not rising and birth)
+
+    def _add_root(self, node):
+        node_id = self.ids[node] = len(self.labels)
+        self.labels.append(node)
+        # jumps[0] is the parent column itself.
+        for column in (self.parent, self.root, *self.jumps[1:]):
+            column.append(node_id)
+        for column in (self.depth, self.falls, self.turns, self.births_up, self.births_down, self.loops):
+            column.append(0)
+        self.rising.append(0)
+
+    def _lift(self, node, depth):
+        # Climbs to the ancestor at the given depth in the walk's tree.
+        for k in range(len(self.jumps) - 1, -1, -1):
+            if self.depth[node] - (1 << k) >= depth:
+                node = self.jumps[k][node]
+        return node
+
+    def _lca(self, node, other):
+        if self.depth[node] < self.depth[other]:
+            node, other = other, node
+        node = self._lift(node, self.depth[other])
+        if node == other:
+            return node
+        for jumps in reversed(self.jumps):
+            if jumps[node] != jumps[other]:
+                node, other = jumps[node], jumps[other]
+        return self.parent[node]
+
+    def _top(self, node, depth):
+        # Climbs as far as the given depth while every move is up a generation.
+        falls = self.falls[node]
+        for k in range(len(self.jumps) - 1, -1, -1):
+            jump = self.jumps[k][node]
+            if self.depth[node] - (1 << k) >= depth and self.falls[jump] == falls:
+                node = jump
+        return node
+
+    def lowest_common_ancestors(self, node, other):
+        """
+        Finds the closest ancestors the two nodes share.
+
+        Args:
+            node (Node): The first node.
+            other (Node): The second node.
+
+        Returns:
+            (ancestors, up, down) (tuple): The list of lowest common ancestors, the generations from node up to them and
+            the generations from other up to them, or None if the two aren't blood relatives.
+        """
+
+        self._ensure_built()
+        x, y = self.ids[node], self.ids[other]
+        if self.root[x] != self.root[y]:
+            return None
+        lca = self._lca(x, y)
+        if self.loops[x] + self.loops[y] != 2 * self.loops[lca]:
+            return _intersect_ancestors(node, other)
+
+        # The path runs from x up the walk's tree to lca, then down to y. Moves on y's side run the other way, so a
+        # move that is up towards the root is down along the path. A blood relationship goes up, then only down.
+        turns = 0
+        x_side = y_side = None
+        if x != lca:
+            x_side = self._lift(x, self.depth[lca] + 1)
+            turns += self.turns[x] - self.turns[x_side]
+        if y != lca:
+            y_side = self._lift(y, self.depth[lca] + 1)
+            turns += self.turns[y] - self.turns[y_side]
+        if x_side is not None and y_side is not None:
+            turns += not self.rising[x_side] and not self.rising[y_side]
+        if turns:
+            return None
+
+        up = self.births_up[x] - self.births_up[lca] + self.births_down[y] - self.births_down[lca]
+        down = self.births_down[x] - self.births_down[lca] + self.births_up[y] - self.births_up[lca]
+        top = self._top(x, self.depth[lca])
+        if top == lca:
+            top = self._top(y, self.depth[lca])
+        # A family's label is the list of its parents.
+        label = self.labels[top]
+        return (list(label) if isinstance(label, list) else [label]), up, down
+
+    def relationship(self, node, other):
+        """
+        Names what other is to node, e.g. "mother", "2nd cousin once removed" or "great-great-aunt".
+
+        Args:
+            node (Node): The person the relationship is relative to.
+            other (Node): The person whose relationship is named.
+
+        Returns:
+            str: The relationship, or None if the two aren't related by blood or marriage.
+        """
+
+        if node == other:
+            return "self"
+        if other == node.spouse:
+            return gendered(other, "husband", "wife", "spouse")
+
+        if blood := self.blood_relationship(node, other):
+            return blood
+
+        # Fall back to relationships by marriage, through either person's spouse.
+        if node.spouse and (blood := self.blood_relationship(node.spouse, other)):
+            return f"spouse's {blood}"
+        if other.spouse and (blood := self.blood_relationship(node, other.spouse)):
+            return f"{blood}'s spouse"
+        return None
+
+    def blood_relationship(self, node, other):
+        """Names what other is to node by descent alone, or returns None if they share no ancestor."""
+
+        found = self.lowest_common_ancestors(node, other)
+        if found is None:
+            return None
+        ancestors, up, down = found
+
+        # Siblings and cousins through only one shared ancestor are half relations.
+        half = "half-" if up and down and len(ancestors) == 1 else ""
+        return describe(other, up, down, half)
+
+
+def _join(edges, node, other, birth):
+    # Each edge is listed at both ends as (relative, edge, rising, birth), where rising is whether the move from the
+    # end it's listed at to the relative goes up a generation: from a child to their birth family, or from a birth
+    # family to a parent. The shared tuple identifies the edge, so the walk can tell it apart from a parallel one.
+    edge = (node, other)
+    edges[node].append((other, edge, True, birth))
+    edges[other].append((node, edge, False, birth))
+
+
+def _intersect_ancestors(node, other):
+    # Loops mean there's more than one path between the two, so search up from both a generation at a time. Once
+    # both searches are g generations up, every shared ancestor within g generations of both has been seen, and any
+    # other is more than g generations from one of them, so the search stops when the closest is no further than g.
+    maps = ({node: 0}, {other: 0})
+    reached = ([node], [other])
+    shared = {}
+    generation = 0
+    while True:
+        for side, people in enumerate(reached):
+            shared.update((ancestor, None) for ancestor in people if ancestor in maps[1 - side])
+        found = _closest(shared, *maps)
+        if found and found[1] + found[2] <= generation or not any(reached):
+            return found
+
+        generation += 1
+        next_reached = ([], [])
+        for side, people in enumerate(reached):
+            for current in people:
+                for parent in current.parents:
+                    if parent not in maps[side]:
+                        maps[side][parent] = generation
+                        next_reached[side].append(parent)
+        reached = next_reached
+
+
+def _closest(shared, node_map, other_map):
+    # The closest ancestors have the fewest generations between the two people, then the fewest on the longer side.
+    # Of two that tie, such as 2 up and 1 down or 1 up and 2 down, the one fewer generations up from node wins.
+    best = None
+    lowest = []
+    for ancestor in shared:
+        up, down = node_map[ancestor], other_map[ancestor]
+        key = (up + down, max(up, down), up)
+        if best is None or key < best:
+            best = key
+            lowest = [(ancestor, up, down)]
+        elif key == best:
+            lowest.append((ancestor, up, down))
+
+    if not lowest:
+        return None
+    _, up, down = lowest[0]
+    return [ancestor for ancestor, _, _ in lowest], up, down
+
+
+def describe(other, up, down, half=""):
+    """
+    Names a blood relationship from the generations between each person and their lowest common ancestor.
+
+    Args:
+        other (Node): The person whose relationship is named, used for gendered terms.
+        up (int): Generations from the reference person up to the common ancestor.
+        down (int): Generations from other up to the common ancestor.
+        half (str): "half-" if the two share only one of a couple of ancestors.
+
+    Returns:
+        str: The relationship.
+    """
+
+    if up == 0:
+        return _lineal(other, down, "son", "daughter", "child")
+    if down == 0:
+        return _lineal(other, up, "father", "mother", "parent")
+
+    if up == 1 and down == 1:
+        return half + gendered(other, "brother", "sister", "sibling")
+    if up == 1:
+        return _collateral(down - 2, gendered(other, "nephew", "niece", "nibling"), half)
+    if down == 1:
+        return _collateral(up - 2, gendered(other, "uncle", "aunt", "pibling"), half)
+
+    degree = min(up, down) - 1
+    removed = abs(up - down)
+    name = f"{half}{ordinal(degree)} cousin"
+    if removed == 1:
+        name += " once removed"
+    elif removed == 2:
+        name += " twice removed"
+    elif removed > 2:
+        name += f" {removed} times removed"
+    return name
+
+
+def _lineal(other, generations, male, female, neutral):
+    term = gendered(other, male, female, neutral)
+    if generations == 1:
+        return term
+    return "great-" * (generations - 2) + "grand" + term
+
+
+def _collateral(greats, term, half):
+    return "great-" * greats + half + term
+
+
+def gendered(node, male, female, neutral):
+    """Picks the gendered term for a node, falling back to the neutral one if its gender isn't known."""
+
+    gender = (node.gender or "").lower()
+    if gender in ("m", "male", "man", "boy"):
+        return male
+    if gender in ("f", "female", "woman", "girl"):
+        return female
+    return neutral
+
+
+def ordinal(number):
+    """Formats a number as an ordinal: 1st, 2nd, 3rd, 4th, 11th and so on."""
+
+    if 10 <= number % 100 <= 20:
+        suffix = "th"
+    else:
+        suffix = {1: "st", 2: "nd", 3: "rd"}.get(number % 10, "th")
+    return f"{number}{suffix}"
@@ -0,0 +1,205 @@
+"""Prefix and typo-tolerant name lookups for 'select', 'find' and tab completion."""
+
+from bisect import bisect_left
+from collections import Counter
+from itertools import chain
+
+
+class NameIndex:
+    """
+    Graph listener that indexes every name for prefix and fuzzy search.
+
+    Prefix search binary searches a sorted list of case-folded names. Fuzzy search works a word at a time: every
+    distinct word used in a name is indexed by its trigrams, and a word within k typos of the query must share all but
+    3k of the query's trigrams. Counting shared trigrams narrows the vocabulary down to a handful of candidates before
+    any edit distance is computed, and the people using the matching words are then intersected. Names share far
+    fewer distinct words than there are people, which keeps both steps small.
+
+    Names added or removed after the index is built are held back in added and removed, and merged into the sorted
+    list with a single sort the next time a prefix search needs it, so a bulk insert isn't one list insertion per
+    name.
+    """
+
+    def __init__(self, graph):
+        self.postings = {}
+        self.grams = {}
+        self.added = []
+        self.removed = Counter()
+
+        people = sorted((name.casefold(), name) for name in graph.nodes)
+        self.keys = [key for key, _ in people]
+        self.names = [name for _, name in people]
+        for name in self.names:
+            self._add_words(name)
+
+    def _add(self, name):
+        self.added.append((name.casefold(), name))
+        self._add_words(name)
+
+    def _remove(self, name):
+        self.removed[name] += 1
+
+        for word in set(name.casefold().split()):
+            people = self.postings[word]
+            people.discard(name)
+            if not people:
+                del self.postings[word]
+                for gram in _trigrams(word):
+                    self.grams[gram].discard(word)
+
+    def _merge(self):
+        # Fold the held back changes into the sorted list. The list is already sorted, so the sort is close to linear.
+        if not self.added and not self.removed:
+            return
+        people = list(zip(self.keys, self.names)) + self.added
+        people.sort()
+        removed = self.removed
+        kept = []
+        for person in people:
+            if removed[person[1]]:
+                removed[person[1]] -= 1
+            else:
+                kept.append(person)
+        self.keys = [key for key, _ in kept]
+        self.names = [name for _, name in kept]
+        self.added = []
+        self.removed = Counter()
+
+    def _add_words(self, name):
+        for word in name.casefold().split():
+            if word not in self.postings:
+                self.postings[word] = set()
+                for gram in _trigrams(word):
+                    self.grams.setdefault(gram, set()).add(word)
+            self.postings[word].add(name)
+
+    def on_add_node(self, node):
+        self._add(node.name)
+
+    def on_remove_node(self, node):
+        self._remove(node.name)
+
+    def on_set_info(self, node, attribute, old_value, new_value):
+        if attribute == "name":
+            self._remove(old_value)
+            self._add(new_value)
+
+    def prefix(self, text, limit=None):
+        """
+        Finds names that start with text, ignoring case.
+
+        Args:
+            text (str): The start of a name.
+            limit (int): Optionally, the most names to return.
+
+        Returns:
+            names (list): The matching names in alphabetical order.
+        """
+
+        self._merge()
+        key = text.casefold()
+        position = bisect_left(self.keys, key)
+        end = len(self.keys) if limit is None else min(position + limit, len(self.keys))
+        names = []
+        while position < end and self.keys[position].startswith(key):
+            names.append(self.names[position])
+            position += 1
+        return names
+
+    def similar_words(self, word):
+        """
+        Finds the indexed words within a few typos of word: one for words of up to five letters, two for longer words.
+
+        Returns:
+            words (dict): Each similar word mapped to its edit distance from word.
+        """
+
+        tolerance = _tolerance(word)
+        if not tolerance:
+            return {word: 0} if word in self.postings else {}
+
+        # Each edit breaks at most three of the padded trigrams.
+        grams = _trigrams(word)
+        needed = len(grams) - 3 * tolerance
+        shared = Counter(chain.from_iterable(self.grams.get(gram, ()) for gram in grams))
+
+        similar = {}
+        for candidate, count in shared.items():
+            if count >= needed and abs(len(candidate) - len(word)) <= tolerance:
+                distance = edit_distance(word, candidate, tolerance)
+                if distance <= tolerance:
+                    similar[candidate] = distance
+        return similar
+
+    def fuzzy(self, text, limit=10):
+        """
+        Finds names with a similar spelling to text, ignoring case.
+
+        Every word of text has to match a word of the name, allowing for a few typos in each.
+
+        Args:
+            text (str): The name to search for.
+            limit (int): The most names to return.
+
+        Returns:
+            names (list): The closest names first.
+        """
+
+        matches = []
+        for word in text.casefold().split():
+            people = {}
+            for match, distance in self.similar_words(word).items():
+                for name in self.postings[match]:
+                    if distance < people.get(name, distance + 1):
+                        people[name] = distance
+            if not people:
+                return []
+            matches.append(people)
+        if not matches:
+            return []
+
+        # Intersect from the rarest word outwards, so the candidate set is small from the start.
+        matches.sort(key=len)
+        scores = matches[0]
+        for people in matches[1:]:
+            scores = {name: score + people[name] for name, score in scores.items() if name in people}
+        return sorted(scores, key=lambda name: (scores[name], name))[:limit]
+
+    def suggest(self, text, limit=5):
+        """Returns names starting with text, or failing that names spelt like it, for "did you mean" hints."""
+
+        return self.prefix(text, limit) or self.fuzzy(text, limit)
+
+
+def _tolerance(word):
+    if len(word) <= 2:
+        return 0
+    return 1 if len(word) <= 5 else 2
+
+
+def _trigrams(word):
+    padded = f"^^{word}$$"
+    return [padded[i:i + 3] for i in range(len(padded) - 2)]
+
+
+def edit_distance(a, b, limit=None):
+    """
+    Returns the Levenshtein distance between two strings: the fewest insertions, deletions and substitutions.
+
+    Args:
+        a (str): The first string.
+        b (str): The second string.
+        limit (int): Optionally, stop as soon as the distance is known to be over limit, and return limit + 1.
+    """
+
+    if len(a) < len(b):
+        a, b = b, a
+    previous = list(range(len(b) + 1))
+    for i, char_a in enumerate(a, start=1):
+        current = [i]
+        for j, char_b in enumerate(b, start=1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (char_a != char_b)))
+        if limit is not None and min(current) > limit:
+            return limit + 1
+        previous = current
+    return previous[-1]
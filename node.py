@@ -1,28 +1,65 @@
-from ci_helper_functions import requires_selected_node
+from traversal import traverse
+
+
+class RelationSet(dict):
+    """
+    Insertion-ordered set of related nodes.
+
+    Subclasses dict (with the values left as None) so membership checks and removals are O(1) while iteration keeps
+    the order relations were added in, without an extra wrapper object per set.
+    """
+
+    __slots__ = ()
+
+    def __init__(self, items=()):
+        super().__init__(dict.fromkeys(items))
+
+    def add(self, item):
+        """Adds an item, keeping its original position if it is already present."""
+
+        self[item] = None
+
+    def remove(self, item):
+        """Removes an item, raising KeyError if it isn't present."""
+
+        del self[item]
+
+    def discard(self, item):
+        """Removes an item if it is present."""
+
+        self.pop(item, None)
+
+    def __repr__(self):
+        return f"RelationSet({list(self)!r})"
 
 
 class Node:
+    __slots__ = ("name", "gender", "birthdate", "parents", "children", "spouse")
+
     def __init__(self, name, gender=None, birthdate=None):
         self.name = name
         self.gender = gender
         self.birthdate = birthdate
-        self.parents = []
-        self.children = []
+        self.parents = RelationSet()
+        self.children = RelationSet()
         self.spouse = None
 
     def set_parents(self, parent1, parent2):
-        """Adds a parent to the node."""
+        """Adds a parent to the node. Returns True if they were added, which requires them to be married."""
 
         if parent1 == parent2.spouse and parent2 == parent1.spouse:
-            self.parents.extend([parent1,parent2])
-            parent1.children.append(self)
-            parent2.children.append(self)
+            self.parents.add(parent1)
+            self.parents.add(parent2)
+            parent1.children.add(self)
+            parent2.children.add(self)
+            return True
+        return False
 
     def add_child(self, child):
         """Adds a child to the node."""
 
-        self.children.append(child)
-        child.parents.append(self)
+        self.children.add(child)
+        child.parents.add(self)
 
     def set_spouse(self, spouse):
         """Adds a spouse to the node."""
@@ -43,24 +80,6 @@ class Node:
         }
 
     def get_all_related(self):
-        related_members = []
-
-        def collect_related(node):
-            if node not in related_members:
-                if node != self:
-                    related_members.append(node)
-
-                if self.parents:
-                    for parent in self.parents:
-                        collect_related(parent)
-
-                if self.children:
-                    for child in self.children:
-                        collect_related(child)
-
-                if self.spouse:
-                    collect_related(self.spouse)
-
-        collect_related(self)
+        """Returns everyone reachable from this node through parent, child and spouse relations."""
 
-        return related_members
\ No newline at end of file
+        return list(traverse(self))
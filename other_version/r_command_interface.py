@@ -3,6 +3,7 @@ import cmd2
 from cmd2 import with_argparser
 import sys
 from r_graph import Graph
+from r_layout import force_directed, FORCE_ITERATIONS
 
 
 class CommandInterface(cmd2.Cmd):
@@ -59,7 +60,7 @@ class CommandInterface(cmd2.Cmd):
         Warnings: Creating a new graph will discard the one currently being worked on.
         """
 
-        with self.lock:
+        with self.lock.write():
             # Create a new blank graph.
             if args.subcommand == "graph":
                 self.graph = Graph()
@@ -88,6 +89,7 @@ class CommandInterface(cmd2.Cmd):
                 elif args.relation_type == 'spouse':
                     self.selected_node.add_spouse(target_node)
                     print(f"{args.node} is now a spouse of {self.selected_node}.")
+                self.graph.layout.relation_added(self.selected_node, target_node)
 
     # Set up the divorce parser and its node argument.
     # This could be achieved without the argparser but I felt it was beneficial for the sake of consistency and also clarity when it comes to the help command.
@@ -103,7 +105,7 @@ class CommandInterface(cmd2.Cmd):
         Warnings: The node to be divorced must be in the spouse of the selected node.
         """
 
-        with self.lock:
+        with self.lock.write():
             if args.node in self.selected_node.spouses:
                 self.selected_node.spouses.remove(args.node)
                 self.selected_node.previous_spouses.add(args.node)
@@ -111,7 +113,38 @@ class CommandInterface(cmd2.Cmd):
                 args.node.previous_spouses.add(self.selected_node)
             else:
                 self.selected_node.add_prev_spouse(self.graph.get_node(args.node))
+            self.graph.layout.relation_added(self.selected_node, self.graph.get_node(args.node))
 
+    # Set up the layout parser and its mode argument and optional iterations flag.
+    layout_parser = argparse.ArgumentParser(prog="layout")
+    layout_parser.add_argument("mode", choices=["layered", "force"],
+                               help="layered puts each generation in its own row, force spreads everyone out by their relations.")
+    layout_parser.add_argument("--iterations", type=int, default=FORCE_ITERATIONS,
+                               help="Optionally, how many iterations the force layout runs for.")
+
+    @with_argparser(layout_parser)
+    def do_layout(self, args):
+        """
+        Lays out the graph again.
+        Usage: layout <mode>
+            Optionally: --iterations <iterations>
+        Warnings:
+            The force layout requires NumPy.
+            After a force layout, new people and relations are no longer laid out until 'layout layered' is used.
+        """
+
+        with self.lock.write():
+            if args.mode == "layered":
+                self.graph.layout.arrange()
+            else:
+                try:
+                    force_directed(list(self.graph.nodes.values()), args.iterations)
+                except ImportError as e:
+                    print(e)
+                    return
+                self.graph.layout.enabled = False
+                self.graph.grid.rebuild(self.graph.nodes.values())
+            print(f"Graph laid out with the {args.mode} layout.")
 
     # Set up the load parser and its filename argument.
     load_parser = argparse.ArgumentParser(prog="load")
@@ -128,7 +161,7 @@ class CommandInterface(cmd2.Cmd):
             Loading a new graph will discard the one currently being worked on.
         """
 
-        with self.lock:
+        with self.lock.write():
             self.graph = Graph().load_from_json(args.filename)
             print(self.graph.nodes)
 
@@ -145,7 +178,7 @@ class CommandInterface(cmd2.Cmd):
         Warnings: filename must be of type JSON.
         """
 
-        with self.lock:
+        with self.lock.read():
             self.graph.save_to_json(args.filename)
 
     # Set up the select parser and its name argument.
@@ -160,7 +193,7 @@ class CommandInterface(cmd2.Cmd):
         Usage: select <name>
         """
 
-        with self.lock:
+        with self.lock.read():
             self.selected_node = self.graph.get_node(args.name)
             print(f"{args.name} is now the selected node.")
 
@@ -171,7 +204,7 @@ class CommandInterface(cmd2.Cmd):
         Warnings: This cannot be undone.
         """
 
-        with self.lock:
+        with self.lock.write():
             self.graph.remove_node(self.selected_node)
             print(f"{args.name} has been removed.")
 
@@ -206,7 +239,8 @@ class CommandInterface(cmd2.Cmd):
             all
         """
 
-        with self.lock:
+        # Only 'info set' changes the graph, so everything else can run alongside the renderer.
+        with self.lock.write() if args.subcommand == "set" else self.lock.read():
             attribute_list = ["parents", "children", "siblings", "spouses", "previous_spouses"]
 
             if args.subcommand == "all":
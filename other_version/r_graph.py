@@ -1,7 +1,12 @@
 import json
 import pygame
 import math
-from r_node import Node
+from r_node import Node, line_rect
+from r_spatial import SpatialGrid, Camera
+from r_layout import LayeredLayout
+
+# How far past an area to look for nodes whose label might overlap it.
+LABEL_REACH = 200
 
 
 def draw_dashed_line(surface, color, start_pos, end_pos, dash_length=10, gap_length=5, thickness=2):
@@ -19,6 +24,9 @@ def draw_dashed_line(surface, color, start_pos, end_pos, dash_length=10, gap_len
     """
 
     total_length = math.hypot(end_pos[0] - start_pos[0], end_pos[1] - start_pos[1])
+    # Zoomed out far enough, two nodes can land on the same pixel.
+    if not total_length:
+        return
     num_dashes = int(total_length / (dash_length + gap_length))
 
     dx = (end_pos[0] - start_pos[0]) / total_length
@@ -33,6 +41,8 @@ def draw_dashed_line(surface, color, start_pos, end_pos, dash_length=10, gap_len
 class Graph:
     def __init__(self):
         self.nodes = {}
+        self.grid = SpatialGrid()
+        self.layout = LayeredLayout(self)
 
     def add_node(self, name, gender=None, birthdate=None):
         """
@@ -46,8 +56,10 @@ class Graph:
             node (Node): The created node.
         """
 
-        if name not in self.nodes.:
+        if name not in self.nodes:
             self.nodes[name] = Node(name, gender, birthdate)
+            self.grid.insert(self.nodes[name])
+            self.layout.node_added(self.nodes[name])
         else:
             print(f"Person {name} already exists.")
         print(self.nodes)
@@ -82,8 +94,12 @@ class Graph:
                 child.parents.remove(person)
             for spouse in person.spouses:
                 spouse.spouses.remove(person)
+            for prev_spouse in person.previous_spouses:
+                prev_spouse.previous_spouses.remove(person)
             for sibling in person.siblings:
                 sibling.siblings.remove(person)
+            self.grid.remove(person)
+            self.layout.node_removed(person)
             del self.nodes[name]
         else:
             print(f"Person {name} does not exist.")
@@ -132,6 +148,8 @@ class Graph:
                 node.add_sibling(temp_nodes[sibling_name])
 
         graph.nodes = temp_nodes
+        graph.grid.rebuild(temp_nodes.values())
+        graph.layout.arrange()
         return graph
 
     def save_to_json(self, file_path):
@@ -208,37 +226,76 @@ class Graph:
         visited = []  # Keeps track of visited nodes
         dfs(start_node, visited)  # Start the DFS from the specified node
 
-    def draw(self, surface):
+    def nodes_near(self, area, reach, camera=None):
+        """
+        Finds the nodes positioned in or around an area of the screen, from the spatial grid.
+
+        Args:
+            area (pygame.Rect): The area of the screen.
+            reach (tuple): How much wider and taller than area to look, in screen pixels.
+            camera (Camera): Optionally, the camera the screen is seen through.
+
+        Returns:
+            nodes (list): The nodes positioned inside area, grown by reach.
+        """
+
+        return self.grid.query(*(camera or Camera()).world_bounds(area.inflate(*reach)))
+
+    def draw(self, surface, area=None, camera=None):
         """
-        Function to draw all nodes to the surface.
+        Function to draw the nodes on screen to the surface.
 
         Args:
             surface (pygame.Surface): Surface to draw the nodes.
+            area (pygame.Rect): Optionally, only draw the nodes that overlap this area. Defaults to the whole surface.
+            camera (Camera): Optionally, the camera to draw the nodes through.
         """
 
-        for node in self.nodes.values():
-            node.draw(surface)
+        area = area or surface.get_rect()
+        for node in self.nodes_near(area, (LABEL_REACH, LABEL_REACH), camera):
+            if area.colliderect(node.rect(camera)):
+                node.draw(surface, camera)
 
-    def draw_connections(self, surface):
+    def draw_connections(self, surface, area=None, camera=None):
         """
-        Function to draw connections between nodes.
+        Function to draw the connections on screen between nodes.
+
+        Lines are found from the nodes up to a window's width and height outside the area, so a line that crosses the
+        area without either end in it is only missed if it's longer than the window.
 
         Args:
             surface (pygame.Surface): Surface to draw the connections.
+            area (pygame.Rect): Optionally, only draw the connections that overlap this area. Defaults to the whole
+                surface.
+            camera (Camera): Optionally, the camera to draw the connections through.
         """
 
-        drawn_pairs = []
-        for node in self.nodes.values():
-            # Loop through the nodes children and draw lines between them
-            for child in node.children:
-                pygame.draw.line(surface, (40, 28, 73), (node.x, node.y), (child.x, child.y), 2)
+        area = area or surface.get_rect()
+        window = surface.get_rect()
+
+        def visible(start, end):
+            return area.colliderect(line_rect(start, end))
+
+        drawn_children = set()
+        drawn_pairs = set()
+        for node in self.nodes_near(area, (window.width * 2, window.height * 2), camera):
+            position = node.screen_pos(camera)
+
+            # Loop through the nodes parents and children and draw lines between them, from parent to child.
+            lines = [(node, child) for child in node.children] + [(parent, node) for parent in node.parents]
+            for parent, child in lines:
+                start, end = parent.screen_pos(camera), child.screen_pos(camera)
+                if (parent.name, child.name) in drawn_children or not visible(start, end):
+                    continue
+                drawn_children.add((parent.name, child.name))
+                pygame.draw.line(surface, (40, 28, 73), start, end, 2)
 
                 # Find angle in radians given the delta x and y
-                angle = math.atan2(node.y - child.y, node.x - child.x)
+                angle = math.atan2(start[1] - end[1], start[0] - end[0])
 
                 # Find mid point.
-                mid_x = (node.x + child.x) / 2
-                mid_y = (node.y + child.y) / 2
+                mid_x = (start[0] + end[0]) / 2
+                mid_y = (start[1] + end[1]) / 2
 
                 # Fine each point on the arrow.
                 arrow_tip = (mid_x, mid_y)
@@ -249,16 +306,16 @@ class Graph:
                 pygame.draw.polygon(surface, (40, 28, 73), [arrow_tip, arrow_left, arrow_right])
 
             for spouse in node.spouses:
-                # Draw lines between spouse and append them to drawn_pairs.
+                # Draw lines between spouse and add them to drawn_pairs.
                 pair = tuple(sorted([node.name, spouse.name]))
-                if pair not in drawn_pairs:
-                    draw_dashed_line(surface, (40, 28, 73), (node.x, node.y), (spouse.x, spouse.y))
-                    drawn_pairs.append(pair)
+                if pair not in drawn_pairs and visible(position, spouse.screen_pos(camera)):
+                    draw_dashed_line(surface, (40, 28, 73), position, spouse.screen_pos(camera))
+                    drawn_pairs.add(pair)
 
             for prev_spouse in node.previous_spouses:
                 pair = tuple(sorted([node.name, prev_spouse.name]))
-                if pair not in drawn_pairs:
-                    draw_dashed_line(surface, (128, 128, 128), (node.x, node.y), (prev_spouse.x, prev_spouse.y))
+                if pair not in drawn_pairs and visible(position, prev_spouse.screen_pos(camera)):
+                    draw_dashed_line(surface, (128, 128, 128), position, prev_spouse.screen_pos(camera))
 
                     # # Find angle in radians given the delta x and y.
                     # angle = math.atan2(node.y - p_spouse.y, node.x - p_spouse.x)
@@ -272,4 +329,4 @@ class Graph:
                     #
                     # pygame.draw.line(surface, (20, 14, 37), line_point_top, line_point_bottom)
 
-                    drawn_pairs.append(pair)
\ No newline at end of file
+                    drawn_pairs.add(pair)
\ No newline at end of file
@@ -0,0 +1,314 @@
+from collections import deque
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+LAYER_SPACING = 80
+NODE_SPACING = 70
+FAMILY_GAP = 140
+TOP = 40
+LEFT = 40
+
+# Passes of the barycenter heuristic, each one sweeping down the generations and back up.
+SWEEPS = 4
+# Most passes spent lining up spouses' generations, in case bad data never settles.
+MAX_GENERATION_PASSES = 20
+
+FORCE_ITERATIONS = 150
+REPULSION_SAMPLES = 32
+
+
+def relatives(node):
+    """Returns everyone with any relation to a node, without duplicates."""
+
+    return list(dict.fromkeys(node.parents + node.children + node.spouses + node.previous_spouses + node.siblings))
+
+
+class Family:
+    """A block of connected people laid out together, and where it starts and how wide it is."""
+
+    def __init__(self, nodes):
+        self.nodes = nodes
+        self.left = LEFT
+        self.width = 0
+
+
+class LayeredLayout:
+    """
+    Lays people out in rows by generation, with parents above their children and spouses side by side.
+
+    Each family, the people connected by any relation, is laid out as its own block, and the blocks sit side by side
+    from left to right. Within a family everyone goes one row below their lowest parent, and spouses are moved down
+    to the same row. The people in each row are then reordered to cut down on crossing lines, by repeatedly sorting
+    them by the average position of their parents, then of their children, with each couple kept together.
+
+    Adding a person or a relation only lays out the family it touches again. The blocks after it are shifted along if
+    its width changed, without being laid out again.
+    """
+
+    def __init__(self, graph):
+        self.graph = graph
+        self.families = []
+        self.family_of = {}
+        self.enabled = True
+
+    def arrange(self):
+        """Lays out every family in the graph from scratch."""
+
+        self.enabled = True
+        self.families = []
+        self.family_of = {}
+        seen = set()
+        for node in self.graph.nodes.values():
+            if node not in seen:
+                members = _connected(node)
+                seen.update(members)
+                self._add_family(Family(members), len(self.families))
+        self._reflow(0)
+
+    def node_added(self, node):
+        """Places a new person, who has no relations yet, in a family of their own at the end."""
+
+        if self.enabled:
+            self._add_family(Family([node]), len(self.families))
+            self._reflow(len(self.families) - 1)
+
+    def relation_added(self, node, other):
+        """Lays out the family of two people who have just been related again, joining their families if needed."""
+
+        if not self.enabled or other is None:
+            return
+        family, other_family = self.family_of.get(node), self.family_of.get(other)
+        if family is None or other_family is None:
+            return self.arrange()
+
+        position = self.families.index(family)
+        if other_family is not family:
+            position = min(position, self.families.index(other_family))
+            self.families.remove(other_family)
+            self.families.remove(family)
+            family = Family(family.nodes + other_family.nodes)
+            self._add_family(family, position)
+        else:
+            _layout_family(family)
+        self._reflow(position)
+
+    def node_removed(self, node):
+        """Lays out what's left of a removed person's family, which may now have split into several."""
+
+        family = self.family_of.pop(node, None)
+        if not self.enabled or family is None:
+            return
+        position = self.families.index(family)
+        self.families.remove(family)
+
+        seen = {node}
+        parts = []
+        for member in family.nodes:
+            if member not in seen:
+                part = _connected(member, seen)
+                seen.update(part)
+                parts.append(part)
+        for offset, part in enumerate(parts):
+            self._add_family(Family(part), position + offset)
+        self._reflow(position)
+
+    def _add_family(self, family, position):
+        self.families.insert(position, family)
+        for node in family.nodes:
+            self.family_of[node] = family
+        _layout_family(family)
+
+    def _reflow(self, start):
+        # Shift each block from start onwards to follow the one before it.
+        left = LEFT if start == 0 else self.families[start - 1].left + self.families[start - 1].width + FAMILY_GAP
+        for family in self.families[start:]:
+            shift = left - family.left
+            family.left = left
+            for node in family.nodes:
+                node.x += shift
+                self.graph.grid.move(node)
+            left += family.width + FAMILY_GAP
+
+
+def _connected(start, excluded=()):
+    # Everyone reachable from start through any relation, skipping the people in excluded.
+    found = {start: None}
+    frontier = deque([start])
+    while frontier:
+        for relative in relatives(frontier.popleft()):
+            if relative not in found and relative not in excluded:
+                found[relative] = None
+                frontier.append(relative)
+    return list(found)
+
+
+def _generations(nodes):
+    # Kahn's algorithm over parent -> child edges gives everyone one row below their lowest parent.
+    in_family = set(nodes)
+    parents = {node: [parent for parent in dict.fromkeys(node.parents) if parent in in_family] for node in nodes}
+    waiting = {node: len(parents[node]) for node in nodes}
+    ready = deque(node for node in nodes if not waiting[node])
+    order = []
+    while ready:
+        node = ready.popleft()
+        order.append(node)
+        for child in dict.fromkeys(node.children):
+            if child in waiting:
+                waiting[child] -= 1
+                if not waiting[child]:
+                    ready.append(child)
+    # Anyone left over is part of a parent cycle in bad data, and is placed by the passes below as well as it can be.
+    placed = set(order)
+    order.extend(node for node in nodes if node not in placed)
+
+    generation = dict.fromkeys(nodes, 0)
+    for _ in range(MAX_GENERATION_PASSES):
+        changed = False
+        for node in order:
+            for parent in parents[node]:
+                if generation[node] <= generation[parent]:
+                    generation[node] = generation[parent] + 1
+                    changed = True
+            # Spouses share a row, so whoever is higher up moves down to their partner's.
+            for spouse in node.spouses:
+                if spouse in in_family and generation[spouse] < generation[node]:
+                    generation[spouse] = generation[node]
+                    changed = True
+        if not changed:
+            break
+    return generation
+
+
+def _couples(layer, generation):
+    # Group each row into units of people married to each other, who are always kept side by side.
+    units = []
+    seen = set()
+    for node in layer:
+        if node in seen:
+            continue
+        unit = [node]
+        seen.add(node)
+        for member in unit:
+            for spouse in member.spouses:
+                if spouse not in seen and generation.get(spouse) == generation[node]:
+                    seen.add(spouse)
+                    unit.append(spouse)
+        units.append(unit)
+    return units
+
+
+def _layout_family(family):
+    nodes = family.nodes
+    generation = _generations(nodes)
+    rows = max(generation.values()) + 1
+    layers = [[] for _ in range(rows)]
+    for node in nodes:
+        layers[generation[node]].append(node)
+    units = [_couples(layer, generation) for layer in layers]
+
+    position = {}
+
+    def number(row):
+        for index, node in enumerate(node for unit in units[row] for node in unit):
+            position[node] = index
+
+    def barycenter(unit, edge):
+        neighbours = [other for node in unit for other in getattr(node, edge) if other in position]
+        if not neighbours:
+            return position[unit[0]]
+        return sum(position[other] for other in neighbours) / len(neighbours)
+
+    for row in range(rows):
+        number(row)
+    for _ in range(SWEEPS):
+        for row in range(1, rows):
+            units[row].sort(key=lambda unit: barycenter(unit, "parents"))
+            number(row)
+        for row in range(rows - 2, -1, -1):
+            units[row].sort(key=lambda unit: barycenter(unit, "children"))
+            number(row)
+
+    # Centre each row under the widest one.
+    widest = max(len(layer) for layer in layers)
+    family.width = (widest - 1) * NODE_SPACING
+    for row in range(rows):
+        indent = (widest - len(layers[row])) * NODE_SPACING / 2
+        for node in (node for unit in units[row] for node in unit):
+            node.x = family.left + indent + position[node] * NODE_SPACING
+            node.y = TOP + row * LAYER_SPACING
+
+
+def require_numpy():
+    """Raises ImportError with a helpful message if NumPy isn't installed."""
+
+    if np is None:
+        raise ImportError("The force-directed layout requires NumPy. Install it with 'pip install numpy'.")
+
+
+def force_directed(nodes, iterations=FORCE_ITERATIONS, samples=REPULSION_SAMPLES, seed=0):
+    """
+    Spreads nodes out with a force-directed layout, vectorised with NumPy, starting from where they are now.
+
+    Every pair of nodes pushes apart and every relation pulls its two people together, as in Fruchterman and
+    Reingold's method. Working out every pair's push is quadratic, so instead each node is pushed by a fresh random
+    sample of the others every iteration, scaled up to stand for all of them. How far a node may move shrinks every
+    iteration, which settles the noise the sampling adds. Each iteration is O(nodes * samples + relations).
+
+    Args:
+        nodes (list): The nodes to lay out.
+        iterations (int): The number of iterations to run.
+        samples (int): The number of other nodes each node is pushed by per iteration.
+        seed (int): The random seed for the samples.
+    """
+
+    require_numpy()
+    count = len(nodes)
+    if count < 2:
+        return
+
+    index = {node: i for i, node in enumerate(nodes)}
+    edges = np.array([(index[node], index[relative]) for node in nodes for relative in relatives(node)
+                      if index.get(relative, -1) > index[node]], dtype=np.int64).reshape(-1, 2)
+    x = np.array([node.x for node in nodes], dtype=float)
+    y = np.array([node.y for node in nodes], dtype=float)
+    first, second = edges[:, 0], edges[:, 1]
+    rng = np.random.default_rng(seed)
+
+    ideal = NODE_SPACING
+    samples = min(samples, count - 1)
+    scale = ideal ** 2 * (count - 1) / samples
+    temperature = ideal * np.sqrt(count)
+    cooling = (1 / temperature) ** (1 / iterations)
+
+    for _ in range(iterations):
+        # Push apart by ideal² / distance, from a sample of the others.
+        others = rng.integers(0, count, size=(count, samples))
+        dx = x[:, None] - x[others]
+        dy = y[:, None] - y[others]
+        push = scale / (dx * dx + dy * dy + 0.01)
+        force_x = (dx * push).sum(axis=1)
+        force_y = (dy * push).sum(axis=1)
+
+        # Pull together by distance² / ideal along each relation.
+        if len(edges):
+            dx = x[first] - x[second]
+            dy = y[first] - y[second]
+            pull = np.sqrt(dx * dx + dy * dy) / ideal
+            force_x += np.bincount(second, dx * pull, count) - np.bincount(first, dx * pull, count)
+            force_y += np.bincount(second, dy * pull, count) - np.bincount(first, dy * pull, count)
+
+        # Move each node along its force, at most temperature far.
+        length = np.sqrt(force_x * force_x + force_y * force_y) + 1e-9
+        step = np.minimum(length, temperature) / length
+        x += force_x * step
+        y += force_y * step
+        temperature *= cooling
+
+    # Shift the result so it starts at the top left, where the layered layout would put it.
+    x += LEFT - x.min()
+    y += TOP - y.min()
+    for node, node_x, node_y in zip(nodes, x.tolist(), y.tolist()):
+        node.x, node.y = node_x, node_y
@@ -1,6 +1,8 @@
 import pygame
 import threading
 from r_command_interface import CommandInterface
+from r_rwlock import ReadWriteLock
+from r_spatial import Camera
 
 
 def run_pygame(cli, lock):
@@ -9,17 +11,29 @@ def run_pygame(cli, lock):
 
     Args:
         cli (CommandInterface): Command interface object for retrieving up-to-date data.
-        lock (threading.Lock): Lock object for ensuring consistency.
+        lock (ReadWriteLock): Lock shared with the command interface. Drawing and dragging only read the graph.
     """
 
     pygame.init()
 
     BACKGROUND_COL = (18, 18, 18)
+    FRAME_RATE = 60
+    CLICK_RADIUS = 30
+    ZOOM_STEP = 1.1
 
     display = pygame.display.set_mode((512, 512), pygame.RESIZABLE)
     pygame.display.set_caption('Family Tree')
+    clock = pygame.time.Clock()
+    camera = Camera()
 
     dragging_node = None
+    panning = False
+
+    # Everything is drawn on the first frame and after the graph or window changes. In between, only the areas in
+    # dirty, left behind or covered by a dragged node and its lines, are drawn again.
+    redraw_all = True
+    seen_writes = lock.writes
+    dirty = []
 
     # Start the main loop.
     running = True
@@ -31,26 +45,58 @@ def run_pygame(cli, lock):
             if event.type == pygame.QUIT:
                 running = False
 
+            # Check for the window being resized.
+            elif event.type == pygame.VIDEORESIZE:
+                redraw_all = True
+
             # Check for left click.
             elif event.type == pygame.MOUSEBUTTONDOWN and event.button == 1:
-                with lock:
+                with lock.read():
                     if cli.graph:
-                        # Cycle through nodes to see if one has been clicked and set dragging_node if it has.
-                        for node in cli.graph.nodes:
-                            node = cli.graph.nodes[node]
-                            if node.is_clicked(event.pos):
-                                dragging_node = node
-                                mouse_offset = (node.x - event.pos[0], node.y - event.pos[1])
+                        # Look up the closest node to the click in the spatial grid and set dragging_node if there is one.
+                        world_x, world_y = camera.to_world(*event.pos)
+                        node = cli.graph.grid.nearest(world_x, world_y, CLICK_RADIUS / camera.zoom)
+                        if node:
+                            dragging_node = node
+                            mouse_offset = (node.x - world_x, node.y - world_y)
+
+            # Check for right click, which pans the view while it's held.
+            elif event.type == pygame.MOUSEBUTTONDOWN and event.button == 3:
+                panning = True
+
+            elif event.type == pygame.MOUSEBUTTONUP and event.button == 3:
+                panning = False
+
+            # Check for the mouse wheel, which zooms in and out around the mouse.
+            elif event.type == pygame.MOUSEWHEEL:
+                camera.zoom_at(pygame.mouse.get_pos(), ZOOM_STEP ** event.y)
+                redraw_all = True
+
+            # Check for the home key, which puts the view back where it started.
+            elif event.type == pygame.KEYDOWN and event.key == pygame.K_HOME:
+                camera = Camera()
+                redraw_all = True
+
+            # Check for a mouse motion while panning.
+            elif event.type == pygame.MOUSEMOTION and panning:
+                camera.pan(*event.rel)
+                redraw_all = True
 
             # Check for a mouse motion.
             elif event.type == pygame.MOUSEMOTION:
-                with lock:
-                    # Move node along with mouse if there is a clicked node.
+                # Commands only change positions while holding the lock for writing, so moving a node here is still just
+                # a read of the graph.
+                with lock.read():
+                    # Move node along with mouse if there is a clicked node, marking where it was and where it is now.
                     if dragging_node:
-                        new_x = event.pos[0] + mouse_offset[0]
-                        new_y = event.pos[1] + mouse_offset[1]
+                        dirty.append(dragging_node.region(camera))
+                        world_x, world_y = camera.to_world(*event.pos)
+                        new_x = world_x + mouse_offset[0]
+                        new_y = world_y + mouse_offset[1]
                         dragging_node.x = new_x
                         dragging_node.y = new_y
+                        cli.graph.grid.move(dragging_node)
+                        dirty.append(dragging_node.region(camera))
 
             # Check for left click being released.
             elif event.type == pygame.MOUSEBUTTONUP and event.button == 1:
@@ -58,16 +104,36 @@ def run_pygame(cli, lock):
                 if dragging_node:
                     dragging_node = None
 
-        # Draw things to screen.
-        display.fill(BACKGROUND_COL)
+        # A command that changed the graph could have changed anything on screen.
+        if lock.writes != seen_writes:
+            seen_writes = lock.writes
+            redraw_all = True
 
-        with lock:
-            if cli.graph:
-                graph = cli.graph
-                graph.draw_connections(display)
-                graph.draw(display)
-
-        pygame.display.update()
+        # Draw things to screen.
+        if redraw_all:
+            display.fill(BACKGROUND_COL)
+            with lock.read():
+                if cli.graph:
+                    graph = cli.graph
+                    graph.draw_connections(display, camera=camera)
+                    graph.draw(display, camera=camera)
+            pygame.display.update()
+
+        elif dirty:
+            area = dirty[0].unionall(dirty[1:])
+            display.set_clip(area)
+            display.fill(BACKGROUND_COL, area)
+            with lock.read():
+                if cli.graph:
+                    graph = cli.graph
+                    graph.draw_connections(display, area, camera)
+                    graph.draw(display, area, camera)
+            display.set_clip(None)
+            pygame.display.update(area)
+
+        redraw_all = False
+        dirty = []
+        clock.tick(FRAME_RATE)
 
     # Quit on exit.
     cli.do_quit()
@@ -75,8 +141,9 @@ def run_pygame(cli, lock):
 
 def main():
     # Set up multithreading so that both the command loop and pygame loop can run similtaneously including a lock for information syncing.
+    # Drawing and read-only commands share the lock, and only commands that change the graph need it to themselves.
     # Note: Cmd2 throws a hissy fit if its not the main thread.
-    lock = threading.Lock()
+    lock = ReadWriteLock()
     cli = CommandInterface(lock)
 
     pygame_thread = threading.Thread(target=run_pygame, args=(cli, lock), daemon=True)
@@ -1,7 +1,27 @@
-import random
 import pygame
 import math
 
+NODE_COLOUR = (59, 53, 113)
+NODE_RADIUS = 6
+LABEL_OFFSET = 14
+# Room around each line for its thickness and the arrowhead drawn on it.
+LINE_MARGIN = 10
+
+_font = None
+
+
+def label_font():
+    """
+    Returns the font for node labels, shared by every node.
+
+    SysFont searches the system's fonts each time it's called, so it's only called once, after pygame has started.
+    """
+
+    global _font
+    if _font is None:
+        _font = pygame.font.SysFont('Arial', 10)
+    return _font
+
 
 class Node:
     def __init__(self, name, gender=None, birthdate=None):
@@ -14,8 +34,13 @@ class Node:
         self.previous_spouses = []
         self.siblings = []
 
-        self.x = random.randint(32, 512-32)
-        self.y = random.randint(32, 512-32)
+        # Placed by the graph's layout once the node is added to one.
+        self.x = 0
+        self.y = 0
+
+        # The rendered name, kept until the name changes.
+        self._label = None
+        self._label_name = None
 
     def add_parent(self, parent):
         """Adds a parent to the node."""
@@ -61,14 +86,44 @@ class Node:
             "siblings": [sibling.name for sibling in self.siblings],
         }
 
-    def draw(self, surface):
-        """Draws node to window."""
+    def label(self):
+        """Returns the node's name rendered as a surface, rendering it again only if the name has changed."""
+
+        if self._label_name != self.name:
+            self._label = label_font().render(self.name, True, NODE_COLOUR)
+            self._label_name = self.name
+        return self._label
+
+    def screen_pos(self, camera=None):
+        """Returns where the node is drawn on screen: its position as seen through the camera, if there is one."""
 
-        font = pygame.font.SysFont('Arial', 10)
-        text_surface = font.render(self.name, True, (59, 53, 113))  # White text
-        text_rect = text_surface.get_rect(center=(self.x, self.y+14))
+        return camera.to_screen(self.x, self.y) if camera else (self.x, self.y)
 
-        pygame.draw.circle(surface, (59, 53, 113), (self.x, self.y), 6)
+    def rect(self, camera=None):
+        """Returns the area of the screen the node and its label are drawn in."""
+
+        x, y = self.screen_pos(camera)
+        label_rect = self.label().get_rect(center=(x, y + LABEL_OFFSET))
+        circle_rect = pygame.Rect(x - NODE_RADIUS, y - NODE_RADIUS, NODE_RADIUS * 2, NODE_RADIUS * 2)
+        return circle_rect.union(label_rect)
+
+    def region(self, camera=None):
+        """Returns the area covering the node and every line drawn to its relatives, which moves when it does."""
+
+        region = self.rect(camera)
+        position = self.screen_pos(camera)
+        for relative in self.parents + self.children + self.spouses + self.previous_spouses:
+            region.union_ip(line_rect(position, relative.screen_pos(camera)))
+        return region
+
+    def draw(self, surface, camera=None):
+        """Draws node to window. Zooming moves the node but it's always drawn the same size, so labels stay legible."""
+
+        x, y = self.screen_pos(camera)
+        text_surface = self.label()
+        text_rect = text_surface.get_rect(center=(x, y + LABEL_OFFSET))
+
+        pygame.draw.circle(surface, NODE_COLOUR, (x, y), NODE_RADIUS)
         surface.blit(text_surface, text_rect)
 
     def is_clicked(self, mouse_pos):
@@ -84,4 +139,12 @@ class Node:
 
         # Check if the mouse is clicking on this node.
         distance = math.hypot(mouse_pos[0] - self.x, mouse_pos[1] - self.y)
-        return distance <= 30
\ No newline at end of file
+        return distance <= 30
+
+
+def line_rect(start_pos, end_pos):
+    """Returns the area a line between two points is drawn in, including its arrowhead."""
+
+    left, top = min(start_pos[0], end_pos[0]), min(start_pos[1], end_pos[1])
+    width, height = abs(end_pos[0] - start_pos[0]), abs(end_pos[1] - start_pos[1])
+    return pygame.Rect(left, top, width, height).inflate(LINE_MARGIN * 2, LINE_MARGIN * 2)
@@ -0,0 +1,57 @@
+import threading
+from contextlib import contextmanager
+
+
+class ReadWriteLock:
+    """
+    Lock that lets any number of readers in at once, or a single writer on its own.
+
+    The pygame loop drawing a frame and read-only commands such as 'info' are readers, so they never wait on each
+    other. Commands that change the graph are writers, and wait only for each other and for the readers already
+    inside. A waiting writer stops new readers from starting, so a steady stream of frames can't hold it off forever.
+
+    Every write is counted in writes, so the renderer can tell when the graph may have changed since it last looked.
+    """
+
+    def __init__(self):
+        self._condition = threading.Condition(threading.Lock())
+        self._readers = 0
+        self._writing = False
+        self._writers_waiting = 0
+        self.writes = 0
+
+    @contextmanager
+    def read(self):
+        """Context manager that holds the lock for reading."""
+
+        with self._condition:
+            while self._writing or self._writers_waiting:
+                self._condition.wait()
+            self._readers += 1
+        try:
+            yield
+        finally:
+            with self._condition:
+                self._readers -= 1
+                if not self._readers:
+                    self._condition.notify_all()
+
+    @contextmanager
+    def write(self):
+        """Context manager that holds the lock for writing."""
+
+        with self._condition:
+            self._writers_waiting += 1
+            try:
+                while self._writing or self._readers:
+                    self._condition.wait()
+            finally:
+                self._writers_waiting -= 1
+            self._writing = True
+        try:
+            yield
+        finally:
+            with self._condition:
+                self._writing = False
+                self.writes += 1
+                self._condition.notify_all()
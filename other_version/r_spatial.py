@@ -0,0 +1,145 @@
+import math
+
+CELL_SIZE = 64
+MIN_ZOOM = 0.05
+MAX_ZOOM = 8
+
+
+class SpatialGrid:
+    """
+    Uniform grid of node positions, for finding the nodes near a point or inside an area without checking them all.
+
+    Space is cut into square cells of cell_size, and each node is filed under the cell its position falls in. The grid
+    only knows where a node was when it was last inserted or moved, so anything that changes a node's position has
+    to call move afterwards.
+    """
+
+    def __init__(self, cell_size=CELL_SIZE):
+        self.cell_size = cell_size
+        self.cells = {}
+        self.cell_of = {}
+
+    def _cell(self, x, y):
+        return int(x // self.cell_size), int(y // self.cell_size)
+
+    def insert(self, node):
+        """Adds a node at its current position."""
+
+        cell = self._cell(node.x, node.y)
+        self.cells.setdefault(cell, set()).add(node)
+        self.cell_of[node] = cell
+
+    def remove(self, node):
+        """Removes a node, if it's in the grid."""
+
+        cell = self.cell_of.pop(node, None)
+        if cell is None:
+            return
+        self.cells[cell].discard(node)
+        if not self.cells[cell]:
+            del self.cells[cell]
+
+    def move(self, node):
+        """Files a node under its new position after it has moved. Nodes that aren't in the grid are ignored."""
+
+        if node in self.cell_of and self.cell_of[node] != self._cell(node.x, node.y):
+            self.remove(node)
+            self.insert(node)
+
+    def rebuild(self, nodes):
+        """Empties the grid and inserts every node again."""
+
+        self.cells = {}
+        self.cell_of = {}
+        for node in nodes:
+            self.insert(node)
+
+    def query(self, left, top, right, bottom):
+        """
+        Finds the nodes positioned inside an area.
+
+        Args:
+            left, top, right, bottom (float): The edges of the area.
+
+        Returns:
+            nodes (list): Every node inside the area, in no particular order.
+        """
+
+        first_x, first_y = self._cell(left, top)
+        last_x, last_y = self._cell(right, bottom)
+
+        # Zoomed far out, the area can span far more cells than are in use, so only the ones in use are checked.
+        if (last_x - first_x + 1) * (last_y - first_y + 1) > len(self.cells):
+            cells = [cell for key, cell in self.cells.items()
+                     if first_x <= key[0] <= last_x and first_y <= key[1] <= last_y]
+        else:
+            cells = [self.cells[(x, y)] for x in range(first_x, last_x + 1) for y in range(first_y, last_y + 1)
+                     if (x, y) in self.cells]
+
+        return [node for cell in cells for node in cell
+                if left <= node.x <= right and top <= node.y <= bottom]
+
+    def nearest(self, x, y, radius):
+        """
+        Finds the closest node to a point, only checking the cells within radius of it.
+
+        Returns:
+            node (Node): The closest node no more than radius away, or None if there isn't one.
+        """
+
+        closest, closest_distance = None, radius
+        for node in self.query(x - radius, y - radius, x + radius, y + radius):
+            distance = math.hypot(node.x - x, node.y - y)
+            if distance <= closest_distance:
+                closest, closest_distance = node, distance
+        return closest
+
+
+class Camera:
+    """
+    The part of the graph shown in the window, for panning and zooming.
+
+    Nodes keep their positions in world coordinates. The camera holds the world position shown at the window's top
+    left corner and the zoom, the number of screen pixels per world unit, and converts between the two.
+    """
+
+    def __init__(self):
+        self.x = 0
+        self.y = 0
+        self.zoom = 1
+
+    def to_screen(self, x, y):
+        """Converts a world position to a screen position, in whole pixels."""
+
+        return round((x - self.x) * self.zoom), round((y - self.y) * self.zoom)
+
+    def to_world(self, screen_x, screen_y):
+        """Converts a screen position to a world position."""
+
+        return screen_x / self.zoom + self.x, screen_y / self.zoom + self.y
+
+    def world_bounds(self, rect):
+        """
+        Converts an area of the screen to world coordinates.
+
+        Returns:
+            bounds (tuple): The left, top, right and bottom of the area in the world.
+        """
+
+        left, top = self.to_world(rect.left, rect.top)
+        right, bottom = self.to_world(rect.right, rect.bottom)
+        return left, top, right, bottom
+
+    def pan(self, dx, dy):
+        """Moves the view along with a mouse drag of dx, dy screen pixels."""
+
+        self.x -= dx / self.zoom
+        self.y -= dy / self.zoom
+
+    def zoom_at(self, screen_pos, factor):
+        """Zooms in by factor, or out if it's below 1, keeping the world position under screen_pos where it is."""
+
+        world_x, world_y = self.to_world(*screen_pos)
+        self.zoom = min(MAX_ZOOM, max(MIN_ZOOM, self.zoom * factor))
+        self.x = world_x - screen_pos[0] / self.zoom
+        self.y = world_y - screen_pos[1] / self.zoom
@@ -0,0 +1,216 @@
+"""Runs whole-graph jobs over each connected family in parallel worker processes."""
+
+from array import array
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from dates import parse_birthdate
+from traversal import EDGE_TYPES
+
+JOBS = ("cousins", "extended-family", "validate")
+
+# More chunks than workers lets a worker that finishes early pick up more work.
+CHUNKS_PER_WORKER = 4
+
+
+class FamilySlice:
+    """
+    Compact read-only copy of one connected family, small enough to pickle and send to a worker process.
+
+    People are numbered 0 to n - 1 within the slice. Parents and children are stored as CSR arrays (offsets into one
+    flat array of targets), the spouse as an index or -1, and the birthdate as a date ordinal or 0 if it's missing.
+    Relatives that aren't in the slice are left out of the arrays and listed in outside as (index, edge, name) triples.
+    """
+
+    __slots__ = ("names", "parent_offsets", "parent_targets", "child_offsets", "child_targets", "spouses", "births",
+                 "outside")
+
+    def __init__(self, nodes):
+        index = {node: i for i, node in enumerate(nodes)}
+        self.names = [node.name for node in nodes]
+        self.outside = []
+        self.parent_offsets, self.parent_targets = _csr(nodes, index, "parents", self.outside)
+        self.child_offsets, self.child_targets = _csr(nodes, index, "children", self.outside)
+        self.spouses = array('l', (index.get(node.spouse, -1) for node in nodes))
+        self.births = array('q', (_ordinal(node.birthdate) for node in nodes))
+
+    def __len__(self):
+        return len(self.names)
+
+    def parents(self, i):
+        return self.parent_targets[self.parent_offsets[i]:self.parent_offsets[i + 1]]
+
+    def children(self, i):
+        return self.child_targets[self.child_offsets[i]:self.child_offsets[i + 1]]
+
+
+def _csr(nodes, index, edge, outside):
+    offsets = array('l', [0])
+    targets = array('l')
+    for i, node in enumerate(nodes):
+        for relative in getattr(node, edge):
+            if relative in index:
+                targets.append(index[relative])
+            else:
+                outside.append((i, edge, relative.name))
+        offsets.append(len(targets))
+    return offsets, targets
+
+
+def _ordinal(birthdate):
+    parsed = parse_birthdate(birthdate)
+    return parsed.toordinal() if parsed else 0
+
+
+def partition(graph):
+    """
+    Splits a graph into its connected families, as tracked by the graph's ComponentIndex.
+
+    Returns:
+        families (list): A list of node lists, one per family, largest first.
+    """
+
+    return sorted(graph.components.members().values(), key=len, reverse=True)
+
+
+def _chunk(families, chunks):
+    # Largest families first, each into the currently smallest chunk, keeps the chunks roughly even.
+    bins = [[] for _ in range(min(chunks, len(families)))]
+    sizes = [0] * len(bins)
+    for family in families:
+        smallest = sizes.index(min(sizes))
+        bins[smallest].append(family)
+        sizes[smallest] += len(family)
+    return bins
+
+
+def run(graph, job, workers=1, max_depth=None, edges=EDGE_TYPES):
+    """
+    Runs a whole-graph job, over each connected family in worker processes if more than one worker is asked for.
+
+    Args:
+        graph (Graph): The graph to run the job on.
+        job (str): One of JOBS: "cousins" lists everyone's cousins, "extended-family" counts everyone's relatives and
+            "validate" checks the whole tree for inconsistent relations.
+        workers (int): The number of worker processes. 1 runs the job in this process.
+        max_depth (int): Optionally, for "extended-family", the number of edges to follow outwards.
+        edges (tuple): For "extended-family", the edge types to follow.
+
+    Returns:
+        results (list): For "cousins" and "extended-family", (name, result) pairs for every person. For "validate",
+        the problems found, as strings.
+    """
+
+    if job not in JOBS:
+        raise ValueError(f"Unknown job: {job}.")
+
+    slices = [FamilySlice(family) for family in partition(graph)]
+    if workers <= 1:
+        return _run_chunk(job, slices, max_depth, edges)
+
+    results = []
+    chunks = _chunk(slices, workers * CHUNKS_PER_WORKER)
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = [executor.submit(_run_chunk, job, chunk, max_depth, edges) for chunk in chunks]
+        for future in futures:
+            results.extend(future.result())
+    return results
+
+
+def _run_chunk(job, slices, max_depth, edges):
+    results = []
+    for family in slices:
+        if job == "cousins":
+            results.extend(_cousins(family))
+        elif job == "extended-family":
+            results.extend(_extended_family(family, max_depth, edges))
+        else:
+            results.extend(_validate(family))
+    return results
+
+
+def _cousins(family):
+    # The same walk as info_cousins: parents, grandparents, their other children, and their children.
+    for i in range(len(family)):
+        cousins = {}
+        for parent in family.parents(i):
+            for grandparent in family.parents(parent):
+                for pibling in family.children(grandparent):
+                    if pibling == parent:
+                        continue
+                    for cousin in family.children(pibling):
+                        cousins[family.names[cousin]] = None
+        yield family.names[i], list(cousins)
+
+
+def _extended_family(family, max_depth, edges):
+    # Following every edge type without a depth limit reaches the whole family, so there's no need to walk it.
+    if max_depth is None and set(edges) == set(EDGE_TYPES):
+        for name in family.names:
+            yield name, len(family) - 1
+        return
+
+    for i in range(len(family)):
+        visited = {i}
+        frontier = deque([(i, 0)])
+        while frontier:
+            current, depth = frontier.popleft()
+            if max_depth is not None and depth >= max_depth:
+                continue
+            for relative in _neighbours(family, current, edges):
+                if relative not in visited:
+                    visited.add(relative)
+                    frontier.append((relative, depth + 1))
+        yield family.names[i], len(visited) - 1
+
+
+def _neighbours(family, i, edges):
+    for edge in edges:
+        if edge == "parents":
+            yield from family.parents(i)
+        elif edge == "children":
+            yield from family.children(i)
+        elif family.spouses[i] != -1:
+            yield family.spouses[i]
+
+
+def _validate(family):
+    names = family.names
+    for i, edge, relative in family.outside:
+        yield f"{names[i]} lists {relative} in their {edge}, who isn't in the graph."
+
+    for i, name in enumerate(names):
+        parents = family.parents(i)
+        if len(parents) > 2:
+            yield f"{name} has {len(parents)} parents."
+        if i in parents:
+            yield f"{name} is their own parent."
+        if family.spouses[i] == i:
+            yield f"{name} is married to themselves."
+        elif family.spouses[i] != -1 and family.spouses[family.spouses[i]] != i:
+            yield f"{name} is married to {names[family.spouses[i]]}, who is married to someone else."
+
+        for parent in parents:
+            if i not in family.children(parent):
+                yield f"{name} lists {names[parent]} as a parent, but isn't one of their children."
+            if family.births[i] and family.births[parent] and family.births[i] <= family.births[parent]:
+                yield f"{name} was born before their parent {names[parent]}."
+        for child in family.children(i):
+            if i not in family.parents(child):
+                yield f"{name} lists {names[child]} as a child, but isn't one of their parents."
+
+    # Kahn's algorithm over parent -> child edges; anyone left over is in, or descended from, an ancestry cycle.
+    waiting = [0] * len(family)
+    for child in family.child_targets:
+        waiting[child] += 1
+    ready = deque(i for i in range(len(family)) if not waiting[i])
+    placed = 0
+    while ready:
+        current = ready.popleft()
+        placed += 1
+        for child in family.children(current):
+            waiting[child] -= 1
+            if not waiting[child]:
+                ready.append(child)
+    if placed < len(family):
+        cycle = [names[i] for i in range(len(family)) if waiting[i] > 0]
+        yield f"{', '.join(cycle[:5])}{' and others' if len(cycle) > 5 else ''} are in or below an ancestry cycle."
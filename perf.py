@@ -0,0 +1,154 @@
+"""Per-command latency histograms and profiles for the 'perf' command."""
+
+import cProfile
+import math
+import pstats
+import time
+import tracemalloc
+from collections import Counter, deque
+
+# Each histogram bucket is this factor wider than the last, so percentiles are accurate to within about 9%.
+BUCKET_GROWTH = 2 ** (1 / 8)
+MAX_PROFILES = 20
+
+
+class Histogram:
+    """
+    Log-scaled histogram of positive values, such as seconds or bytes.
+
+    Values are counted in buckets that grow geometrically, so memory stays constant however many values are added
+    while percentiles keep a fixed relative error.
+    """
+
+    def __init__(self):
+        self.buckets = Counter()
+        self.count = 0
+        self.total = 0
+        self.max = 0
+
+    def add(self, value):
+        """Counts a value. Zero and negative values go in the lowest bucket."""
+
+        bucket = math.floor(math.log(value, BUCKET_GROWTH)) if value > 0 else None
+        self.buckets[bucket] += 1
+        self.count += 1
+        self.total += value
+        self.max = max(self.max, value)
+
+    def percentile(self, percent):
+        """
+        Estimates a percentile of the values added so far.
+
+        Args:
+            percent (float): The percentile, between 0 and 100.
+
+        Returns:
+            value (float): The upper edge of the bucket holding the percentile, capped at the largest value, or None if
+            nothing has been added.
+        """
+
+        if not self.count:
+            return None
+        rank = percent / 100 * self.count
+        seen = 0
+        for bucket in sorted(self.buckets, key=lambda b: -math.inf if b is None else b):
+            seen += self.buckets[bucket]
+            if seen >= rank:
+                return 0 if bucket is None else min(BUCKET_GROWTH ** (bucket + 1), self.max)
+        return self.max
+
+
+class CommandRecord:
+    """Histograms of the wall time, CPU time and allocated bytes of every run of one command."""
+
+    def __init__(self):
+        self.wall = Histogram()
+        self.cpu = Histogram()
+        self.memory = Histogram()
+        self.profiles = deque(maxlen=MAX_PROFILES)
+
+
+class PerfMonitor:
+    """
+    Times every command the shell runs. CommandInterface calls start and finish from cmd2's precommand and command
+    finalization hooks, so commands that raise are timed too.
+
+    Wall and CPU time are always recorded. With detail turned on, each run is also profiled with cProfile and its
+    allocations traced with tracemalloc, which makes every command noticeably slower.
+    """
+
+    def __init__(self):
+        self.records = {}
+        self.detail = False
+        self._start = None
+        self._profiler = None
+
+    def set_detail(self, detail):
+        """Turns profiling and allocation tracing of every command on or off."""
+
+        self.detail = detail
+        if detail and not tracemalloc.is_tracing():
+            tracemalloc.start()
+        elif not detail and tracemalloc.is_tracing():
+            tracemalloc.stop()
+
+    def start(self):
+        """Starts the clocks for a command that's about to run."""
+
+        allocated = None
+        if self.detail:
+            tracemalloc.reset_peak()
+            allocated, _ = tracemalloc.get_traced_memory()
+            self._profiler = cProfile.Profile()
+            self._profiler.enable()
+
+        self._start = (time.perf_counter(), time.process_time(), allocated)
+
+    def finish(self, command):
+        """Stops the clocks and records the run against the command's name."""
+
+        if self._start is None:
+            return
+        wall = time.perf_counter() - self._start[0]
+        cpu = time.process_time() - self._start[1]
+
+        record = self.records.setdefault(command, CommandRecord())
+        record.wall.add(wall)
+        record.cpu.add(cpu)
+
+        if self._profiler:
+            self._profiler.disable()
+            record.profiles.append(self._profiler)
+            self._profiler = None
+            # Tracing stops partway through the run that turns detail off.
+            if tracemalloc.is_tracing():
+                _, peak = tracemalloc.get_traced_memory()
+                record.memory.add(peak - self._start[2])
+
+        self._start = None
+
+    def profile(self, command, last):
+        """
+        Combines the profiles of the last runs of a command.
+
+        Args:
+            command (str): The command's name.
+            last (int): How many of its most recent profiled runs to combine.
+
+        Returns:
+            stats (pstats.Stats): The combined profile, or None if the command has no profiled runs.
+        """
+
+        record = self.records.get(command)
+        if not record or not record.profiles:
+            return None
+        profiles = list(record.profiles)[-last:]
+        stats = pstats.Stats(profiles[0])
+        for profiler in profiles[1:]:
+            stats.add(profiler)
+        return stats
+
+    def reset(self):
+        """Forgets every recorded run."""
+
+        self.records = {}
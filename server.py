@@ -0,0 +1,382 @@
+"""Serves one resident graph to many clients at once over a JSON-lines socket."""
+
+import argparse
+import asyncio
+import json
+import sys
+import time
+from graph import EDITABLE_ATTRIBUTES
+from storage import load_graph
+from traversal import cousins, EDGE_TYPES
+
+DEFAULT_PORT = 8765
+MAX_BATCH = 512
+# The longest request or response line, well above asyncio's 64KiB default so long name lists fit.
+LINE_LIMIT = 16 * 2 ** 20
+RELATIONS = ("parents", "children", "spouse", "siblings", "cousins")
+
+
+class RequestError(Exception):
+    """Raised for a request that can't be answered, and sent back to the client as its error."""
+
+
+class Session:
+    """The state of one client connection: the person it has selected, like the selected node in the shell."""
+
+    def __init__(self):
+        self.selected = None
+
+    def person(self, graph, request):
+        """
+        Finds the person a request is about: the one it names, or else the session's selected person.
+
+        Raises:
+            RequestError: If nobody is named or selected, or they don't exist.
+        """
+
+        name = request.get("name", self.selected)
+        if name is None:
+            raise RequestError("No name given and nobody is selected.")
+        return _node(graph, name)
+
+
+class GraphServer:
+    """
+    Answers queries from many concurrent clients against a single in-memory graph.
+
+    Each line a client sends is a JSON object with an "op", and gets back one line with the same "id" and either a
+    "result" or an "error". Reads are answered as soon as they arrive. Everything runs on the one event loop thread
+    and no read awaits part way through, so a read always sees the graph between two writes without taking a lock.
+
+    Writes are queued instead, and a single writer task applies everything that has queued up as one batch, without
+    yielding to readers part way through. When the graph is journaling, the whole batch is then flushed with one
+    append before any of its writers is told it succeeded, so concurrent writers share the cost of the disk write.
+    """
+
+    def __init__(self, graph, max_batch=MAX_BATCH):
+        self.graph = graph
+        self.max_batch = max_batch
+        self.writes = None
+        self.clients = 0
+        self.served = 0
+        self.batches = 0
+        self.started = time.perf_counter()
+
+        self.reads = {
+            "ping": self.ping,
+            "stats": self.stats,
+            "select": self.select,
+            "find": self.find,
+            "person": self.person,
+            "relation": self.relation,
+            "kinship": self.kinship,
+            "extended-family": self.extended_family,
+            "ancestor-of": self.ancestor_of,
+            "descendant-of": self.descendant_of,
+            "common-ancestors": self.common_ancestors,
+            "descendant-count": self.descendant_count,
+            "same-family": self.same_family,
+        }
+        self.write_ops = {
+            "create": self.create,
+            "remove": self.remove,
+            "set-parents": self.set_parents,
+            "add-child": self.add_child,
+            "set-spouse": self.set_spouse,
+            "set-info": self.set_info,
+        }
+
+    async def serve(self, host="127.0.0.1", port=DEFAULT_PORT, unix_path=None):
+        """Listens on a TCP port, or a Unix socket if unix_path is given, until cancelled."""
+
+        self.writes = asyncio.Queue()
+        writer_task = asyncio.create_task(self._apply_writes())
+        if unix_path:
+            server = await asyncio.start_unix_server(self.handle_client, path=unix_path, limit=LINE_LIMIT)
+            print(f"Serving {len(self.graph.nodes)} people on {unix_path}")
+        else:
+            server = await asyncio.start_server(self.handle_client, host, port, limit=LINE_LIMIT)
+            print(f"Serving {len(self.graph.nodes)} people on {host}:{port}")
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            writer_task.cancel()
+            self._flush_journal()
+
+    async def handle_client(self, reader, writer):
+        """Answers one client's requests, in order, until it disconnects."""
+
+        session = Session()
+        self.clients += 1
+        try:
+            while line := await reader.readline():
+                response = await self.respond(session, line)
+                writer.write(json.dumps(response).encode() + b"\n")
+                await writer.drain()
+        except ValueError:
+            # readline raises ValueError for a line over LINE_LIMIT, after which the stream can't be read any further.
+            writer.write(json.dumps({"id": None, "error": "Request too long."}).encode() + b"\n")
+        except ConnectionError:
+            pass
+        finally:
+            self.clients -= 1
+            writer.close()
+
+    async def respond(self, session, line):
+        """
+        Works out the response to one request line.
+
+        Returns:
+            response (dict): The request's id with either a result or an error message.
+        """
+
+        try:
+            request = json.loads(line)
+            if not isinstance(request, dict):
+                raise RequestError("Each request must be a JSON object.")
+        except json.JSONDecodeError as e:
+            return {"id": None, "error": f"Invalid JSON: {e}"}
+        except RequestError as e:
+            return {"id": None, "error": str(e)}
+
+        op = request.get("op")
+        try:
+            if op in self.reads:
+                result = self.reads[op](session, request)
+            elif op in self.write_ops:
+                done = asyncio.get_running_loop().create_future()
+                await self.writes.put((op, session, request, done))
+                result = await done
+            else:
+                raise RequestError(f"Unknown op: {op}.")
+        except RequestError as e:
+            return {"id": request.get("id"), "error": str(e)}
+        except Exception as e:
+            # A bug in one handler shouldn't take down the connection, let alone the server.
+            return {"id": request.get("id"), "error": f"Internal error: {e!r}"}
+        self.served += 1
+        return {"id": request.get("id"), "result": result}
+
+    async def _apply_writes(self):
+        # Wait for one write, then take every other write already waiting, up to max_batch, and apply them together.
+        while True:
+            batch = [await self.writes.get()]
+            while len(batch) < self.max_batch and not self.writes.empty():
+                batch.append(self.writes.get_nowait())
+
+            results = []
+            for op, session, request, done in batch:
+                try:
+                    results.append((done, self.write_ops[op](session, request), None))
+                except Exception as e:
+                    results.append((done, None, e))
+            # A journal that can't be written fails this batch's writes, but the writer keeps going so later
+            # requests aren't left waiting. The changes stay pending and are written by the next flush that works.
+            if flush_error := self._flush_journal():
+                failed = RequestError(f"The change was made but couldn't be saved: {flush_error}")
+                results = [(done, None, error or failed) for done, _, error in results]
+            self.batches += 1
+
+            for done, result, error in results:
+                if done.cancelled():
+                    continue
+                if error:
+                    done.set_exception(error)
+                else:
+                    done.set_result(result)
+
+    def _flush_journal(self):
+        # Returns the error if the journal couldn't be written, or None.
+        if not self.graph.journal:
+            return None
+        try:
+            self.graph.journal.flush()
+        except Exception as e:
+            print(f"Couldn't write the journal: {e}")
+            return e
+        return None
+
+    # Reads.
+
+    def ping(self, session, request):
+        return "pong"
+
+    def stats(self, session, request):
+        return {
+            "people": len(self.graph.nodes),
+            "clients": self.clients,
+            "served": self.served,
+            "write_batches": self.batches,
+            "uptime": time.perf_counter() - self.started,
+        }
+
+    def select(self, session, request):
+        name = request.get("name")
+        try:
+            _node(self.graph, name)
+        except RequestError as e:
+            suggestions = self.graph.name_index.suggest(name) if isinstance(name, str) else []
+            hint = f" Did you mean: {', '.join(suggestions)}?" if suggestions else ""
+            raise RequestError(f"{e}{hint}")
+        session.selected = name
+        return name
+
+    def find(self, session, request):
+        pattern = str(request.get("pattern", ""))
+        limit = _limit(request, 20)
+        names = [] if request.get("fuzzy") else self.graph.name_index.prefix(pattern, limit)
+        return names or self.graph.name_index.fuzzy(pattern, limit)
+
+    def person(self, session, request):
+        return session.person(self.graph, request).to_dict()
+
+    def relation(self, session, request):
+        node = session.person(self.graph, request)
+        relation = request.get("relation")
+        if relation == "spouse":
+            return node.spouse.name if node.spouse else None
+        if relation in ("parents", "children"):
+            return [relative.name for relative in getattr(node, relation)]
+        if relation == "siblings":
+            siblings = {sibling.name: None for parent in node.parents for sibling in parent.children}
+            siblings.pop(node.name, None)
+            return list(siblings)
+        if relation == "cousins":
+            return [cousin.name for cousin in cousins(node)]
+        raise RequestError(f"Unknown relation: {relation}. Choose from {', '.join(RELATIONS)}.")
+
+    def kinship(self, session, request):
+        node = session.person(self.graph, request)
+        return self.graph.kinship.relationship(node, self._other(request))
+
+    def extended_family(self, session, request):
+        node = session.person(self.graph, request)
+        edges = tuple(request.get("via", EDGE_TYPES))
+        if not set(edges) <= set(EDGE_TYPES):
+            raise RequestError(f"Edges must be from {', '.join(EDGE_TYPES)}.")
+        depth = request.get("depth")
+        if depth is not None and not isinstance(depth, int):
+            raise RequestError("depth must be a whole number.")
+
+        names = []
+        limit = _limit(request, None)
+        for relative in self.graph.related(node, depth, edges):
+            if limit is not None and len(names) >= limit:
+                break
+            names.append(relative.name)
+        return names
+
+    def ancestor_of(self, session, request):
+        return self.graph.ancestry.is_ancestor(session.person(self.graph, request), self._other(request))
+
+    def descendant_of(self, session, request):
+        return self.graph.ancestry.is_descendant(session.person(self.graph, request), self._other(request))
+
+    def common_ancestors(self, session, request):
+        common = self.graph.ancestry.common_ancestors(session.person(self.graph, request), self._other(request))
+        return [node.name for node in common]
+
+    def descendant_count(self, session, request):
+        return self.graph.ancestry.descendant_count(session.person(self.graph, request))
+
+    def same_family(self, session, request):
+        return self.graph.components.same_family(session.person(self.graph, request), self._other(request))
+
+    def _other(self, request):
+        return _node(self.graph, request.get("other"))
+
+    # Writes, applied by the writer task. Anyone they refer to is looked up when the batch is applied.
+
+    def create(self, session, request):
+        name = request.get("name")
+        if not isinstance(name, str) or not name:
+            raise RequestError("A name is needed to create a person.")
+        if self.graph.get_node(name) is not None:
+            raise RequestError(f"Person {name} already exists.")
+        self.graph.add_node(name, request.get("gender"), request.get("birthdate"))
+        return name
+
+    def remove(self, session, request):
+        name = session.person(self.graph, request).name
+        self.graph.remove_node(name)
+        if session.selected == name:
+            session.selected = None
+        return name
+
+    def set_parents(self, session, request):
+        node = session.person(self.graph, request)
+        names = request.get("parents")
+        if not isinstance(names, list) or len(names) != 2:
+            raise RequestError("parents must name two people.")
+        parents = [_node(self.graph, name) for name in names]
+        if not self.graph.set_parents(node, *parents):
+            raise RequestError(f"{parents[0].name} and {parents[1].name} must be spouses to be set as parents.")
+        return [parent.name for parent in node.parents]
+
+    def add_child(self, session, request):
+        node = session.person(self.graph, request)
+        self.graph.add_child(node, self._other(request))
+        return [child.name for child in node.children]
+
+    def set_spouse(self, session, request):
+        node = session.person(self.graph, request)
+        self.graph.set_spouse(node, self._other(request))
+        return node.spouse.name
+
+    def set_info(self, session, request):
+        node = session.person(self.graph, request)
+        attribute = str(request.get("attribute", "")).lower()
+        value = request.get("value")
+        if attribute not in EDITABLE_ATTRIBUTES:
+            raise RequestError(f"Invalid attribute: {attribute}.")
+        if not isinstance(value, str):
+            raise RequestError("value must be a string.")
+        old_name = node.name
+        if not self.graph.set_info(node, attribute, value):
+            raise RequestError(f"Person {value} already exists.")
+        if attribute == "name" and session.selected == old_name:
+            session.selected = value
+        return node.to_dict()
+
+
+def _node(graph, name):
+    if not isinstance(name, str):
+        raise RequestError("Names must be strings.")
+    node = graph.get_node(name)
+    if node is None:
+        raise RequestError(f"Person {name} does not exist.")
+    return node
+
+
+def _limit(request, default):
+    limit = request.get("limit", default)
+    if limit is not None and (not isinstance(limit, int) or limit < 1):
+        raise RequestError("limit must be a positive whole number.")
+    return limit
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve a family graph to many clients over a JSON-lines socket.")
+    parser.add_argument("filename", type=str, help="The graph to load and serve, in any format 'load' accepts.")
+    parser.add_argument("--host", type=str, default="127.0.0.1", help="The address to listen on.")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT, help="The TCP port to listen on.")
+    parser.add_argument("--unix", type=str, help="Optionally, listen on this Unix socket path instead of TCP.")
+    parser.add_argument("--compact", action="store_true", help="Load into the compact storage engine.")
+    parser.add_argument("--journal", action="store_true",
+                        help="Record writes to the file's journal, flushed once per batch of writes.")
+    parser.add_argument("--max-batch", type=int, default=MAX_BATCH, help="The most writes to apply in one batch.")
+    args = parser.parse_args()
+
+    graph = load_graph(args.filename, args.compact, args.journal)
+    if graph is None:
+        sys.exit(1)
+    server = GraphServer(graph, args.max_batch)
+    try:
+        asyncio.run(server.serve(args.host, args.port, args.unix))
+    except KeyboardInterrupt:
+        print(f"Stopped after {server.served} requests.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,277 @@
+"""
+Versioned binary snapshot format (.ftb) for graphs, read zero-copy through mmap.
+
+Layout (all integers are native-endian, sections are 8-byte aligned):
+    header          magic, version, byte order, counts and the file offset of every section below
+    string offsets  uint32 x (string_count + 1), string i is string_data[offsets[i]:offsets[i + 1]]
+    string data     utf-8 bytes for names, genders and birthdates, each distinct string stored once
+    records         int32 x 4 per person: name, gender and birthdate string ids (-1 for none) and spouse id (-1)
+    parent offsets  int32 x (person_count + 1), CSR offsets into parent targets
+    parent targets  int32 person ids
+    child offsets   int32 x (person_count + 1), CSR offsets into child targets
+    child targets   int32 person ids
+    name order      int32 person ids sorted by name, for binary search lookups
+"""
+
+import mmap
+import os
+import struct
+import sys
+from array import array
+from bisect import bisect_left
+from collections.abc import MutableMapping, Sequence
+from compact_store import CompactStore, CompactGraph
+
+MAGIC = b"FTB\0"
+VERSION = 1
+BYTE_ORDER = 1 if sys.byteorder == "little" else 2
+HEADER = struct.Struct("=4sIIIIII" + "Q" * 10)
+RECORD_FIELDS = 4
+NAME, GENDER, BIRTHDATE, SPOUSE = range(RECORD_FIELDS)
+
+
+class SnapshotError(Exception):
+    """Raised when a file isn't a snapshot this version can read."""
+
+
+def write_snapshot(graph, file_path):
+    """
+    Writes any graph to a binary snapshot.
+
+    The snapshot is written to a temporary file and renamed into place, so a graph that is currently memory-mapped
+    from the same path keeps reading the old file safely.
+
+    Args:
+        graph (Graph): The graph to be saved.
+        file_path (str): The path to the .ftb file.
+    """
+
+    nodes = list(graph.nodes.values())
+    ids = {node.name: person_id for person_id, node in enumerate(nodes)}
+
+    strings = {}
+
+    def string_id(value):
+        if value is None:
+            return -1
+        return strings.setdefault(value, len(strings))
+
+    records = array('i')
+    parent_offsets, parent_targets = array('i', [0]), array('i')
+    child_offsets, child_targets = array('i', [0]), array('i')
+    for node in nodes:
+        spouse = node.spouse
+        records.extend((string_id(node.name), string_id(node.gender), string_id(node.birthdate),
+                        ids[spouse.name] if spouse else -1))
+        parent_targets.extend(ids[parent.name] for parent in node.parents)
+        parent_offsets.append(len(parent_targets))
+        child_targets.extend(ids[child.name] for child in node.children)
+        child_offsets.append(len(child_targets))
+
+    string_offsets = array('I', [0])
+    string_data = bytearray()
+    for value in strings:
+        string_data += value.encode('utf-8')
+        string_offsets.append(len(string_data))
+
+    name_order = array('i', sorted(range(len(nodes)), key=lambda person_id: nodes[person_id].name))
+
+    sections = [string_offsets.tobytes(), bytes(string_data), records.tobytes(),
+                parent_offsets.tobytes(), parent_targets.tobytes(),
+                child_offsets.tobytes(), child_targets.tobytes(), name_order.tobytes()]
+
+    # Work out where each section starts, padding so every section is 8-byte aligned.
+    positions = []
+    position = _align(HEADER.size)
+    for section in sections:
+        positions.append(position)
+        position = _align(position + len(section))
+
+    temp_path = f"{file_path}.tmp"
+    with open(temp_path, 'wb') as f:
+        f.write(HEADER.pack(MAGIC, VERSION, BYTE_ORDER, len(strings), len(nodes), len(parent_targets),
+                            len(child_targets), *positions, 0, 0))
+        for position, section in zip(positions, sections):
+            f.write(b"\0" * (position - f.tell()))
+            f.write(section)
+    os.replace(temp_path, file_path)
+
+
+def _align(position):
+    return (position + 7) & ~7
+
+
+class SnapshotReader:
+    """Zero-copy typed views over the sections of a memory-mapped snapshot."""
+
+    def __init__(self, file_path):
+        with open(file_path, 'rb') as f:
+            self.mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        buffer = memoryview(self.mmap)
+
+        if len(buffer) < HEADER.size:
+            raise SnapshotError(f"{file_path} is too short to be a snapshot.")
+        (magic, version, byte_order, string_count, self.person_count, parent_count, child_count,
+         *positions) = HEADER.unpack_from(buffer)
+        if magic != MAGIC:
+            raise SnapshotError(f"{file_path} is not a family tree snapshot.")
+        if version != VERSION:
+            raise SnapshotError(f"{file_path} is snapshot version {version}, expected {VERSION}.")
+        if byte_order != BYTE_ORDER:
+            raise SnapshotError(f"{file_path} was written on a machine with a different byte order.")
+
+        (strings_pos, data_pos, records_pos, parent_offsets_pos, parent_targets_pos,
+         child_offsets_pos, child_targets_pos, name_order_pos, _, _) = positions
+        count = self.person_count
+
+        def view(position, length, fmt='i'):
+            return buffer[position:position + length * 4].cast(fmt)
+
+        self.string_offsets = view(strings_pos, string_count + 1, 'I')
+        self.string_data = buffer[data_pos:data_pos + self.string_offsets[string_count]]
+        self.records = view(records_pos, count * RECORD_FIELDS)
+        self.parent_offsets = view(parent_offsets_pos, count + 1)
+        self.parent_targets = view(parent_targets_pos, parent_count)
+        self.child_offsets = view(child_offsets_pos, count + 1)
+        self.child_targets = view(child_targets_pos, child_count)
+        self.name_order = view(name_order_pos, count)
+
+    def string(self, string_id):
+        """Decodes one string from the string table, or returns None for -1."""
+
+        if string_id == -1:
+            return None
+        offsets = self.string_offsets
+        return sys.intern(str(self.string_data[offsets[string_id]:offsets[string_id + 1]], 'utf-8'))
+
+    def field(self, person_id, field):
+        """Returns one field of a person record."""
+
+        return self.records[person_id * RECORD_FIELDS + field]
+
+    def find(self, name):
+        """Binary searches the name order for a person id, returning None if the name isn't in the snapshot."""
+
+        sorted_names = _SortedNames(self)
+        index = bisect_left(sorted_names, name)
+        if index < len(sorted_names) and sorted_names[index] == name:
+            return self.name_order[index]
+        return None
+
+
+class _SortedNames(Sequence):
+    def __init__(self, reader):
+        self.reader = reader
+
+    def __getitem__(self, index):
+        reader = self.reader
+        return reader.string(reader.field(reader.name_order[index], NAME))
+
+    def __len__(self):
+        return self.reader.person_count
+
+
+class _Column(Sequence):
+    """A per-person column read from the snapshot on demand, with changes and new people kept in memory."""
+
+    def __init__(self, count, read):
+        self.count = count
+        self.read = read
+        self.changes = {}
+        self.appended = []
+
+    def __getitem__(self, person_id):
+        if person_id >= self.count:
+            return self.appended[person_id - self.count]
+        if person_id in self.changes:
+            return self.changes[person_id]
+        return self.read(person_id)
+
+    def __setitem__(self, person_id, value):
+        if person_id >= self.count:
+            self.appended[person_id - self.count] = value
+        else:
+            self.changes[person_id] = value
+
+    def __len__(self):
+        return self.count + len(self.appended)
+
+    def append(self, value):
+        self.appended.append(value)
+
+
+class _NameIndex(MutableMapping):
+    """Name -> id lookups that binary search the snapshot, with added and removed names kept in memory."""
+
+    def __init__(self, reader, names):
+        self.reader = reader
+        self.names = names
+        self.added = {}
+        self.removed = set()
+
+    def __getitem__(self, name):
+        if name in self.added:
+            return self.added[name]
+        if name not in self.removed:
+            person_id = self.reader.find(name)
+            if person_id is not None:
+                return person_id
+        raise KeyError(name)
+
+    def __setitem__(self, name, person_id):
+        self.added[name] = person_id
+
+    def __delitem__(self, name):
+        if name in self.added:
+            del self.added[name]
+        else:
+            self[name]
+            self.removed.add(name)
+
+    def __iter__(self):
+        # Base people who were removed or renamed have their old name in removed and any new name in added.
+        for person_id in range(self.reader.person_count):
+            name = self.names[person_id]
+            if name not in self.removed and name not in self.added:
+                yield name
+        yield from self.added
+
+    def __len__(self):
+        return sum(1 for _ in self)
+
+
+class SnapshotStore(CompactStore):
+    """A CompactStore whose base columns and CSR arrays are memoryviews straight into a snapshot file."""
+
+    def __init__(self, reader):
+        super().__init__()
+        self.reader = reader
+        count = reader.person_count
+
+        self.names = _Column(count, lambda person_id: reader.string(reader.field(person_id, NAME)))
+        self.genders = _Column(count, lambda person_id: reader.string(reader.field(person_id, GENDER)))
+        self.birthdates = _Column(count, lambda person_id: reader.string(reader.field(person_id, BIRTHDATE)))
+        self.spouses = _Column(count, lambda person_id: reader.field(person_id, SPOUSE))
+        self.ids = _NameIndex(reader, self.names)
+        self.alive = bytearray(b"\x01") * count
+        self.live_count = count
+
+        self.base_count = count
+        self.parent_offsets = reader.parent_offsets
+        self.parent_targets = reader.parent_targets
+        self.child_offsets = reader.child_offsets
+        self.child_targets = reader.child_targets
+
+
+def load_snapshot(file_path):
+    """
+    Opens a snapshot as a CompactGraph without reading it into memory.
+
+    Args:
+        file_path (str): The path to the .ftb file.
+
+    Returns:
+        graph (CompactGraph): A graph backed by the memory-mapped file.
+    """
+
+    return CompactGraph(SnapshotStore(SnapshotReader(file_path)))
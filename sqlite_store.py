@@ -0,0 +1,422 @@
+"""SQLite storage engine for graphs bigger than memory."""
+
+import os
+import sqlite3
+from collections.abc import Mapping
+from contextlib import contextmanager
+from compact_store import CompactGraph, NodeView
+from traversal import EDGE_TYPES
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS people (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL UNIQUE,
+    gender TEXT,
+    birthdate TEXT,
+    spouse_id INTEGER REFERENCES people(id) ON DELETE SET NULL
+);
+CREATE TABLE IF NOT EXISTS parent_edges (
+    parent_id INTEGER NOT NULL REFERENCES people(id) ON DELETE CASCADE,
+    child_id INTEGER NOT NULL REFERENCES people(id) ON DELETE CASCADE,
+    PRIMARY KEY (parent_id, child_id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS parent_edges_by_child ON parent_edges (child_id, parent_id);
+CREATE INDEX IF NOT EXISTS people_by_spouse ON people (spouse_id);
+"""
+
+# The step that follows each edge type outwards from the people reached so far, with {depth} and {cap} filled in when
+# the walk carries a depth column.
+EDGE_STEPS = {
+    "parents": "SELECT e.parent_id{depth} FROM parent_edges e JOIN {walk} ON e.child_id = {walk}.id{cap}",
+    "children": "SELECT e.child_id{depth} FROM parent_edges e JOIN {walk} ON e.parent_id = {walk}.id{cap}",
+    "spouse": "SELECT p.spouse_id{depth} FROM people p JOIN {walk} ON p.id = {walk}.id{cap} "
+              "WHERE p.spouse_id IS NOT NULL",
+}
+
+
+class SQLiteStore:
+    """
+    Stores people and parent edges in an indexed SQLite database, with the same interface as CompactStore.
+
+    Every change is written through and committed once the operation making it finishes, so the database is always up
+    to date and nothing needs saving. The people table holds the spouse as a column, and parent_edges is keyed both ways round so parents
+    and children are each an index lookup. Only the SQLite page cache is held in memory.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.connection = sqlite3.connect(path)
+        self.connection.execute("PRAGMA foreign_keys = ON")
+        self.connection.execute("PRAGMA journal_mode = WAL")
+        self.connection.execute("PRAGMA synchronous = NORMAL")
+        self.connection.executescript(SCHEMA)
+        self.open_transactions = 0
+
+        self.names = _Column(self, "name")
+        self.genders = _Column(self, "gender")
+        self.birthdates = _Column(self, "birthdate")
+        self.spouses = _SpouseColumn(self, "spouse_id")
+        self.ids = _IdIndex(self)
+
+    def _query(self, sql, *args):
+        return self.connection.execute(sql, args)
+
+    def _write(self, sql, *args):
+        with self.transaction():
+            return self.connection.execute(sql, args)
+
+    @contextmanager
+    def transaction(self):
+        """
+        Groups every write made inside it into one transaction, committed when the outermost block ends.
+
+        Blocks can be nested, so a graph operation can hold one open around all the writes its steps make. If the
+        outermost block raises, everything written inside it is rolled back.
+        """
+
+        self.open_transactions += 1
+        try:
+            yield
+        except BaseException:
+            if self.open_transactions == 1:
+                self.connection.rollback()
+            raise
+        else:
+            if self.open_transactions == 1:
+                self.connection.commit()
+        finally:
+            self.open_transactions -= 1
+
+    @property
+    def live_count(self):
+        return self._query("SELECT COUNT(*) FROM people").fetchone()[0]
+
+    def add_person(self, name, gender=None, birthdate=None):
+        """
+        Adds a person to the database.
+
+        Returns:
+            person_id (int): The id given to the person.
+        """
+
+        return self._write("INSERT INTO people (name, gender, birthdate) VALUES (?, ?, ?)",
+                           name, gender, birthdate).lastrowid
+
+    def remove_person(self, person_id):
+        """Removes a person. Their edges go with them and their spouse's spouse_id is cleared by the foreign keys."""
+
+        self._write("DELETE FROM people WHERE id = ?", person_id)
+
+    def rename(self, person_id, name):
+        """Changes the name of a person."""
+
+        self._write("UPDATE people SET name = ? WHERE id = ?", name, person_id)
+
+    def add_parent_edge(self, parent_id, child_id):
+        """Records that parent_id is a parent of child_id."""
+
+        self._write("INSERT OR IGNORE INTO parent_edges (parent_id, child_id) VALUES (?, ?)", parent_id, child_id)
+
+    def set_spouse(self, person_id, spouse_id):
+        """Records that two people are married to each other."""
+
+        with self.transaction():
+            self.connection.execute("UPDATE people SET spouse_id = ? WHERE id = ?", (spouse_id, person_id))
+            self.connection.execute("UPDATE people SET spouse_id = ? WHERE id = ?", (person_id, spouse_id))
+
+    def parent_ids(self, person_id):
+        """Returns the ids of the parents of a person."""
+
+        return [row[0] for row in self._query("SELECT parent_id FROM parent_edges WHERE child_id = ?", person_id)]
+
+    def child_ids(self, person_id):
+        """Returns the ids of the children of a person."""
+
+        return [row[0] for row in self._query("SELECT child_id FROM parent_edges WHERE parent_id = ?", person_id)]
+
+    def spouse_id(self, person_id):
+        """Returns the id of the spouse of a person, or -1 if they have none."""
+
+        return self.spouses[person_id]
+
+    def compact(self):
+        """Refreshes the query planner's statistics and reclaims space left by removed people."""
+
+        self.connection.execute("PRAGMA optimize")
+        self.connection.execute("VACUUM")
+
+    def related_ids(self, person_id, max_depth=None, edges=EDGE_TYPES):
+        """
+        Finds everyone reachable from a person, nearest first, with a single recursive CTE.
+
+        The walk carries each person's depth, and UNION drops a person reached again at a depth they've already been
+        reached at. They can still come back at a greater depth around the cycles that spouse edges make, so the
+        recursion stops at max_depth, or at one less than the number of people the edges reach, the longest any nearest
+        path can be. Each person is then kept at the smallest depth they were reached at.
+
+        A depth limit keeps this quick. Without one, the walk keeps going round the family until the cap, so it's
+        slower on big families than the breadth-first walk Graph.related does in memory.
+
+        Args:
+            person_id (int): The person to start from.
+            max_depth (int): Optionally, the number of edges to follow outwards.
+            edges (tuple): The edge types to follow: any of "parents", "children" and "spouse".
+
+        Returns:
+            person_ids (list): The ids of everyone reached, not including person_id, ordered by depth and then id.
+        """
+
+        if not edges:
+            return []
+        reach = " UNION ".join(EDGE_STEPS[edge].format(walk="reach", depth="", cap="") for edge in edges)
+        walk = " UNION ".join(EDGE_STEPS[edge].format(walk="walk", depth=", walk.depth + 1",
+                                                      cap=" AND walk.depth < (SELECT depth FROM cap)")
+                              for edge in edges)
+        return [row[0] for row in self.connection.execute(
+            f"WITH RECURSIVE reach(id) AS (SELECT :start UNION {reach}), "
+            f"cap(depth) AS (SELECT MIN(COUNT(*) - 1, COALESCE(:max_depth, COUNT(*))) FROM reach), "
+            f"walk(id, depth) AS (SELECT :start, 0 UNION {walk}) "
+            f"SELECT id FROM walk WHERE id != :start GROUP BY id ORDER BY MIN(depth), id",
+            {"start": person_id, "max_depth": max_depth})]
+
+    def ancestor_ids(self, person_id):
+        """Returns the ids of every ancestor of a person, found with a recursive CTE."""
+
+        return [row[0] for row in self._query(
+            "WITH RECURSIVE up(id) AS (SELECT parent_id FROM parent_edges WHERE child_id = ? "
+            "UNION SELECT e.parent_id FROM parent_edges e JOIN up ON e.child_id = up.id) SELECT id FROM up",
+            person_id)]
+
+    def descendant_ids(self, person_id):
+        """Returns the ids of every descendant of a person, found with a recursive CTE."""
+
+        return [row[0] for row in self._query(
+            "WITH RECURSIVE down(id) AS (SELECT child_id FROM parent_edges WHERE parent_id = ? "
+            "UNION SELECT e.child_id FROM parent_edges e JOIN down ON e.parent_id = down.id) SELECT id FROM down",
+            person_id)]
+
+    def is_ancestor(self, ancestor_id, person_id):
+        """Returns True if ancestor_id is an ancestor of person_id, stopping the CTE as soon as it's found."""
+
+        return self._query(
+            "WITH RECURSIVE up(id) AS (SELECT parent_id FROM parent_edges WHERE child_id = ? "
+            "UNION SELECT e.parent_id FROM parent_edges e JOIN up ON e.child_id = up.id) "
+            "SELECT 1 FROM up WHERE id = ? LIMIT 1", person_id, ancestor_id).fetchone() is not None
+
+    def import_records(self, records):
+        """
+        Adds (name, details) pairs in the format used by Graph.to_dict() in a single transaction.
+
+        People are inserted as the records stream past and their edges are held by name in temporary tables, then
+        joined to ids in one statement each at the end, so records may refer to people further down.
+
+        Args:
+            records (iterable): (name, details) pairs.
+        """
+
+        with self.transaction():
+            execute = self.connection.execute
+            execute("CREATE TEMP TABLE IF NOT EXISTS pending_edges (parent TEXT, child TEXT)")
+            execute("CREATE TEMP TABLE IF NOT EXISTS pending_spouses (name TEXT, spouse TEXT)")
+            for name, details in records:
+                execute("INSERT INTO people (name, gender, birthdate) VALUES (?, ?, ?)",
+                        (name, details.get("gender"), details.get("birthdate")))
+                self.connection.executemany("INSERT INTO pending_edges VALUES (?, ?)",
+                                            [(parent, name) for parent in details.get("parents", [])] +
+                                            [(name, child) for child in details.get("children", [])])
+                if details.get("spouse") is not None:
+                    execute("INSERT INTO pending_spouses VALUES (?, ?)", (name, details["spouse"]))
+
+            # People who never had a record don't join, so references to them are dropped.
+            execute("INSERT OR IGNORE INTO parent_edges (parent_id, child_id) "
+                    "SELECT p.id, c.id FROM pending_edges JOIN people p ON p.name = parent JOIN people c ON c.name = child")
+            execute("UPDATE people SET spouse_id = s.id FROM pending_spouses JOIN people s ON s.name = spouse "
+                    "WHERE pending_spouses.name = people.name")
+            execute("DROP TABLE pending_edges")
+            execute("DROP TABLE pending_spouses")
+
+    def close(self):
+        """Closes the database connection."""
+
+        self.connection.close()
+
+
+class _Column:
+    """Reads and writes one column of the people table by id, so NodeView can use it like a CompactStore list."""
+
+    def __init__(self, store, column):
+        self.store = store
+        self.column = column
+
+    def __getitem__(self, person_id):
+        row = self.store._query(f"SELECT {self.column} FROM people WHERE id = ?", person_id).fetchone()
+        if row is None:
+            raise IndexError(person_id)
+        return row[0]
+
+    def __setitem__(self, person_id, value):
+        self.store._write(f"UPDATE people SET {self.column} = ? WHERE id = ?", value, person_id)
+
+
+class _SpouseColumn(_Column):
+    """The spouse_id column, with NULL read and written as -1 like CompactStore."""
+
+    def __getitem__(self, person_id):
+        spouse_id = super().__getitem__(person_id)
+        return -1 if spouse_id is None else spouse_id
+
+    def __setitem__(self, person_id, value):
+        super().__setitem__(person_id, None if value == -1 else value)
+
+
+class _IdIndex(Mapping):
+    """Name -> id lookups against the unique index on people.name."""
+
+    def __init__(self, store):
+        self.store = store
+
+    def __getitem__(self, name):
+        row = self.store._query("SELECT id FROM people WHERE name = ?", name).fetchone()
+        if row is None:
+            raise KeyError(name)
+        return row[0]
+
+    def __iter__(self):
+        # A separate cursor streams the names, so iterating never holds them all in memory.
+        return (row[0] for row in self.store.connection.cursor().execute("SELECT name FROM people ORDER BY id"))
+
+    def __len__(self):
+        return self.store.live_count
+
+
+class AncestryQueries:
+    """Answers the same questions as AncestryIndex with recursive CTEs, so nothing is built in memory."""
+
+    def __init__(self, graph):
+        self.graph = graph
+        self.store = graph.store
+
+    def _views(self, person_ids):
+        return [NodeView(self.store, person_id) for person_id in person_ids]
+
+    def is_ancestor(self, ancestor, node):
+        """Returns True if ancestor is a parent, grandparent or further ancestor of node."""
+
+        return self.store.is_ancestor(ancestor.id, node.id)
+
+    def is_descendant(self, descendant, node):
+        """Returns True if descendant is a child, grandchild or further descendant of node."""
+
+        return self.is_ancestor(node, descendant)
+
+    def common_ancestors(self, node, other):
+        """Returns every ancestor the two nodes share."""
+
+        shared = set(self.store.ancestor_ids(other.id))
+        return self._views(person_id for person_id in self.store.ancestor_ids(node.id) if person_id in shared)
+
+    def descendant_count(self, node):
+        """Returns how many descendants a node has."""
+
+        return len(self.store.descendant_ids(node.id))
+
+    def ancestor_count(self, node):
+        """Returns how many ancestors a node has."""
+
+        return len(self.store.ancestor_ids(node.id))
+
+
+class SQLiteGraph(CompactGraph):
+    """A Graph whose people live in a SQLite database, written through as the graph changes."""
+
+    def __init__(self, store=None):
+        super().__init__(store if store is not None else SQLiteStore(":memory:"))
+
+    @property
+    def ancestry(self):
+        """Ancestry queries answered by recursive CTEs instead of an in-memory AncestryIndex."""
+
+        return AncestryQueries(self)
+
+    def related(self, node, max_depth=None, edges=EDGE_TYPES):
+        """Finds everyone related to a node with a recursive CTE, nearest first."""
+
+        return (NodeView(self.store, person_id) for person_id in self.store.related_ids(node.id, max_depth, edges))
+
+    # Each change to the graph is committed as one transaction, however many rows it writes, so bulk loads don't
+    # pay for a commit per person or relation.
+
+    def create_node(self, name, gender=None, birthdate=None):
+        with self.store.transaction():
+            return super().create_node(name, gender, birthdate)
+
+    def add_nodes_bulk(self, records):
+        with self.store.transaction():
+            return super().add_nodes_bulk(records)
+
+    def add_relations_bulk(self, relations):
+        with self.store.transaction():
+            return super().add_relations_bulk(relations)
+
+    def remove_node(self, name):
+        with self.store.transaction():
+            super().remove_node(name)
+
+    def set_parents(self, node, parent1, parent2):
+        with self.store.transaction():
+            return super().set_parents(node, parent1, parent2)
+
+    def add_child(self, node, child):
+        with self.store.transaction():
+            super().add_child(node, child)
+
+    def set_spouse(self, node, spouse):
+        with self.store.transaction():
+            super().set_spouse(node, spouse)
+
+    def set_info(self, node, attribute, value):
+        with self.store.transaction():
+            return super().set_info(node, attribute, value)
+
+    @classmethod
+    def from_records(cls, records, path=":memory:"):
+        """
+        Creates a SQLite graph from (name, details) pairs.
+
+        Args:
+            records (iterable): (name, details) pairs in the format produced by to_dict().
+            path (str): The database file to create, or ":memory:" for a temporary one.
+
+        Returns:
+            graph (SQLiteGraph): A new SQLiteGraph populated with the people and relationships in records.
+        """
+
+        store = SQLiteStore(path)
+        store.import_records(records)
+        return cls(store)
+
+
+def write_sqlite(graph, file_path):
+    """
+    Writes a whole graph to a new SQLite database, replacing any file already at file_path.
+
+    The database is built next to the destination and moved into place once it's complete.
+
+    Args:
+        graph (Graph): The graph to be saved.
+        file_path (str): The path to the database file.
+    """
+
+    temp_path = f"{file_path}.tmp"
+    if os.path.exists(temp_path):
+        os.remove(temp_path)
+    store = SQLiteStore(temp_path)
+    store.import_records((name, node.to_dict()) for name, node in graph.nodes.items())
+    # Fold the write-ahead log back in, so the single database file is complete on its own.
+    store.connection.execute("PRAGMA journal_mode = DELETE")
+    store.close()
+    # A log left beside the old database would be replayed into the new one, so it goes first.
+    for suffix in ("-wal", "-shm"):
+        if os.path.exists(file_path + suffix):
+            os.remove(file_path + suffix)
+    os.replace(temp_path, file_path)
@@ -0,0 +1,193 @@
+"""Picks the file format used by the 'load' and 'save' commands from the file extension."""
+
+import os
+import sqlite3
+from graph import Graph
+from compact_store import CompactGraph
+from snapshot import load_snapshot, write_snapshot, SnapshotError
+from gedcom import read_gedcom, write_gedcom, GedcomError
+from journal import Journal, journal_path, replay
+from workspace import WorkspaceGraph, WorkspaceError, write_workspace
+from sqlite_store import SQLiteGraph, SQLiteStore, write_sqlite
+
+
+def load_graph(file_path, compact=False, journal=False):
+    """
+    Loads a graph from a file, choosing the format from its extension.
+
+    If a journal exists next to the file its changes are replayed on top and journaling stays on, so later saves only
+    append to it.
+
+    Args:
+        file_path (str): The path to the file. ".ftb" files are binary snapshots, ".ged" files are GEDCOM, ".ftw"
+            directories are sharded workspaces, ".sqlite" files are SQLite databases and anything else is json.
+        compact (bool): Load json or GEDCOM into the compact storage engine rather than Node objects.
+        journal (bool): Turn journaling on even if the file has no journal yet. Workspaces and databases are never
+            journaled, since their saves already only write what changed.
+
+    Returns:
+        graph (Graph): The loaded graph, an empty graph if the file couldn't be read, or None if it was a GEDCOM file
+        that couldn't be parsed.
+    """
+
+    graph = read_graph(file_path, compact)
+    if graph is None or isinstance(graph, (WorkspaceGraph, SQLiteGraph)):
+        return graph
+
+    path = journal_path(file_path)
+    if os.path.exists(path):
+        count = replay(graph, path)
+        print(f"Replayed {count} changes from {path}.")
+        journal = True
+    if journal:
+        attach_journal(graph, file_path)
+    return graph
+
+
+def read_graph(file_path, compact=False):
+    """
+    Reads the whole graph from a file in the format given by its extension, ignoring any journal.
+
+    Returns None for a GEDCOM file that can't be parsed, since a partly read family tree is worse than keeping the
+    graph that was already loaded.
+    """
+
+    extension = os.path.splitext(os.path.normpath(file_path))[1].lower()
+
+    if extension == ".ftw":
+        try:
+            graph = WorkspaceGraph(file_path)
+            print(f"Workspace opened from {file_path}. People are loaded as they're selected.")
+            return graph
+        except WorkspaceError as e:
+            print(f"{e}. Starting with an empty graph.")
+        return Graph()
+
+    if extension == ".sqlite":
+        if not os.path.exists(file_path):
+            print(f"No file found at {file_path}, starting a new database there.")
+        try:
+            graph = SQLiteGraph(SQLiteStore(file_path))
+            print(f"Database opened from {file_path}. Changes are written to it as they're made.")
+            return graph
+        except sqlite3.DatabaseError as e:
+            print(f"Couldn't open the database {file_path}: {e}. Starting with an empty graph.")
+        return Graph()
+
+    if extension == ".ftb":
+        try:
+            graph = load_snapshot(file_path)
+            print(f"Snapshot opened from {file_path}.")
+            return graph
+        except FileNotFoundError:
+            print(f"No file found at {file_path}, starting with an empty graph.")
+        except SnapshotError as e:
+            print(e)
+        return CompactGraph()
+
+    graph_class = CompactGraph if compact else Graph
+
+    if extension == ".ged":
+        graph = graph_class()
+        try:
+            people, families = read_gedcom(graph, file_path)
+            print(f"Read {people} people and {families} families from {file_path}.")
+        except FileNotFoundError:
+            print(f"No file found at {file_path}, starting with an empty graph.")
+        except GedcomError as e:
+            print(f"Couldn't read {file_path}. {e}")
+            return None
+        return graph
+
+    return graph_class.load_from_json(file_path)
+
+
+def save_graph(graph, file_path, journal=False):
+    """
+    Saves a graph to a file, choosing the format from its extension.
+
+    If the graph is journaling to this file, only the changes made since the last save are appended to the journal.
+    Otherwise the whole graph is written and any old journal for the file is discarded.
+
+    Args:
+        graph (Graph): The graph to be saved.
+        file_path (str): The path to the file. ".ftb" files are binary snapshots, ".ged" files are GEDCOM, ".ftw"
+            directories are sharded workspaces, ".sqlite" files are SQLite databases and anything else is json.
+        journal (bool): Turn journaling on for future saves to this file. Ignored for workspaces and databases.
+    """
+
+    if isinstance(graph, WorkspaceGraph) and os.path.abspath(graph.path) == os.path.abspath(file_path):
+        count = graph.save()
+        print(f"Saved {count} changed shards to {file_path}")
+        return
+    if isinstance(graph, SQLiteGraph) and os.path.abspath(graph.store.path) == os.path.abspath(file_path):
+        print(f"Every change is already saved in {file_path}")
+        return
+    if os.path.splitext(os.path.normpath(file_path))[1].lower() in (".ftw", ".sqlite"):
+        write_graph(graph, file_path)
+        return
+
+    if graph.journal and graph.journal.snapshot_path == file_path:
+        count = graph.journal.flush()
+        print(f"Saved {count} changes to {graph.journal.path}")
+        return
+
+    write_graph(graph, file_path)
+    Journal(file_path).truncate()
+
+    if graph.journal:
+        detach_journal(graph)
+        journal = True
+    if journal:
+        attach_journal(graph, file_path)
+
+
+def compact_journal(graph):
+    """
+    Folds a graph's journal back into a fresh snapshot and empties the journal.
+
+    Args:
+        graph (Graph): A graph that is journaling.
+    """
+
+    write_graph(graph, graph.journal.snapshot_path)
+    graph.journal.truncate()
+
+
+def attach_journal(graph, file_path):
+    """Starts recording the graph's changes to the journal for file_path."""
+
+    graph.journal = Journal(file_path)
+    graph.add_listener(graph.journal)
+
+
+def detach_journal(graph):
+    """Stops recording the graph's changes."""
+
+    graph.remove_listener(graph.journal)
+    graph.journal = None
+
+
+def write_graph(graph, file_path):
+    """Writes the whole graph to a file in the format given by its extension."""
+
+    extension = os.path.splitext(os.path.normpath(file_path))[1].lower()
+
+    # Writing a whole workspace out in another format needs every shard in memory.
+    if isinstance(graph, WorkspaceGraph):
+        graph.load_all()
+
+    if extension == ".ftw":
+        write_workspace(graph, file_path)
+        print(f"Family graph saved to {file_path}")
+    elif extension == ".ftb":
+        write_snapshot(graph, file_path)
+        print(f"Family graph saved to {file_path}")
+    elif extension == ".ged":
+        write_gedcom(graph, file_path)
+        print(f"Family graph saved to {file_path}")
+    elif extension == ".sqlite":
+        write_sqlite(graph, file_path)
+        print(f"Family graph saved to {file_path}")
+    else:
+        graph.save_to_json(file_path)
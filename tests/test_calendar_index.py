@@ -0,0 +1,76 @@
+from datetime import date
+from graph import Graph
+
+
+def make_graph(birthdates):
+    graph = Graph()
+    for name, birthdate in birthdates.items():
+        graph.create_node(name, birthdate=birthdate)
+    return graph
+
+
+def leap_graph():
+    return make_graph({
+        "Feb 28": "28-2-1990",
+        "Leapling": "29-2-1992",
+        "Mar 1": "1-3-1985",
+        "Mar 2": "2-3-1970",
+        "New Year": "1-1-2000",
+        "Dec 31": "31-12-1999",
+    })
+
+
+def test_upcoming_from_feb_28_in_a_non_leap_year():
+    upcoming = list(leap_graph().calendar.upcoming(3, today=date(2023, 2, 28)))
+
+    assert upcoming == [
+        (date(2023, 2, 28), ["Feb 28"]),
+        (date(2023, 3, 1), ["Leapling", "Mar 1"]),
+        (date(2023, 3, 2), ["Mar 2"]),
+    ]
+
+
+def test_upcoming_from_mar_1_in_a_non_leap_year_includes_feb_29():
+    upcoming = list(leap_graph().calendar.upcoming(1, today=date(2023, 3, 1)))
+
+    assert upcoming == [(date(2023, 3, 1), ["Leapling", "Mar 1"])]
+
+
+def test_upcoming_in_a_leap_year_keeps_feb_29():
+    upcoming = list(leap_graph().calendar.upcoming(3, today=date(2024, 2, 28)))
+
+    assert upcoming == [
+        (date(2024, 2, 28), ["Feb 28"]),
+        (date(2024, 2, 29), ["Leapling"]),
+        (date(2024, 3, 1), ["Mar 1"]),
+    ]
+
+
+def test_upcoming_from_dec_31_wraps_into_a_non_leap_year():
+    upcoming = list(leap_graph().calendar.upcoming(61, today=date(2022, 12, 31)))
+
+    assert upcoming == [
+        (date(2022, 12, 31), ["Dec 31"]),
+        (date(2023, 1, 1), ["New Year"]),
+        (date(2023, 2, 28), ["Feb 28"]),
+        (date(2023, 3, 1), ["Leapling", "Mar 1"]),
+    ]
+
+
+def test_upcoming_from_dec_31_wraps_into_a_leap_year():
+    upcoming = list(leap_graph().calendar.upcoming(61, today=date(2023, 12, 31)))
+
+    assert upcoming == [
+        (date(2023, 12, 31), ["Dec 31"]),
+        (date(2024, 1, 1), ["New Year"]),
+        (date(2024, 2, 28), ["Feb 28"]),
+        (date(2024, 2, 29), ["Leapling"]),
+    ]
+
+
+def test_upcoming_over_a_whole_year_lists_everyone_once():
+    upcoming = list(leap_graph().calendar.upcoming(366, today=date(2023, 3, 1)))
+
+    names = [name for _, day_names in upcoming for name in day_names]
+    assert sorted(names) == sorted(leap_graph().nodes)
+    assert [day for day, _ in upcoming] == sorted(day for day, _ in upcoming)
@@ -0,0 +1,70 @@
+import pytest
+from benchmarks.generator import generate_tree
+from compact_store import CompactGraph
+from graph import Graph
+from graph_stats import GraphStatistics
+
+
+def couple_with_child(graph_class):
+    graph = graph_class()
+    mum = graph.create_node("Mum", "female")
+    dad = graph.create_node("Dad", "male")
+    kid = graph.create_node("Kid")
+    graph.set_spouse(mum, dad)
+    return graph, mum, dad, kid
+
+
+@pytest.mark.parametrize("graph_class", [Graph, CompactGraph])
+def test_repeated_edges_are_added_once(graph_class):
+    graph, mum, dad, kid = couple_with_child(graph_class)
+    stats = graph.stats
+    graph.add_child(mum, kid)
+    graph.set_parents(kid, mum, dad)
+    graph.set_parents(kid, mum, dad)
+    graph.add_child(dad, kid)
+
+    assert [parent.name for parent in kid.parents] == ["Mum", "Dad"]
+    assert [child.name for child in mum.children] == ["Kid"]
+    assert [child.name for child in dad.children] == ["Kid"]
+    assert stats.total_children == GraphStatistics(graph).total_children == 2
+
+
+def test_repeated_edges_survive_compaction_once():
+    graph, mum, dad, kid = couple_with_child(CompactGraph)
+    graph.set_parents(kid, mum, dad)
+    graph.compact()
+    graph.add_child(mum, kid)
+    graph.set_parents(kid, mum, dad)
+    graph.compact()
+
+    assert graph.to_dict()["Kid"]["parents"] == ["Mum", "Dad"]
+    assert graph.to_dict()["Mum"]["children"] == ["Kid"]
+
+
+def test_records_listing_a_relative_twice_are_read_once():
+    graph = CompactGraph.from_records([
+        ("Mum", {"spouse": "Dad", "children": ["Kid", "Kid"]}),
+        ("Dad", {"spouse": "Mum", "children": ["Kid"]}),
+        ("Kid", {"parents": ["Mum", "Dad", "Mum"]}),
+    ])
+
+    assert graph.to_dict()["Kid"]["parents"] == ["Mum", "Dad"]
+    assert graph.to_dict()["Mum"]["children"] == ["Kid"]
+
+
+def test_ancestry_answers_match_for_node_views():
+    records = generate_tree(300, seed=5)
+    graph, compact = Graph.from_dict(records), CompactGraph.from_records(records.items())
+    names = list(records)[::7]
+
+    for name in names:
+        node, view = graph.nodes[name], compact.get_node(name)
+        assert compact.ancestry.descendant_count(view) == graph.ancestry.descendant_count(node)
+        assert compact.ancestry.ancestor_count(view) == graph.ancestry.ancestor_count(node)
+        # Each lookup makes a new view, so this compares by id rather than by identity.
+        assert not compact.ancestry.is_ancestor(view, compact.get_node(name))
+        for other in names:
+            assert compact.ancestry.is_ancestor(view, compact.get_node(other)) == \
+                graph.ancestry.is_ancestor(node, graph.nodes[other])
+            assert [person.name for person in compact.ancestry.common_ancestors(view, compact.get_node(other))] == \
+                [person.name for person in graph.ancestry.common_ancestors(node, graph.nodes[other])]
@@ -0,0 +1,187 @@
+import random
+from itertools import count
+from collections import Counter
+from datetime import date
+import pytest
+from benchmarks.generator import generate_tree
+from dates import parse_birthdate
+from graph import Graph
+from traversal import traverse
+
+TODAY = date(2024, 6, 1)
+
+
+def build_indexes(graph):
+    # Indexes are built on first use and kept up to date from then on, so build them all before changing anything.
+    return graph.calendar, graph.stats, graph.components, graph.ancestry, graph.name_index
+
+
+def mutate(graph, rng, steps, names):
+    for _ in range(steps):
+        nodes = list(graph.nodes.values())
+        action = rng.random()
+        if action < 0.2 or len(nodes) < 4:
+            birthdate = f"{rng.randint(1, 28)}-{rng.randint(1, 12)}-{rng.randint(1900, 2020)}"
+            graph.create_node(f"Added {next(names)}", rng.choice(("male", "female")), birthdate)
+        elif action < 0.3:
+            graph.remove_node(rng.choice(nodes).name)
+        elif action < 0.45:
+            graph.set_info(rng.choice(nodes), "birthdate", f"{rng.randint(1, 29)}-2-{rng.randint(1900, 2020)}")
+        elif action < 0.55:
+            graph.set_info(rng.choice(nodes), "name", f"Renamed {next(names)}")
+        elif action < 0.7:
+            single = [node for node in nodes if node.spouse is None]
+            if len(single) >= 2:
+                graph.set_spouse(*rng.sample(single, 2))
+        elif action < 0.85:
+            couples = [node for node in nodes if node.spouse is not None]
+            if couples:
+                parent = rng.choice(couples)
+                child = rng.choice(nodes)
+                if child not in (parent, parent.spouse):
+                    graph.set_parents(child, parent, parent.spouse)
+        else:
+            parent, child = rng.sample(nodes, 2)
+            graph.add_child(parent, child)
+
+
+def families(graph):
+    # Brute force: flood fill over parents, children and spouses, following each edge from either end.
+    family = {}
+    for start in graph.nodes.values():
+        if start in family:
+            continue
+        family[start] = start
+        for node in traverse(start):
+            family[node] = start
+    return family
+
+
+def check_calendar(graph):
+    expected = {}
+    for node in graph.nodes.values():
+        parsed = parse_birthdate(node.birthdate)
+        if parsed:
+            expected.setdefault((parsed.month, parsed.day), set()).add(node.name)
+    actual = {key: set(names) for key, names in graph.calendar.sorted_birthdays()}
+    assert actual == expected
+    assert [key for key, _ in graph.calendar.sorted_birthdays()] == sorted(expected)
+
+
+def check_stats(graph):
+    stats = graph.stats
+    nodes = list(graph.nodes.values())
+    children = sorted(len(node.children) for node in nodes)
+    births = sorted(parse_birthdate(node.birthdate).toordinal() for node in nodes if parse_birthdate(node.birthdate))
+
+    assert stats.people == len(nodes)
+    assert stats.child_counts == Counter(children)
+    assert stats.average_children() == pytest.approx(sum(children) / len(children))
+    middle = len(children) // 2
+    median = children[middle] if len(children) % 2 else (children[middle - 1] + children[middle]) / 2
+    assert stats.median_children() == median
+
+    assert stats.births == len(births)
+    middle = len(births) // 2
+    median = births[middle] if len(births) % 2 else (births[middle - 1] + births[middle]) / 2
+    assert stats.median_age(TODAY) == pytest.approx((TODAY.toordinal() - median) / 365.25)
+    assert stats.average_age(TODAY) == pytest.approx((TODAY.toordinal() - sum(births) / len(births)) / 365.25)
+    assert sum(count for _, count in stats.age_histogram(10, TODAY)) == len(births)
+
+
+def check_components(graph):
+    expected = families(graph)
+    components = graph.components
+    nodes = list(graph.nodes.values())
+    for node in nodes:
+        for other in nodes[:20]:
+            assert components.same_family(node, other) == (expected[node] == expected[other])
+    assert sorted(len(members) for members in components.members().values()) == \
+        sorted(Counter(expected.values()).values())
+
+
+def check_ancestry(graph, rng):
+    ancestry = graph.ancestry
+    nodes = list(graph.nodes.values())
+    for node in rng.sample(nodes, min(30, len(nodes))):
+        descendants = set(traverse(node, edges=("children",)))
+        ancestors = set(traverse(node, edges=("parents",)))
+        assert ancestry.descendant_count(node) == len(descendants)
+        assert ancestry.ancestor_count(node) == len(ancestors)
+        for other in rng.sample(nodes, min(30, len(nodes))):
+            assert ancestry.is_ancestor(node, other) == (other in descendants)
+            common = ancestors & set(traverse(other, edges=("parents",)))
+            assert set(ancestry.common_ancestors(node, other)) == common
+
+
+def check_name_index(graph):
+    index = graph.name_index
+    for prefix in ("", "p", "Person 1", "added", "Renamed 1", "zz"):
+        expected = sorted((name for name in graph.nodes if name.casefold().startswith(prefix.casefold())),
+                          key=lambda name: (name.casefold(), name))
+        assert index.prefix(prefix) == expected
+    for name in list(graph.nodes)[:10]:
+        assert name in index.fuzzy(name, limit=len(graph.nodes))
+
+
+@pytest.mark.parametrize("seed", range(3))
+def test_indexes_match_brute_force_after_changes(seed):
+    rng = random.Random(seed)
+    graph = Graph.from_dict(generate_tree(150, seed=seed))
+    build_indexes(graph)
+
+    names = count()
+    for _ in range(6):
+        mutate(graph, rng, 25, names)
+        check_calendar(graph)
+        check_stats(graph)
+        check_components(graph)
+        check_ancestry(graph, rng)
+        check_name_index(graph)
+
+
+def test_indexes_match_a_fresh_graph():
+    rng = random.Random(7)
+    graph = Graph.from_dict(generate_tree(150, seed=7))
+    build_indexes(graph)
+    mutate(graph, rng, 100, count())
+
+    fresh = Graph.from_dict(graph.to_dict())
+    assert list(graph.calendar.sorted_birthdays()) == list(fresh.calendar.sorted_birthdays())
+    assert graph.stats.median_age(TODAY) == fresh.stats.median_age(TODAY)
+    assert graph.stats.age_histogram(5, TODAY) == fresh.stats.age_histogram(5, TODAY)
+    assert graph.name_index.prefix("") == fresh.name_index.prefix("")
+
+
+def test_families_follow_parents_listed_on_one_side_only():
+    graph = Graph.from_dict({
+        "Mum": {"spouse": "Dad", "parents": [], "children": []},
+        "Dad": {"spouse": "Mum", "parents": [], "children": []},
+        "Kid": {"spouse": None, "parents": ["Mum", "Dad"], "children": []},
+    })
+
+    assert graph.components.same_family(graph.nodes["Kid"], graph.nodes["Mum"])
+    assert graph.components.count == 1
+
+
+def test_rename_onto_another_person_is_refused():
+    graph = Graph.from_dict(generate_tree(20, seed=1))
+    build_indexes(graph)
+
+    assert not graph.set_info(graph.nodes["Person 0"], "name", "Person 1")
+    assert len(graph.nodes) == 20
+    assert graph.nodes["Person 0"].name == "Person 0"
+    check_name_index(graph)
+
+
+@pytest.mark.parametrize("band", [10, 1000, 5000])
+def test_age_histogram_reaches_back_to_year_one(band):
+    graph = Graph.from_dict({
+        "Ancient": {"birthdate": "1-1-1", "parents": [], "children": [], "spouse": None},
+        "Early": {"birthdate": "29-2-4", "parents": [], "children": [], "spouse": None},
+        "Recent": {"birthdate": "1-1-2000", "parents": [], "children": [], "spouse": None},
+    })
+
+    histogram = graph.stats.age_histogram(band, TODAY)
+    assert sum(count for _, count in histogram) == 3
+    assert histogram[-1] == ((2023 // band) * band, 2 if band < 2000 else 3)
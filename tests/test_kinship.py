@@ -0,0 +1,106 @@
+import random
+import pytest
+from benchmarks.generator import generate_tree
+from graph import Graph
+from kinship import _closest
+
+
+def ancestor_generations(node):
+    generations = {node: 0}
+    frontier = [node]
+    while frontier:
+        next_frontier = []
+        for current in frontier:
+            for parent in current.parents:
+                if parent not in generations:
+                    generations[parent] = generations[current] + 1
+                    next_frontier.append(parent)
+        frontier = next_frontier
+    return generations
+
+
+def brute_force(node, other):
+    node_map, other_map = ancestor_generations(node), ancestor_generations(other)
+    return _closest([ancestor for ancestor in node_map if ancestor in other_map], node_map, other_map)
+
+
+def names(found):
+    return found and (sorted(ancestor.name for ancestor in found[0]), found[1], found[2])
+
+
+def random_relative(node, rng):
+    # A short random walk, so most pairs are related and some are far apart.
+    for _ in range(rng.randint(0, 10)):
+        options = [*node.parents, *node.children, *([node.spouse] if node.spouse else [])]
+        if options:
+            node = rng.choice(options)
+    return node
+
+
+def check_against_brute_force(graph, rng, pairs=1500):
+    nodes = list(graph.nodes.values())
+    for _ in range(pairs):
+        node = rng.choice(nodes)
+        other = random_relative(node, rng) if rng.random() < 0.8 else rng.choice(nodes)
+        assert names(graph.kinship.lowest_common_ancestors(node, other)) == names(brute_force(node, other))
+
+
+@pytest.fixture
+def family():
+    graph = Graph()
+    people = {name: graph.create_node(name, gender) for name, gender in [
+        ("Grandad", "male"), ("Grandma", "female"), ("Dad", "male"), ("Mum", "female"), ("Uncle", "male"),
+        ("Aunt", "female"), ("Me", "female"), ("Brother", "male"), ("Cousin", "male"), ("Cousin's Son", "male"),
+        ("Stepmum", "female"), ("Half Sister", "female"),
+    ]}
+    couples = [("Grandad", "Grandma", ["Dad", "Uncle"]), ("Dad", "Mum", ["Me", "Brother"]),
+               ("Uncle", "Aunt", ["Cousin"])]
+    for first, second, children in couples:
+        graph.set_spouse(people[first], people[second])
+        for child in children:
+            graph.set_parents(people[child], people[first], people[second])
+    graph.add_child(people["Cousin"], people["Cousin's Son"])
+    graph.add_child(people["Dad"], people["Half Sister"])
+    return graph, people
+
+
+@pytest.mark.parametrize("other, relationship", [
+    ("Brother", "brother"), ("Half Sister", "half-sister"), ("Uncle", "uncle"), ("Grandma", "grandmother"),
+    ("Cousin", "1st cousin"), ("Cousin's Son", "1st cousin once removed"), ("Aunt", "uncle's spouse"),
+])
+def test_relationships_are_named(family, other, relationship):
+    graph, people = family
+    assert graph.kinship.relationship(people["Me"], people[other]) == relationship
+
+
+def test_unrelated_people_have_no_relationship(family):
+    graph, people = family
+    assert graph.kinship.relationship(people["Me"], people["Brother"]) == "brother"
+    # The index is already built, so the new person is labelled on their own.
+    stranger = graph.create_node("Stranger")
+
+    assert graph.kinship.relationship(people["Me"], stranger) is None
+    assert graph.kinship.relationship(stranger, stranger) == "self"
+
+
+@pytest.mark.parametrize("seed", range(3))
+def test_lowest_common_ancestors_match_brute_force(seed):
+    check_against_brute_force(Graph.from_dict(generate_tree(1500, seed=seed)), random.Random(seed))
+
+
+@pytest.mark.parametrize("seed", range(3))
+def test_lowest_common_ancestors_match_brute_force_with_loops(seed):
+    # Cousins marrying, and children added to random people, give more than one path between relatives.
+    rng = random.Random(seed)
+    graph = Graph.from_dict(generate_tree(1000, seed=seed))
+    nodes = list(graph.nodes.values())
+    check_against_brute_force(graph, rng, pairs=100)
+    for couple in range(30):
+        first, second = rng.sample([node for node in nodes if node.spouse is None], 2)
+        graph.set_spouse(first, second)
+        child = graph.create_node(f"Child {couple}")
+        graph.set_parents(child, first, second)
+    for _ in range(20):
+        graph.add_child(*rng.sample(nodes, 2))
+
+    check_against_brute_force(graph, rng)
@@ -0,0 +1,19 @@
+import pytest
+from command_interface import CommandInterface
+
+
+@pytest.mark.parametrize("detail", [False, True])
+def test_every_command_is_timed_even_when_it_fails(detail):
+    app = CommandInterface()
+    app.perf.set_detail(detail)
+    try:
+        # With no graph loaded, 'info relation' raises, while a bare 'info' prints its usage.
+        for run in range(10):
+            app.onecmd_plus_hooks("info" if run % 2 else "info relation Nobody")
+    finally:
+        app.perf.set_detail(False)
+
+    record = app.perf.records["info"]
+    assert record.wall.count == 10
+    assert len(record.profiles) == (10 if detail else 0)
+    assert app.perf._profiler is None
@@ -0,0 +1,56 @@
+import random
+import pytest
+from benchmarks.generator import generate_tree
+from graph import Graph
+from sqlite_store import SQLiteGraph
+from traversal import traverse
+
+
+@pytest.fixture
+def trees():
+    data = generate_tree(150, seed=5)
+    return Graph.from_dict(data), SQLiteGraph.from_records(data.items())
+
+
+@pytest.mark.parametrize("max_depth", [None, 0, 1, 3, 10])
+@pytest.mark.parametrize("edges", [("parents", "children", "spouse"), ("parents",), ("children", "spouse"), ()])
+def test_related_matches_breadth_first_walk(trees, max_depth, edges):
+    graph, database = trees
+    record_order = {name: index for index, name in enumerate(graph.nodes)}
+    for name in random.Random(1).sample(list(graph.nodes), 20):
+        expected = {}
+        for node, depth in traverse(graph.nodes[name], max_depth=max_depth, edges=edges, with_depth=True):
+            expected.setdefault(depth, set()).add(node.name)
+        # Within a depth the database goes by id, which follows record order.
+        assert [node.name for node in database.related(database.nodes[name], max_depth, edges)] == \
+            [name for depth in sorted(expected) for name in sorted(expected[depth], key=record_order.get)]
+
+
+def test_each_operation_is_one_transaction():
+    graph = SQLiteGraph()
+    statements = []
+    graph.store.connection.set_trace_callback(statements.append)
+
+    graph.add_nodes_bulk([{"name": f"Person {index}"} for index in range(10)])
+    linked, failed = graph.add_relations_bulk([("spouse", "Person 0", "Person 1")] +
+                                              [("parents", f"Person {index}", ("Person 0", "Person 1"))
+                                               for index in range(2, 10)])
+    graph.remove_node("Person 0")
+
+    assert (linked, failed) == (9, [])
+    assert [statement for statement in statements if statement in ("BEGIN ", "COMMIT")] == ["BEGIN ", "COMMIT"] * 3
+    assert not graph.store.connection.in_transaction
+
+
+def test_failed_operation_is_rolled_back():
+    graph = SQLiteGraph()
+
+    def records():
+        yield {"name": "Lost"}
+        raise RuntimeError("interrupted")
+
+    graph.create_node("Before")
+    with pytest.raises(RuntimeError):
+        graph.add_nodes_bulk(records())
+
+    assert list(graph.nodes) == ["Before"]
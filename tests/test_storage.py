@@ -0,0 +1,105 @@
+import os
+import pytest
+from benchmarks.generator import generate_tree
+from graph import Graph
+from journal import journal_path
+from storage import load_graph, save_graph
+from workspace import WorkspaceGraph
+
+
+@pytest.fixture
+def graph():
+    return Graph.from_dict(generate_tree(300, seed=3))
+
+
+def normalised(data):
+    # SQLite hands relations back in id order rather than the order they were added in.
+    return {name: {**record, "parents": sorted(record["parents"]), "children": sorted(record["children"])}
+            for name, record in data.items()}
+
+
+def reload(path):
+    loaded = load_graph(str(path))
+    if isinstance(loaded, WorkspaceGraph):
+        loaded.load_all()
+    return loaded
+
+
+@pytest.mark.parametrize("extension", [".json", ".ftb", ".ged", ".ftw", ".sqlite"])
+def test_round_trip(tmp_path, graph, extension):
+    path = tmp_path / f"tree{extension}"
+    save_graph(graph, str(path))
+
+    assert normalised(reload(path).to_dict()) == normalised(graph.to_dict())
+
+
+@pytest.mark.parametrize("extension", [".json", ".ftb"])
+def test_journal_round_trip(tmp_path, graph, extension):
+    path = str(tmp_path / f"tree{extension}")
+    save_graph(graph, path)
+
+    journaled = load_graph(path, journal=True)
+    parent1 = journaled.create_node("New Parent", "female", "1-2-1950")
+    parent2 = journaled.create_node("Other Parent", "male")
+    journaled.set_spouse(parent1, parent2)
+    child = journaled.create_node("New Child")
+    journaled.set_parents(child, parent1, parent2)
+    journaled.add_child(parent1, journaled.get_node("Person 0"))
+    journaled.set_info(journaled.get_node("Person 1"), "birthdate", "3-4-1900")
+    journaled.set_info(journaled.get_node("Person 2"), "name", "Renamed")
+    journaled.remove_node("Person 3")
+    save_graph(journaled, path)
+
+    assert os.path.exists(journal_path(path))
+    assert reload(path).to_dict() == journaled.to_dict()
+
+
+def test_rename_onto_another_person_is_not_journaled(tmp_path, graph):
+    path = str(tmp_path / "tree.json")
+    save_graph(graph, path)
+
+    journaled = load_graph(path, journal=True)
+    assert not journaled.set_info(journaled.get_node("Person 0"), "name", "Person 1")
+    save_graph(journaled, path)
+
+    reloaded = reload(path)
+    assert len(reloaded.nodes) == len(graph.nodes)
+    assert reloaded.to_dict() == graph.to_dict()
+
+
+def test_malformed_gedcom_is_reported(tmp_path, capsys):
+    path = tmp_path / "broken.ged"
+    path.write_text("0 HEAD\n0 @I1@ INDI\n1 NAME Ann /Smith/\nX NAME oops\n0 TRLR\n")
+
+    assert load_graph(str(path)) is None
+    assert "Line 4" in capsys.readouterr().out
+
+
+def test_gedcom_keeps_names_exactly(tmp_path):
+    names = ["Ann Smith", "Mary van Dyke", "Cher", "AC/DC Fan", "Two  Spaces", " Padded ", "/Slashed/", "Line\nBreak"]
+    graph = Graph()
+    for name in names:
+        graph.create_node(name)
+    path = str(tmp_path / "names.ged")
+    save_graph(graph, path)
+
+    assert list(reload(path).nodes) == names
+    assert "1 NAME Ann /Smith/\n" in open(path, encoding="utf-8").read()
+
+
+def test_gedcom_families_do_not_depend_on_parent_order(tmp_path):
+    # Former's spouse has remarried, so the two of them are only co-parents whichever one is listed first.
+    graph = Graph()
+    former, remarried, spouse, first, second = (graph.create_node(name) for name in
+                                                ("Former", "Remarried", "New Spouse", "First", "Second"))
+    graph.set_spouse(former, remarried)
+    graph.set_spouse(remarried, spouse)
+    graph.add_child(former, first)
+    graph.add_child(remarried, first)
+    graph.add_child(remarried, second)
+    graph.add_child(former, second)
+    path = str(tmp_path / "families.ged")
+    save_graph(graph, path)
+
+    families = open(path, encoding="utf-8").read().split("0 @F")[1:]
+    assert [family.count("1 CHIL") for family in families if "1 CHIL" in family] == [2]
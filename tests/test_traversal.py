@@ -0,0 +1,44 @@
+import random
+import pytest
+from benchmarks.generator import generate_tree
+from graph import Graph
+from traversal import traverse
+
+
+def test_depth_first_finds_people_reached_the_long_way_round_first():
+    # Start -> Short -> Meet -> Far is within the limit, but depth-first reaches Meet first through Long -> Middle,
+    # one edge further out, and has to walk on from Meet again once the shorter path turns up.
+    graph = Graph()
+    start, short, long, middle, meet, far = (graph.create_node(name)
+                                             for name in ("Start", "Short", "Long", "Middle", "Meet", "Far"))
+    graph.add_child(start, short)
+    graph.add_child(start, long)
+    graph.add_child(long, middle)
+    graph.add_child(middle, meet)
+    graph.add_child(short, meet)
+    graph.add_child(meet, far)
+
+    found = list(traverse(start, order="dfs", max_depth=3, edges=("children",)))
+    assert set(found) == set(traverse(start, order="bfs", max_depth=3, edges=("children",)))
+    assert len(found) == len(set(found))
+    assert far in found
+    assert dict(traverse(start, max_depth=3, edges=("children",), with_depth=True))[meet] == 2
+
+
+@pytest.mark.parametrize("max_depth", [1, 2, 3, 5, None])
+def test_depth_first_and_breadth_first_find_the_same_people(max_depth):
+    graph = Graph.from_dict(generate_tree(300, seed=11))
+    rng = random.Random(max_depth)
+    for node in rng.sample(list(graph.nodes.values()), 25):
+        breadth_first = list(traverse(node, order="bfs", max_depth=max_depth))
+        depth_first = list(traverse(node, order="dfs", max_depth=max_depth))
+        assert len(depth_first) == len(set(depth_first))
+        assert set(depth_first) == set(breadth_first)
+
+
+def test_depths_are_only_given_breadth_first():
+    graph = Graph()
+    node = graph.create_node("Alone")
+
+    with pytest.raises(ValueError):
+        list(traverse(node, order="dfs", with_depth=True))
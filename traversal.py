@@ -0,0 +1,100 @@
+"""Iterative traversal of the relationships between nodes."""
+
+from collections import deque
+
+EDGE_TYPES = ("parents", "children", "spouse")
+
+
+def neighbours(node, edges=EDGE_TYPES):
+    """
+    Yields the nodes directly related to a node through the given edge types.
+
+    Args:
+        node (Node): The node to look outwards from.
+        edges (tuple): Any of "parents", "children" and "spouse".
+    """
+
+    for edge in edges:
+        if edge == "spouse":
+            if node.spouse:
+                yield node.spouse
+        else:
+            yield from getattr(node, edge)
+
+
+def traverse(start, order="bfs", max_depth=None, edges=EDGE_TYPES, with_depth=False):
+    """
+    Lazily walks outwards from a node, yielding every related node exactly once.
+
+    The walk is iterative, so deep lineages don't hit the recursion limit, and the depth each node was reached at is
+    kept in a dictionary. The start node itself is never yielded.
+
+    Depth-first walks can reach a node the long way round first, so with max_depth a node is walked from again
+    whenever a shorter path to it turns up, and the same people are found as breadth-first. Depth-first walks can't
+    give each node's depth when it's yielded, so with_depth is only allowed breadth-first.
+
+    Args:
+        start (Node): The node to start from.
+        order (str): "bfs" for breadth-first (nearest relatives first) or "dfs" for depth-first.
+        max_depth (int): Optionally, the number of edges to follow outwards before stopping.
+        edges (tuple): The edge types to follow: any of "parents", "children" and "spouse".
+        with_depth (bool): Yield (node, depth) tuples instead of just nodes. Breadth-first only.
+
+    Yields:
+        node (Node): Each related node, or a (node, depth) tuple if with_depth is set.
+    """
+
+    if order not in ("bfs", "dfs"):
+        raise ValueError(f"Unknown traversal order: {order}.")
+    if with_depth and order == "dfs":
+        raise ValueError("Depths are only known for breadth-first traversals.")
+    for edge in edges:
+        if edge not in EDGE_TYPES:
+            raise ValueError(f"Unknown edge type: {edge}.")
+
+    depths = {start: 0}
+    frontier = deque([(start, 0)])
+    # popleft gives a queue for breadth-first, pop gives a stack for depth-first.
+    take = frontier.popleft if order == "bfs" else frontier.pop
+    # Breadth-first reaches everyone by a shortest path first, and without a limit any path will do.
+    revisit = order == "dfs" and max_depth is not None
+
+    while frontier:
+        node, depth = take()
+        if max_depth is not None and depth >= max_depth:
+            continue
+        # A shorter path to this node was found after it was pushed, and that entry covers everything this one would.
+        if depth > depths[node]:
+            continue
+
+        for relative in neighbours(node, edges):
+            known = depths.get(relative)
+            if known is not None and (not revisit or known <= depth + 1):
+                continue
+            depths[relative] = depth + 1
+            if known is None:
+                yield (relative, depth + 1) if with_depth else relative
+            frontier.append((relative, depth + 1))
+
+
+def cousins(node):
+    """
+    Finds a node's first cousins: the children of its parents' siblings.
+
+    Returns:
+        cousins (list): The cousins in the order they were found, without duplicates.
+    """
+
+    # A dict keeps the order cousins were found in while making the duplicate check O(1).
+    found = {}
+
+    # Loop through the parents, then the grandparents, then the aunts and uncles (A.K.A. piblings).
+    for parent in node.parents:
+        for grandparent in parent.parents:
+            for pibling in grandparent.children:
+                # Ignore the pibling if they're actually a parent of the node.
+                if pibling == parent:
+                    continue
+                for child in pibling.children:
+                    found[child] = None
+    return list(found)
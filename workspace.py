@@ -0,0 +1,349 @@
+"""Sharded workspaces: a graph split by family into separate files that are paged in as they're needed."""
+
+import json
+import os
+import zlib
+from itertools import chain
+from graph import Graph
+from node import Node
+from traversal import neighbours
+
+MANIFEST = "manifest.json"
+VERSION = 1
+SHARD_SIZE = 50_000
+BUCKET_SIZE = 50_000
+
+
+class WorkspaceError(Exception):
+    """Raised when a workspace's manifest is missing or can't be read."""
+
+
+def _bucket(name, buckets):
+    # crc32 rather than hash(), which changes between runs.
+    return zlib.crc32(name.encode()) % buckets
+
+
+def _write_json(file_path, data):
+    # Write to a temporary file and swap it in, so a crash never leaves a half written file behind.
+    temp_path = f"{file_path}.tmp"
+    with open(temp_path, 'w') as f:
+        json.dump(data, f)
+    os.replace(temp_path, file_path)
+
+
+def _shard_file(shard_id):
+    return os.path.join("shards", f"{shard_id}.json")
+
+
+def _bucket_file(bucket):
+    return os.path.join("names", f"{bucket}.json")
+
+
+def write_workspace(graph, path, shard_size=SHARD_SIZE):
+    """
+    Writes a whole graph as a workspace directory.
+
+    Families are never split between shards: each family larger than shard_size gets a shard of its own, and smaller
+    families are packed together up to shard_size people. Which shard each person is in is kept in name buckets,
+    hashed by name, so finding someone's shard only means reading one small bucket file.
+
+    Args:
+        graph (Graph): The graph to be saved. A WorkspaceGraph must have every shard loaded.
+        path (str): The workspace directory, conventionally ending in ".ftw".
+        shard_size (int): The most people to pack into one shard of smaller families.
+    """
+
+    shards = []
+    current = []
+    for family in sorted(graph.components.members().values(), key=len, reverse=True):
+        if current and len(current) + len(family) > shard_size:
+            shards.append(current)
+            current = []
+        current.extend(family)
+    if current:
+        shards.append(current)
+
+    os.makedirs(os.path.join(path, "shards"), exist_ok=True)
+    os.makedirs(os.path.join(path, "names"), exist_ok=True)
+
+    buckets = len(graph.nodes) // BUCKET_SIZE + 1
+    names = [{} for _ in range(buckets)]
+    manifest_shards = {}
+    for shard_id, members in enumerate(shards):
+        _write_json(os.path.join(path, _shard_file(shard_id)), {node.name: node.to_dict() for node in members})
+        manifest_shards[str(shard_id)] = {"file": _shard_file(shard_id), "people": len(members)}
+        for node in members:
+            names[_bucket(node.name, buckets)][node.name] = shard_id
+    for bucket, bucket_names in enumerate(names):
+        _write_json(os.path.join(path, _bucket_file(bucket)), bucket_names)
+
+    _write_json(os.path.join(path, MANIFEST), {
+        "version": VERSION,
+        "buckets": buckets,
+        "next_shard": len(shards),
+        "shards": manifest_shards,
+    })
+
+    # Clear out shards and buckets left over from an older workspace at the same path.
+    keep = {_shard_file(shard_id) for shard_id in range(len(shards))} | {_bucket_file(b) for b in range(buckets)}
+    for directory in ("shards", "names"):
+        for file_name in os.listdir(os.path.join(path, directory)):
+            if os.path.join(directory, file_name) not in keep:
+                os.remove(os.path.join(path, directory, file_name))
+
+
+class WorkspaceGraph(Graph):
+    """
+    Graph backed by a workspace directory, holding only the shards that have been paged in.
+
+    Opening a workspace reads just its manifest. Looking a person up pages in their shard, along with any other shard
+    their family reaches into through edges added since the workspace was written. Changes mark the shards they touch
+    as dirty, and save writes back only those shards and the name buckets that changed.
+
+    Paging in bypasses the listeners, so any index already built is dropped and rebuilt from the loaded people the
+    next time it's needed. Whole-graph commands only see the people paged in so far.
+    """
+
+    def __init__(self, path):
+        super().__init__()
+        self.path = path
+        try:
+            with open(os.path.join(path, MANIFEST), 'r') as f:
+                self.manifest = json.load(f)
+        except (OSError, json.JSONDecodeError) as e:
+            raise WorkspaceError(f"Couldn't read the workspace manifest in {path}: {e}")
+
+        self.loaded = set()
+        self.members = {}
+        self.buckets = {}
+        self.unassigned = set()
+        self.dirty_shards = set()
+        self.dirty_buckets = set()
+        self.add_listener(_ShardTracker(self))
+
+    @property
+    def total_people(self):
+        """The number of people in the workspace, loaded or not."""
+
+        return sum(shard["people"] for shard in self.manifest["shards"].values()) + len(self.unassigned)
+
+    def _names(self, bucket):
+        if bucket not in self.buckets:
+            with open(os.path.join(self.path, _bucket_file(bucket)), 'r') as f:
+                self.buckets[bucket] = json.load(f)
+        return self.buckets[bucket]
+
+    def shard_of(self, name):
+        """Returns the id of the shard a person is saved in, or None if they aren't in one."""
+
+        return self._names(_bucket(name, self.manifest["buckets"])).get(name)
+
+    def _assign(self, name, shard_id):
+        bucket = _bucket(name, self.manifest["buckets"])
+        names = self._names(bucket)
+        if shard_id is None:
+            names.pop(name, None)
+        else:
+            names[name] = shard_id
+        self.dirty_buckets.add(bucket)
+
+    def page_in(self, name):
+        """Loads the shard holding a person, if it isn't loaded already. Returns True if they're now in the graph."""
+
+        if name not in self.nodes:
+            shard_id = self.shard_of(name)
+            if shard_id is not None and shard_id not in self.loaded:
+                self.load_shard(shard_id)
+        return name in self.nodes
+
+    def load_shard(self, shard_id):
+        """Loads a shard, and any shards its people are linked to, into the graph."""
+
+        records = {}
+        pending = [shard_id]
+        while pending:
+            current = pending.pop()
+            if current in self.loaded:
+                continue
+            with open(os.path.join(self.path, self.manifest["shards"][str(current)]["file"]), 'r') as f:
+                data = json.load(f)
+            self.loaded.add(current)
+            self.members[current] = set(data)
+            records.update(data)
+
+            # Edges added after the workspace was written can cross into other shards, which are loaded as well.
+            for details in data.values():
+                spouse = [details["spouse"]] if details.get("spouse") else []
+                for name in chain(details.get("parents", []), details.get("children", []), spouse):
+                    if name not in records and name not in self.nodes:
+                        other = self.shard_of(name)
+                        if other is not None and other not in self.loaded:
+                            pending.append(other)
+
+        nodes = self.nodes
+        for name, details in records.items():
+            nodes[name] = Node(name, details.get("gender"), details.get("birthdate"))
+        for name, details in records.items():
+            node = nodes[name]
+            if spouse := nodes.get(details.get("spouse")):
+                node.spouse = spouse
+            for parent_name in details.get("parents", []):
+                if parent := nodes.get(parent_name):
+                    node.parents.add(parent)
+            for child_name in details.get("children", []):
+                if child := nodes.get(child_name):
+                    node.children.add(child)
+
+        for index in self.indexes.values():
+            self.remove_listener(index)
+        self.indexes = {}
+
+    def load_all(self):
+        """Pages in every shard."""
+
+        for shard_id in self.manifest["shards"]:
+            if int(shard_id) not in self.loaded:
+                self.load_shard(int(shard_id))
+
+    def get_node(self, name):
+        self.page_in(name)
+        return self.nodes.get(name)
+
+    def add_node(self, name, gender=None, birthdate=None):
+        self.page_in(name)
+        return super().add_node(name, gender, birthdate)
+
+    def add_nodes_bulk(self, records):
+        def paged(records):
+            for record in records:
+                self.page_in(record["name"])
+                yield record
+
+        return super().add_nodes_bulk(paged(records))
+
+    def add_relations_bulk(self, relations):
+        relations = list(relations)
+        for _, name, target in relations:
+            self.page_in(name)
+            for target_name in (target if isinstance(target, tuple) else (target,)):
+                self.page_in(target_name)
+        return super().add_relations_bulk(relations)
+
+    def remove_node(self, name):
+        self.page_in(name)
+        super().remove_node(name)
+
+    def save(self):
+        """
+        Writes the dirty shards and name buckets back to the workspace, and the manifest.
+
+        New people join the shard of a relative who already has one, or a new shard if none of their family does.
+
+        Returns:
+            count (int): The number of shards written.
+        """
+
+        self._assign_new_people()
+
+        written = 0
+        for shard_id in sorted(self.dirty_shards):
+            shard = self.manifest["shards"][str(shard_id)]
+            shard_path = os.path.join(self.path, shard["file"])
+            members = self.members[shard_id]
+            if members:
+                _write_json(shard_path, {name: self.nodes[name].to_dict() for name in members})
+                shard["people"] = len(members)
+            else:
+                if os.path.exists(shard_path):
+                    os.remove(shard_path)
+                del self.manifest["shards"][str(shard_id)]
+                del self.members[shard_id]
+                self.loaded.discard(shard_id)
+            written += 1
+
+        for bucket in self.dirty_buckets:
+            _write_json(os.path.join(self.path, _bucket_file(bucket)), self.buckets[bucket])
+        _write_json(os.path.join(self.path, MANIFEST), self.manifest)
+
+        self.dirty_shards = set()
+        self.dirty_buckets = set()
+        return written
+
+    def _assign_new_people(self):
+        # Walk each new person's unassigned relatives, so a whole new family ends up in the same shard.
+        while self.unassigned:
+            name = self.unassigned.pop()
+            family = [self.nodes[name]]
+            shard_id = None
+            for node in family:
+                for relative in neighbours(node):
+                    if relative.name in self.unassigned:
+                        self.unassigned.discard(relative.name)
+                        family.append(relative)
+                    elif shard_id is None:
+                        shard_id = self.shard_of(relative.name)
+
+            if shard_id is None:
+                shard_id = self.manifest["next_shard"]
+                self.manifest["next_shard"] += 1
+                self.manifest["shards"][str(shard_id)] = {"file": _shard_file(shard_id), "people": 0}
+                self.loaded.add(shard_id)
+                self.members[shard_id] = set()
+
+            for node in family:
+                self._assign(node.name, shard_id)
+                self.members[shard_id].add(node.name)
+            self.dirty_shards.add(shard_id)
+
+
+class _ShardTracker:
+    """Listener that marks the shards touched by each change to a WorkspaceGraph as dirty."""
+
+    def __init__(self, graph):
+        self.graph = graph
+
+    def _touch(self, *nodes):
+        for node in nodes:
+            shard_id = self.graph.shard_of(node.name)
+            if shard_id is not None:
+                self.graph.dirty_shards.add(shard_id)
+
+    def on_add_node(self, node):
+        self.graph.unassigned.add(node.name)
+
+    def on_remove_node(self, node):
+        # Relatives' records name the removed person, so their shards are rewritten too.
+        self._touch(node, *neighbours(node))
+        if node.name in self.graph.unassigned:
+            self.graph.unassigned.discard(node.name)
+            return
+        shard_id = self.graph.shard_of(node.name)
+        if shard_id is not None:
+            self.graph.members[shard_id].discard(node.name)
+            self.graph._assign(node.name, None)
+
+    def on_set_parents(self, node, parent1, parent2):
+        self._touch(node, parent1, parent2)
+
+    def on_add_child(self, node, child):
+        self._touch(node, child)
+
+    def on_set_spouse(self, node, spouse):
+        self._touch(node, spouse)
+
+    def on_set_info(self, node, attribute, old_value, new_value):
+        if attribute != "name":
+            self._touch(node)
+            return
+
+        if old_value in self.graph.unassigned:
+            self.graph.unassigned.discard(old_value)
+            self.graph.unassigned.add(new_value)
+            return
+        shard_id = self.graph.shard_of(old_value)
+        if shard_id is not None:
+            self.graph._assign(old_value, None)
+            self.graph._assign(new_value, shard_id)
+            self.graph.members[shard_id].discard(old_value)
+            self.graph.members[shard_id].add(new_value)
+        self._touch(node, *neighbours(node))